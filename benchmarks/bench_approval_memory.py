@@ -0,0 +1,161 @@
+"""Benchmark: memory per pending approval, slotted records vs. the previous dicts.
+
+Fills an ApprovalOrchestrator with `approvals` pending approvals, each
+carrying the headers a typical agent write arrives with (header names
+and values arrive as fresh strings, as they do from a parsed request),
+and reports traced bytes per approval: the record plus its id, expiry
+heap entry and (for "dict/iso") the wakeup event every approval used to
+get. The "dict/iso" store is the previous record: a dict of ISO strings
+holding every request header, Authorization included. Also compares one
+GatewayRequest against the previous non-slotted dataclass.
+
+Usage: python benchmarks/bench_approval_memory.py [approvals]
+"""
+
+import sys
+import os
+import heapq
+import secrets
+import threading
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.approvals import ApprovalOrchestrator, ApprovalStatus
+from gatewayd.gateway import ActionType, GatewayRequest
+
+AGENT_HEADERS = {
+    "Host": "gateway:8080",
+    "User-Agent": "python-requests/2.31.0",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept": "*/*",
+    "Connection": "keep-alive",
+    "Authorization": "Bearer " + secrets.token_urlsafe(32),
+    "Content-Type": "application/json",
+    "Content-Length": "512",
+    "X-Provider": "github",
+    "X-Creds": "github-default",
+}
+
+
+class LegacyApprovalOrchestrator(ApprovalOrchestrator):
+    """ApprovalOrchestrator storing the previous dict-of-ISO-strings record."""
+
+    def _create_approval(self, gateway_req, tenant_id, details, fingerprint):
+        approval_id = str(uuid.uuid4())
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        stripe = self._stripe(approval_id)
+        with stripe.lock:
+            self.approval_events[approval_id] = threading.Event()
+            self.approvals[approval_id] = {
+                "id": approval_id,
+                "tenant_id": tenant_id,
+                "request_id": gateway_req.id,
+                "status": ApprovalStatus.PENDING.value,
+                "timestamp": datetime.utcfromtimestamp(now).isoformat(),
+                "expires_at": datetime.utcfromtimestamp(expires_at).isoformat(),
+                "details": details,
+                "fingerprint": fingerprint,
+                "waiters": 1,
+                "decided_at": None,
+                "decided_by": None,
+            }
+            heapq.heappush(stripe.expiry_heap, (expires_at, approval_id))
+        return approval_id
+
+
+@dataclass
+class LegacyGatewayRequest:
+    """GatewayRequest before slots, with an ISO timestamp."""
+    id: str
+    timestamp: str
+    method: str
+    path: str
+    provider: str
+    action_type: ActionType
+    requires_approval: bool
+    session_token: Optional[str] = None
+    cred_selector: Optional[str] = None
+    approval_id: Optional[str] = None
+
+
+def fresh(value: str) -> str:
+    """A new string equal to value, like one parsed out of a request."""
+    return "".join(list(value))
+
+
+def traced(build, count):
+    """Traced bytes per item held by what build() returns, over count calls."""
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        kept.append(build(i))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # The list of results is the benchmark's, not the store's
+    return (used - sys.getsizeof(kept)) / count
+
+
+def request_details(i):
+    """Approval details for one write, built the way Gateway.request_approval does."""
+    return {
+        "method": fresh("POST"),
+        "path": fresh(f"/repos/org/repo-{i % 50}/issues"),
+        "provider": fresh("github"),
+        "session_id": secrets.token_hex(8),
+        "headers": {fresh(name): fresh(value) for name, value in AGENT_HEADERS.items()},
+    }
+
+
+def bench_orchestrator(label, orchestrator, count):
+    """Fill an orchestrator with pending approvals and report bytes each."""
+    gateway_req = GatewayRequest(
+        id=str(uuid.uuid4()), timestamp=time.time(), method="POST", path="/repos/org/repo/issues",
+        provider="github", action_type=ActionType.WRITE, requires_approval=True,
+    )
+    started = time.perf_counter()
+    used = traced(lambda i: orchestrator.request_approval(gateway_req, fresh("tenant-a"), request_details(i)), count)
+    elapsed = time.perf_counter() - started
+
+    approval = next(iter(orchestrator.approvals.values()))
+    kept = len(approval["details"].get("headers", {}))
+    print(f"  {label:<12} {used:6.0f} bytes/approval  {kept:2d} headers kept  (populate {elapsed:.1f}s)")
+
+
+def bench_gateway_request(count):
+    """Bytes per GatewayRequest, previous dataclass vs. slotted."""
+    def legacy(i):
+        return LegacyGatewayRequest(
+            id=str(uuid.uuid4()), timestamp=datetime.utcnow().isoformat(), method="POST",
+            path=fresh(f"/repos/org/repo-{i % 50}/issues"), provider="github",
+            action_type=ActionType.WRITE, requires_approval=True,
+        )
+
+    def slotted(i):
+        return GatewayRequest(
+            id=str(uuid.uuid4()), timestamp=time.time(), method="POST",
+            path=fresh(f"/repos/org/repo-{i % 50}/issues"), provider="github",
+            action_type=ActionType.WRITE, requires_approval=True,
+        )
+
+    print(f"  GatewayRequest: dict/iso {traced(legacy, count):.0f} bytes, slots/float {traced(slotted, count):.0f} bytes")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print(f"{count} pending approvals, {len(AGENT_HEADERS)} request headers each")
+    bench_orchestrator("dict/iso", LegacyApprovalOrchestrator(), count)
+    bench_orchestrator("slots/float", ApprovalOrchestrator(), count)
+    bench_gateway_request(min(count, 100_000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Micro-benchmark: token/trie CLI classifier vs. the old substring heuristics.
+
+Classifies a corpus of recorded command lines ("tool arg arg ...", one per
+line) or, without a file, a synthetic corpus, and reports throughput plus how
+many commands the two approaches disagree on.
+
+Usage: python benchmarks/bench_cli_classifier.py [commands] [corpus-file]
+"""
+
+import sys
+import os
+import random
+import shlex
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.cli_classifier import get_classifier
+
+TEMPLATES = [
+    "aws s3 ls s3://bucket-{n}",
+    "aws --region us-east-1 s3 rm s3://bucket-{n}/key",
+    "aws --profile prod ec2 describe-instances --instance-ids i-{n}",
+    "aws ec2 terminate-instances --instance-ids i-{n}",
+    "aws iam list-users --max-items {n}",
+    "kubectl get pods -n team-{n}",
+    "kubectl -n team-{n} delete pod web-{n}",
+    "kubectl --context prod rollout status deploy/api-{n}",
+    "kubectl apply -f manifests/app-{n}.yaml",
+    "gcloud compute instances list --project p-{n}",
+    "gcloud --project p-{n} compute instances delete vm-{n} --quiet",
+    "gcloud run deploy svc-{n} --image gcr.io/p/img:{n}",
+    "gh pr list --repo o/r{n}",
+    "gh pr create --title 'Fix {n}' --body 'delete stale code'",
+    "gh -R o/r{n} issue view {n}",
+    "gh api repos/o/r{n}/issues -f title=bug",
+    "terraform plan -out plan-{n}",
+    "terraform -chdir=env-{n} apply -auto-approve",
+    "curl -sSL https://api.example.com/items/{n}",
+    "curl -X POST -d id={n} https://api.example.com/items",
+]
+
+
+def legacy_classify(provider, command):
+    """The pre-trie PolicyEngine.classify_cli_command: substring checks on the raw string."""
+    command_lower = command.lower()
+    if provider == "aws":
+        return "read" if any(command_lower.startswith(p) for p in ["list", "describe", "get"]) else "write"
+    if provider == "gcloud":
+        if command_lower in ["list", "describe"]:
+            return "read"
+        if any(command_lower.startswith(p) for p in ["create", "delete", "update", "deploy", "set", "enable", "disable"]):
+            return "write"
+        return "read"
+    if provider == "terraform":
+        return "write" if any(p in command_lower for p in ["apply", "destroy"]) else "read"
+    if provider == "kubectl":
+        mutating = ["apply", "delete", "scale", "patch", "set image", "rollout restart"]
+        return "write" if any(p in command_lower for p in mutating) else "read"
+    if provider == "gh":
+        mutating = ["create", "delete", "update", "edit", "merge", "close", "open", "fork"]
+        return "write" if any(m in command_lower for m in mutating) else "read"
+    if provider == "curl":
+        methods = ["-X POST", "-X PUT", "-X PATCH", "-X DELETE", "-d "]
+        return "write" if any(m in command_lower for m in methods) else "read"
+    return "write"
+
+
+def load_corpus(count, path=None):
+    """(tool, rest-of-line, argv) triples from a file or the synthetic templates."""
+    if path:
+        with open(path) as f:
+            lines = [line.strip() for line in f if line.strip()]
+    else:
+        rng = random.Random(1)
+        lines = [rng.choice(TEMPLATES).format(n=rng.randrange(1000)) for _ in range(count)]
+
+    corpus = []
+    for line in lines:
+        tool, _, rest = line.partition(" ")
+        corpus.append((tool, rest, shlex.split(rest)))
+    return corpus
+
+
+def bench(label, fn, corpus):
+    """Time fn over the corpus and print throughput."""
+    started = time.perf_counter()
+    results = [fn(entry) for entry in corpus]
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed / len(corpus) * 1e6:8.2f} us/command  {len(corpus) / elapsed:10.0f} commands/s")
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    corpus = load_corpus(count, sys.argv[2] if len(sys.argv) > 2 else None)
+    classifier = get_classifier()
+    print(f"{len(corpus)} commands")
+
+    legacy = bench("substring", lambda entry: legacy_classify(entry[0], entry[1]), corpus)
+    trie = bench("trie", lambda entry: classifier.classify(entry[0], entry[2]), corpus)
+
+    differ = [entry for entry, old, new in zip(corpus, legacy, trie) if old != new]
+    print(f"  {len(differ)} commands classified differently, e.g.:")
+    seen = set()
+    for tool, rest, _ in differ:
+        if (tool, rest.split(" ")[0]) in seen:
+            continue
+        seen.add((tool, rest.split(" ")[0]))
+        print(f"    {tool} {rest}: {legacy_classify(tool, rest)} -> {classifier.classify(tool, shlex.split(rest))}")
+        if len(seen) == 5:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Micro-benchmark: compiled policy index vs. the linear fnmatch scan.
+
+Usage: python benchmarks/bench_policy.py [exceptions] [requests]
+"""
+
+import sys
+import os
+import random
+import time
+import fnmatch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.policy import CompiledPolicy
+
+PROVIDERS = ["github", "slack", "datadog", "linear", "gcp", "aws"]
+METHODS = ["POST", "PUT", "PATCH", "DELETE"]
+
+
+def legacy_is_exception(provider, method, path, policy):
+    """The pre-index implementation: every exception, every pattern, in order."""
+    for exception in policy.get("exceptions", []):
+        exc_provider = exception.get("provider")
+        exc_methods = exception.get("methods", [])
+        exc_paths = exception.get("paths", [])
+
+        if exc_provider and exc_provider != provider:
+            continue
+        if exc_methods and method not in exc_methods:
+            continue
+        if exc_paths:
+            if any(fnmatch.fnmatch(path, pattern) for pattern in exc_paths):
+                return True
+            continue
+        return True
+    return False
+
+
+def make_policy(count, rng):
+    """Cautious policy with `count` exceptions spread over providers and repos."""
+    exceptions = []
+    for i in range(count):
+        exceptions.append({
+            "provider": rng.choice(PROVIDERS),
+            "methods": rng.sample(METHODS, rng.randint(1, 3)),
+            "paths": [f"/repos/org{i}/*/issues", f"/repos/org{i}/*/pulls/*"],
+        })
+    return {"mode": "cautious", "exceptions": exceptions}
+
+
+def make_requests(count, exception_count, rng):
+    """Mix of matching and non-matching write requests."""
+    requests = []
+    for _ in range(count):
+        org = rng.randrange(exception_count * 2)
+        suffix = rng.choice(["issues", "pulls/7", "contents/README.md"])
+        requests.append((rng.choice(PROVIDERS), rng.choice(METHODS), f"/repos/org{org}/repo/{suffix}"))
+    return requests
+
+
+def bench(label, fn, requests):
+    """Time fn over requests and print per-request cost."""
+    started = time.perf_counter()
+    results = [fn(*r) for r in requests]
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed / len(requests) * 1e6:8.2f} us/request")
+    return results, elapsed
+
+
+def main():
+    exception_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    request_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    rng = random.Random(1)
+
+    policy = make_policy(exception_count, rng)
+    requests = make_requests(request_count, exception_count, rng)
+
+    started = time.perf_counter()
+    compiled = CompiledPolicy(policy)
+    print(f"{exception_count} exceptions compiled in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    legacy, legacy_time = bench("linear", lambda p, m, path: legacy_is_exception(p, m, path, policy), requests)
+    indexed, indexed_time = bench("compiled", lambda p, m, path: compiled.match(p, m, path) is not None, requests)
+
+    assert legacy == indexed, "compiled index disagrees with linear scan"
+    print(f"  speedup    {legacy_time / indexed_time:8.1f}x ({sum(indexed)} of {request_count} matched)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Micro-benchmark: PolicyEngine.requires_approval with and without the decision cache.
+
+Agents hit a small working set of endpoints over and over, so requests are
+drawn from a skewed (Zipf-like) distribution over `endpoints` distinct paths.
+
+Usage: python benchmarks/bench_policy_cache.py [exceptions] [requests] [endpoints]
+"""
+
+import sys
+import os
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.app import ActionType
+from gatewayd.policy import PolicyEngine, CompiledPolicy
+from bench_policy import make_policy, PROVIDERS, METHODS
+
+
+def make_engine(policy, cache_size):
+    """Policy engine serving one cautious tenant."""
+    engine = PolicyEngine(cache_size=cache_size)
+    engine.tenant_policies["bench"] = policy
+    engine.compiled_policies["bench"] = CompiledPolicy(policy)
+    return engine
+
+
+def make_requests(count, endpoint_count, exception_count, rng):
+    """Skewed request stream over a fixed set of endpoints."""
+    endpoints = [
+        (rng.choice(PROVIDERS), rng.choice(METHODS), f"repos/org{rng.randrange(exception_count * 2)}/repo/issues")
+        for _ in range(endpoint_count)
+    ]
+    weights = [1 / (rank + 1) for rank in range(endpoint_count)]
+    return rng.choices(endpoints, weights=weights, k=count)
+
+
+def bench(label, engine, requests):
+    """Time requires_approval over requests and print per-request cost."""
+    started = time.perf_counter()
+    results = [engine.requires_approval("bench", ActionType.WRITE, p, m, path) for p, m, path in requests]
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed / len(requests) * 1e6:8.2f} us/request  {len(requests) / elapsed:10.0f} req/s")
+    return results, elapsed
+
+
+def main():
+    exception_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    request_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    endpoint_count = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    rng = random.Random(1)
+
+    policy = make_policy(exception_count, rng)
+    requests = make_requests(request_count, endpoint_count, exception_count, rng)
+    print(f"{exception_count} exceptions, {request_count} requests over {endpoint_count} endpoints")
+
+    uncached, uncached_time = bench("uncached", make_engine(policy, 0), requests)
+    engine = make_engine(policy, 4096)
+    cached, cached_time = bench("cached", engine, requests)
+
+    assert uncached == cached, "cached decisions disagree with uncached ones"
+    stats = engine.decision_cache.get_stats()
+    print(f"  speedup    {uncached_time / cached_time:8.1f}x (hit ratio {stats['hit_ratio']:.3f})")
+
+
+if __name__ == "__main__":
+    main()
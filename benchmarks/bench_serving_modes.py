@@ -0,0 +1,163 @@
+"""Load test: threaded Flask mode vs. the ASGI (asyncio) mode.
+
+Both modes are driven in-process against a local fake upstream, so the
+numbers show what concurrency costs inside the gateway (threads, Python heap,
+wall time) rather than socket overhead:
+
+  parked  N sync-mode writes wait for approval at once, then are approved
+  reads   N concurrent reads against an upstream that answers after a delay
+
+Flask gets one thread per in-flight request, as Werkzeug's threaded server
+does. ASGI requests are coroutines; its upstream calls use httpx when it is
+installed, otherwise worker threads.
+
+Usage: python benchmarks/bench_serving_modes.py [requests] [upstream_delay_ms]
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("PROXY_CACHE_ENABLED", "false")
+os.environ.setdefault("PROXY_COALESCE_ENABLED", "false")
+
+from gatewayd.app import create_app
+from gatewayd.asgi import create_asgi_app
+from asgi_client import asgi_request
+from fake_upstream import FakeUpstream
+
+
+class PeakThreads:
+    """Samples the live thread count in the background."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def report(mode, scenario, count, elapsed, threads, heap_peak):
+    """Print one result line."""
+    print(
+        f"  {mode:<8} {scenario:<7} {count / elapsed:9.0f} req/s  {elapsed:6.2f}s  "
+        f"peak threads {threads:5d}  heap peak {heap_peak / 1024 / 1024:7.1f} MiB"
+    )
+
+
+def write_paths(count):
+    """Distinct write paths, so writes do not coalesce onto one approval."""
+    return [f"/api/v1/proxy/repos/o/r/issues/{i}/comments" for i in range(count)]
+
+
+def bench_flask(upstream_url, count):
+    """Parked writes and concurrent reads through the Flask app, one thread per request."""
+    app = create_app()
+    app.extensions["http_proxy"].base_urls["github"] = upstream_url
+    orchestrator = app.extensions["approval_orchestrator"]
+    token = app.extensions["session_manager"].create_session("default")
+    headers = {"Authorization": f"Bearer {token}", "X-Provider": "github"}
+
+    def run_threads(calls):
+        threads = [threading.Thread(target=call) for call in calls]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    # Parked writes
+    tracemalloc.start()
+    with PeakThreads() as peak:
+        threads = run_threads([
+            lambda path=path: app.test_client().post(path, data=b"{}", headers=headers)
+            for path in write_paths(count)
+        ])
+        while orchestrator.get_stats()["pending"] < count:
+            time.sleep(0.01)
+        started = time.perf_counter()
+        for approval_id in list(orchestrator.approvals):
+            orchestrator.approve(approval_id)
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    report("flask", "parked", count, elapsed, peak.peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    # Concurrent reads
+    tracemalloc.start()
+    with PeakThreads() as peak:
+        started = time.perf_counter()
+        threads = run_threads([
+            lambda: app.test_client().get("/api/v1/proxy/slow", headers=headers)
+            for _ in range(count)
+        ])
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    report("flask", "reads", count, elapsed, peak.peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+
+def bench_asgi(upstream_url, count):
+    """Parked writes and concurrent reads through the ASGI app, one coroutine per request."""
+    app = create_asgi_app()
+    gateway = app.gateway
+    gateway.http_proxy.base_urls["github"] = upstream_url
+    orchestrator = gateway.approval_orchestrator
+    token = gateway.session_manager.create_session("default")
+    headers = {"Authorization": f"Bearer {token}", "X-Provider": "github"}
+
+    async def parked():
+        writes = [asyncio.create_task(asgi_request(app, "POST", path, headers, body=b"{}")) for path in write_paths(count)]
+        while orchestrator.get_stats()["pending"] < count:
+            await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        for approval_id in list(orchestrator.approvals):
+            orchestrator.approve(approval_id)
+        await asyncio.gather(*writes)
+        return time.perf_counter() - started
+
+    async def reads():
+        started = time.perf_counter()
+        await asyncio.gather(*[asgi_request(app, "GET", "/api/v1/proxy/slow", headers) for _ in range(count)])
+        return time.perf_counter() - started
+
+    for scenario, run in (("parked", parked), ("reads", reads)):
+        tracemalloc.start()
+        with PeakThreads() as peak:
+            elapsed = asyncio.run(run())
+        report("asgi", scenario, count, elapsed, peak.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    delay = (int(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+
+    with FakeUpstream() as upstream:
+        upstream.inject_fault("GET", "/slow", delay=delay)
+        client = "httpx" if create_asgi_app().gateway.http_proxy.async_pool.available else "worker threads"
+        print(f"{count} concurrent requests, upstream delay {delay * 1000:.0f} ms (ASGI upstream client: {client})")
+        bench_flask(upstream.url, count)
+        bench_asgi(upstream.url, count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark: compact session store vs. the previous dict-of-dicts with ISO timestamps.
+
+Populates each store with `sessions` tokens spread over `tenants` tenants
+(tenant ids arrive as fresh strings, as they do from request JSON), then
+reports traced bytes per session, including the token string and the
+expiry heap entry, and validate_token cost over random live tokens.
+
+Usage: python benchmarks/bench_session_store.py [sessions] [tenants] [lookups]
+"""
+
+import sys
+import os
+import random
+import secrets
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.auth import SessionManager
+
+
+class LegacySessionStore:
+    """SessionManager's previous storage: one dict of ISO strings per token."""
+
+    def __init__(self):
+        self.sessions = {}
+
+    def create_session(self, tenant_id, ttl_seconds=3600):
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = {
+            "tenant_id": tenant_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "expires_at": (datetime.utcnow() + timedelta(seconds=ttl_seconds)).isoformat(),
+        }
+        return token
+
+    def validate_token(self, token):
+        if token not in self.sessions:
+            return None
+        session = self.sessions[token]
+        if datetime.utcnow() > datetime.fromisoformat(session["expires_at"]):
+            del self.sessions[token]
+            return None
+        return session
+
+
+def populate(store, count, tenants):
+    """Create count sessions and return (tokens, traced bytes they hold)."""
+    tokens = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        # A new string per call, like a tenant id parsed from a request body
+        tokens.append(store.create_session("".join(("tenant-", str(i % tenants)))))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # The token list itself is the benchmark's, not the store's
+    return tokens, used - sys.getsizeof(tokens)
+
+
+def bench(label, store, count, tenants, lookups, rng):
+    """Populate a store and time validate_token."""
+    started = time.perf_counter()
+    tokens, used = populate(store, count, tenants)
+    populate_s = time.perf_counter() - started
+
+    sample = [rng.choice(tokens) for _ in range(lookups)]
+    validate = store.validate_token
+    started = time.perf_counter()
+    for token in sample:
+        validate(token)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"  {label:<10} {used / count:7.0f} bytes/session  "
+        f"{elapsed / lookups * 1e9:7.0f} ns/validate  (populate {populate_s:.1f}s)"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tenants = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 200_000
+    rng = random.Random(0)
+
+    print(f"{count} sessions over {tenants} tenants, {lookups} validations")
+    bench("dict/iso", LegacySessionStore(), count, tenants, lookups, rng)
+    bench("slots/heap", SessionManager(token_format="opaque"), count, tenants, lookups, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,74 @@
-"""Entry point for running gatewayd as a module."""
+"""Entry point for running gatewayd as a module.
 
+    python -m gatewayd                 # development server
+    APPROVAL_GRANTS=false python -m gatewayd serve --workers 4 --threads 32
+"""
+
+import argparse
+import logging
 import os
-from gatewayd.app import create_app
+
+
+def main():
+    """Parse the command line and start the requested server."""
+    parser = argparse.ArgumentParser(prog="python -m gatewayd")
+    commands = parser.add_subparsers(dest="command")
+
+    serve_parser = commands.add_parser("serve", help="Run worker processes for production")
+    serve_parser.add_argument("--host", default=os.getenv("GATEWAY_HOST", "0.0.0.0"))
+    serve_parser.add_argument("--port", type=int, default=int(os.getenv("GATEWAY_PORT", "5000")))
+    serve_parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("GATEWAY_WORKERS", "1")),
+        help="Worker processes (default: GATEWAY_WORKERS or 1; see DEVELOPMENT.md for what is per worker)",
+    )
+    serve_parser.add_argument(
+        "--threads", type=int, default=int(os.getenv("GATEWAY_THREADS", "32")),
+        help="Request threads per worker (default: GATEWAY_THREADS or 32)",
+    )
+    serve_parser.add_argument(
+        "--asgi", action="store_true",
+        help="Serve the ASGI app with uvicorn instead (--threads is ignored)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    if args.command != "serve":
+        from gatewayd.app import create_app
+
+        app = create_app()
+        debug_mode = os.getenv("DEBUG", "false").lower() == "true"
+        app.run(host="0.0.0.0", port=5000, debug=debug_mode)
+        return
+
+    if args.workers < 1 or args.threads < 1:
+        parser.error("--workers and --threads must be at least 1")
+    if args.workers > 1:
+        # Parked requests and grants are not shared between workers yet
+        if os.getenv("APPROVAL_MODE", "sync").lower() != "sync":
+            parser.error("--workers > 1 needs APPROVAL_MODE=sync (async-parked requests are per worker)")
+        if os.getenv("APPROVAL_GRANTS", "true").lower() != "false":
+            parser.error("--workers > 1 needs APPROVAL_GRANTS=false (duration and always grants are per worker)")
+    # Workers read it to turn off Prefer: respond-async
+    os.environ["GATEWAY_WORKERS"] = str(args.workers)
+
+    if args.asgi:
+        try:
+            import uvicorn
+        except ImportError:
+            parser.error("--asgi needs uvicorn (pip install -r requirements-asgi.txt)")
+        if args.workers > 1:
+            os.environ.setdefault("GATEWAY_STATE_BACKEND", "sqlite")
+        uvicorn.run("gatewayd.asgi:create_asgi_app", factory=True, host=args.host, port=args.port, workers=args.workers)
+        return
+
+    from gatewayd.serve import serve
+
+    serve(args.host, args.port, args.workers, args.threads)
+
 
 if __name__ == "__main__":
-    app = create_app()
-    debug_mode = os.getenv("DEBUG", "false").lower() == "true"
-    app.run(host="0.0.0.0", port=5000, debug=debug_mode)
+    main()
@@ -3,20 +3,16 @@
 import json
 import logging
 import os
-import uuid
-from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from typing import Dict, Optional, Any
-from enum import Enum
 
 from flask import Flask, request, jsonify, Response
 from werkzeug.exceptions import HTTPException
 
-from .proxy import HTTPProxy
-from .approvals import ApprovalOrchestrator
-from .credentials import CredentialBroker
-from .policy import PolicyEngine
-from .auth import SessionManager
+from .approvals import ApprovalStatus
+from .gateway import Gateway, ActionType, CredentialsUnavailable, GatewayRequest
+from .pending import PendingRequest
 
 
 # Configure logging
@@ -27,45 +23,31 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class ActionType(Enum):
-    """Classification of actions."""
-    READ = "read"
-    WRITE = "write"
-
-
-@dataclass
-class GatewayRequest:
-    """Request metadata for logging and classification."""
-    id: str
-    timestamp: str
-    method: str
-    path: str
-    provider: str
-    action_type: ActionType
-    requires_approval: bool
-    session_token: Optional[str] = None
-    cred_selector: Optional[str] = None
-    approval_id: Optional[str] = None
-
-
 def create_app(config_path: Optional[str] = None) -> Flask:
     """Create and configure the Flask application."""
     app = Flask(__name__)
     app.config["JSON_SORT_KEYS"] = False
 
-    # Initialize core components
-    session_manager = SessionManager()
-    credential_broker = CredentialBroker(config_path)
-    policy_engine = PolicyEngine(config_path)
-    approval_orchestrator = ApprovalOrchestrator()
-    http_proxy = HTTPProxy(credential_broker, policy_engine)
+    # Initialize core components (shared with the ASGI app)
+    gateway = Gateway(config_path)
+    gateway.start()
+    session_manager = gateway.session_manager
+    policy_engine = gateway.policy_engine
+    approval_orchestrator = gateway.approval_orchestrator
+    http_proxy = gateway.http_proxy
+    pending_requests = gateway.pending_requests
+    max_wait_seconds = gateway.max_wait_seconds
+    sse_heartbeat_seconds = gateway.sse_heartbeat_seconds
 
     # Store references for request handlers
+    app.extensions["gateway"] = gateway
     app.extensions["session_manager"] = session_manager
-    app.extensions["credential_broker"] = credential_broker
+    app.extensions["credential_broker"] = gateway.credential_broker
     app.extensions["policy_engine"] = policy_engine
     app.extensions["approval_orchestrator"] = approval_orchestrator
+    app.extensions["grant_table"] = gateway.grant_table
     app.extensions["http_proxy"] = http_proxy
+    app.extensions["pending_requests"] = pending_requests
 
     @app.before_request
     def log_request():
@@ -80,30 +62,15 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         """Health check endpoint."""
         return jsonify({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
 
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Runtime statistics for gateway components."""
+        return jsonify(gateway.get_stats())
+
     @app.route("/session/new", methods=["POST"])
     def create_session():
         """Create a new agent session."""
-        data = request.get_json() or {}
-        tenant_id = data.get("tenant_id")
-        enrollment_secret = data.get("enrollment_secret")
-
-        if not tenant_id or not enrollment_secret:
-            return jsonify({"error": "Missing tenant_id or enrollment_secret"}), 400
-
-        # Verify enrollment secret (in production, validate against secure storage)
-        if not session_manager.verify_enrollment(tenant_id, enrollment_secret):
-            logger.warning(f"Failed enrollment attempt for tenant: {tenant_id}")
-            return jsonify({"error": "Invalid credentials"}), 401
-
-        # Generate session token
-        token = session_manager.create_session(tenant_id)
-        ttl_seconds = 3600  # 1 hour default
-
-        return jsonify({
-            "session_token": token,
-            "ttl_seconds": ttl_seconds,
-            "expires_at": (datetime.utcnow() + timedelta(seconds=ttl_seconds)).isoformat(),
-        }), 201
+        return _render(gateway.create_session(request.get_json() or {}))
 
     @app.route("/api/v1/proxy/<path:target_path>", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"])
     def proxy_request(target_path: str):
@@ -122,49 +89,52 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         cred_selector = request.headers.get("X-Creds")
         provider = request.headers.get("X-Provider", "unknown")
 
-        # Create request metadata
-        gateway_req = GatewayRequest(
-            id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat(),
-            method=request.method,
-            path=target_path,
+        # Some POSTs (GraphQL queries) are reads; the body decides. It is
+        # spooled so it can be inspected and still forwarded afterwards.
+        body = None
+        inspected = None
+        chunked = request.headers.get("Transfer-Encoding", "").lower() == "chunked"
+        has_body = bool(request.content_length or chunked)
+        if has_body and policy_engine.inspects_body(provider, request.method, target_path):
+            body = http_proxy.spool_body(request.stream)
+            if len(body) <= policy_engine.max_inspect_bytes:
+                inspected = body.read()
+                body.rewind()
+        gateway_req = gateway.classify(token, tenant_id, provider, request.method, target_path, cred_selector, inspected)
+
+        # Request bodies pass through to the upstream in chunks. Writes that wait
+        # for approval are spooled first (spilling to disk above
+        # PROXY_SPOOL_THRESHOLD) so memory per parked request stays bounded.
+        if body is None and has_body:
+            if gateway_req.requires_approval:
+                body = http_proxy.spool_body(request.stream)
+            else:
+                body = http_proxy.stream_body(request.stream, None if chunked else request.content_length)
+
+        pending = PendingRequest(
+            gateway_req=gateway_req,
+            tenant_id=tenant_id,
             provider=provider,
-            action_type=ActionType.READ if request.method in ["GET", "HEAD", "OPTIONS"] else ActionType.WRITE,
-            session_token=token,
             cred_selector=cred_selector,
-            requires_approval=False,  # Will be determined by policy engine
+            headers=gateway.pending_headers(request.headers),
+            body=body,
         )
 
-        # Classify and determine if approval required
-        gateway_req.requires_approval = policy_engine.requires_approval(
-            tenant_id=tenant_id,
-            action_type=gateway_req.action_type,
-            provider=provider,
-            method=request.method,
-            path=target_path,
-        )
+        if not gateway_req.requires_approval:
+            try:
+                return _render(gateway.forward_result(pending))
+            finally:
+                # Bodies spooled for inspection (GraphQL) may be on disk
+                pending.release_body()
 
-        logger.info(
-            f"Classified request {gateway_req.id}: {request.method} {target_path} "
-            f"({gateway_req.action_type.value}, approval_required={gateway_req.requires_approval})"
-        )
+        approval_id = gateway.request_approval(gateway_req, tenant_id, dict(request.headers), body)
 
-        # If write and approval required, request approval
-        if gateway_req.requires_approval:
-            approval_id = approval_orchestrator.request_approval(
-                gateway_req=gateway_req,
-                tenant_id=tenant_id,
-                details={
-                    "method": request.method,
-                    "path": target_path,
-                    "provider": provider,
-                    "headers": dict(request.headers),
-                },
-            )
-            gateway_req.approval_id = approval_id
-
-            logger.info(f"Approval requested: {approval_id} for request {gateway_req.id}")
+        # Async mode: park the request and answer 202 right away
+        if gateway.wants_async(request.headers.get("Prefer", "")):
+            pending.execute_on_approval = request.headers.get("X-Gate-On-Approval", "").lower() == "execute"
+            return _render(gateway.park(approval_id, pending, request.script_root))
 
+        try:
             # Block and wait for approval (with timeout)
             approved = approval_orchestrator.wait_for_approval(approval_id, timeout_seconds=3600)
 
@@ -173,43 +143,55 @@ def create_app(config_path: Optional[str] = None) -> Flask:
                 return jsonify({"error": "Request not approved"}), 403
 
             logger.info(f"Approval granted: {approval_id}")
+            return _render(gateway.forward_result(pending))
+        finally:
+            pending.release_body()
+
+    @app.route("/api/v1/proxy/resume/<approval_id>", methods=["GET", "POST"])
+    def resume_request(approval_id: str):
+        """Resume a write parked by async approval mode."""
+        session_info = _authenticate()
+        if not session_info:
+            return jsonify({"error": "Invalid or expired session"}), 401
 
-        # Fetch credentials if needed
-        credentials = None
-        if cred_selector:
-            credentials = credential_broker.get_credentials(tenant_id, cred_selector)
-            if not credentials:
-                logger.error(f"Failed to retrieve credentials: {cred_selector}")
-                return jsonify({"error": "Failed to retrieve credentials"}), 500
+        token = request.headers["Authorization"][7:]
+        reply, claimed = gateway.resume(approval_id, session_info["tenant_id"], token)
+        if reply is not None:
+            return _render(reply)
 
-        # Forward request through proxy
         try:
-            response_data = http_proxy.forward_request(
-                method=request.method,
-                path=target_path,
-                headers=dict(request.headers),
-                data=request.get_data(),
-                credentials=credentials,
-                provider=provider,
-            )
-
-            logger.info(f"Request {gateway_req.id} completed successfully")
-
-            return Response(
-                response_data["body"],
-                status=response_data.get("status_code", 200),
-                headers=response_data.get("headers", {}),
-            )
-
-        except Exception as e:
-            logger.error(f"Error forwarding request {gateway_req.id}: {str(e)}")
-            return jsonify({"error": "Proxy error"}), 502
+            return _render(gateway.forward_result(claimed))
+        finally:
+            pending_requests.remove(approval_id)
+
+    def _authenticate() -> Optional[Dict[str, Any]]:
+        """Validate the agent's bearer token and return its session."""
+        return gateway.authenticate(request.headers.get("Authorization", ""))
+
+    def _render(result: Dict[str, Any]) -> Response:
+        """Turn a gateway result dict into a Flask response."""
+        if "json" in result:
+            return jsonify(result["json"]), result["status_code"], result.get("headers", {})
+
+        # Streamed bodies are iterators; Werkzeug writes each chunk as it
+        # arrives and closes the iterator (releasing the upstream
+        # connection) when the agent disconnects
+        return Response(
+            result["body"],
+            status=result.get("status_code", 200),
+            headers=result.get("headers", {}),
+        )
 
     @app.route("/approvals/<approval_id>/approve", methods=["POST"])
     def approve_request(approval_id: str):
         """Approve a pending request."""
-        duration_minutes = (request.get_json() or {}).get("duration_minutes")
-        approval_orchestrator.approve(approval_id, duration_minutes=duration_minutes)
+        data = request.get_json(silent=True) or {}
+        approval_orchestrator.approve(
+            approval_id,
+            duration_minutes=data.get("duration_minutes"),
+            always=bool(data.get("always", False)),
+            path_pattern=data.get("path_pattern"),
+        )
         logger.info(f"Approval granted: {approval_id}")
         return jsonify({"status": "approved"}), 200
 
@@ -226,7 +208,45 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         status = approval_orchestrator.get_status(approval_id)
         if not status:
             return jsonify({"error": "Approval not found"}), 404
-        return jsonify(status), 200
+        return jsonify(status.to_dict()), 200
+
+    @app.route("/approvals/<approval_id>/wait", methods=["GET"])
+    def approval_wait(approval_id: str):
+        """Long-poll until the approval is decided or timeout (seconds) passes."""
+        timeout = min(request.args.get("timeout", 30, type=float), max_wait_seconds)
+        status = approval_orchestrator.wait_for_decision(approval_id, timeout_seconds=max(timeout, 0))
+        if not status:
+            return jsonify({"error": "Approval not found"}), 404
+        return jsonify(status.to_dict()), 200
+
+    @app.route("/approvals/<approval_id>/events", methods=["GET"])
+    def approval_events(approval_id: str):
+        """Server-Sent Events stream of approval status, closed once decided."""
+        status = approval_orchestrator.get_status(approval_id)
+        if not status:
+            return jsonify({"error": "Approval not found"}), 404
+
+        timeout = min(request.args.get("timeout", max_wait_seconds, type=float), max_wait_seconds)
+
+        def stream():
+            deadline = time.monotonic() + timeout
+            current = status
+            yield f"event: status\ndata: {json.dumps(current.to_dict())}\n\n"
+
+            while current and current["status"] == ApprovalStatus.PENDING.value:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                current = approval_orchestrator.wait_for_decision(
+                    approval_id, timeout_seconds=min(remaining, sse_heartbeat_seconds),
+                )
+                if current and current["status"] != ApprovalStatus.PENDING.value:
+                    yield f"event: status\ndata: {json.dumps(current.to_dict())}\n\n"
+                else:
+                    # Comment line keeps intermediaries from closing the stream
+                    yield ": heartbeat\n\n"
+
+        return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
     @app.errorhandler(HTTPException)
     def handle_http_error(e):
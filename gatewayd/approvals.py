@@ -1,13 +1,21 @@
 """Approval orchestrator for managing request approvals."""
 
+import asyncio
+import hashlib
+import heapq
 import logging
+import os
+import sys
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Any, List, Callable, Tuple
 from enum import Enum
 import threading
 import time
 
+from .state import StateBackend
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,53 +27,331 @@ class ApprovalStatus(Enum):
     EXPIRED = "expired"
 
 
-class ApprovalOrchestrator:
-    """Manages approval requests and notifications."""
+def request_fingerprint(
+    tenant_id: str,
+    provider: str,
+    method: str,
+    path: str,
+    body_digest: Optional[str],
+    cred_selector: Optional[str],
+    session_id: Optional[str],
+) -> str:
+    """Identify identical writes so duplicates can share one pending approval.
+
+    The credential selector and session are part of the identity: the same
+    write with other credentials, or from another session, is approved on
+    its own.
+    """
+    key = "\0".join([
+        tenant_id, provider, method.upper(), path.lstrip("/"), body_digest or "",
+        cred_selector or "", session_id or "",
+    ])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+DEFAULT_HEADER_ALLOWLIST = "content-type,content-length,user-agent,x-request-id,x-provider,x-creds"
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    """Epoch seconds as the naive-UTC ISO string the API has always returned."""
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+def _epoch(value: Any) -> Optional[float]:
+    """Inverse of _isoformat; epoch numbers pass through."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+class Approval:
+    """One approval's record, with epoch-second timestamps.
+
+    The request details (method, path, provider, session_id, headers) are
+    fields of the record rather than a nested dict, and headers are the
+    allowlisted (name, value) pairs only. Reads like the dict it replaces
+    (approval["status"]) for callers; to_dict gives the API's JSON shape.
+    """
+
+    __slots__ = (
+        "id", "tenant_id", "request_id", "status", "timestamp", "expires_at",
+        "method", "path", "provider", "session_id", "headers",
+        "fingerprint", "waiters", "decided_at", "decided_by",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        tenant_id: str,
+        request_id: str,
+        timestamp: float,
+        expires_at: float,
+        details: Dict[str, Any],
+        fingerprint: Optional[str] = None,
+        status: str = ApprovalStatus.PENDING.value,
+        waiters: int = 1,
+        decided_at: Optional[float] = None,
+        decided_by: Optional[str] = None,
+    ):
+        self.id = id
+        # Tenants, methods and providers repeat across approvals; share one string each
+        self.tenant_id = sys.intern(tenant_id)
+        self.request_id = request_id
+        self.status = status
+        self.timestamp = timestamp
+        self.expires_at = expires_at
+        method = details.get("method")
+        provider = details.get("provider")
+        self.method = sys.intern(method) if method else None
+        self.path = details.get("path")
+        self.provider = sys.intern(provider) if provider else None
+        self.session_id = details.get("session_id")
+        headers = details.get("headers")
+        self.headers = tuple(headers.items()) if isinstance(headers, dict) else headers or None
+        self.fingerprint = fingerprint
+        self.waiters = waiters
+        self.decided_at = decided_at
+        self.decided_by = decided_by
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        """The request details as the dict callers passed in."""
+        details = {"method": self.method, "path": self.path, "provider": self.provider, "session_id": self.session_id}
+        details = {key: value for key, value in details.items() if value is not None}
+        if self.headers:
+            details["headers"] = dict(self.headers)
+        return details
+
+    def __getitem__(self, key: str) -> Any:
+        if key != "details" and key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Field value, or default for unknown keys."""
+        return self[key] if key == "details" or key in self.__slots__ else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with ISO timestamps: the API's JSON shape and the shared state record."""
+        return {
+            "id": self.id,
+            "tenant_id": self.tenant_id,
+            "request_id": self.request_id,
+            "status": self.status,
+            "timestamp": _isoformat(self.timestamp),
+            "expires_at": _isoformat(self.expires_at),
+            "details": self.details,
+            "fingerprint": self.fingerprint,
+            "waiters": self.waiters,
+            "decided_at": _isoformat(self.decided_at),
+            "decided_by": self.decided_by,
+        }
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "Approval":
+        """Inverse of to_dict."""
+        return cls(
+            id=record["id"],
+            tenant_id=record["tenant_id"],
+            request_id=record["request_id"],
+            timestamp=_epoch(record["timestamp"]),
+            expires_at=_epoch(record["expires_at"]),
+            details=record.get("details") or {},
+            fingerprint=record.get("fingerprint"),
+            status=record["status"],
+            waiters=record.get("waiters", 1),
+            decided_at=_epoch(record.get("decided_at")),
+            decided_by=record.get("decided_by"),
+        )
+
+
+class _Stripe:
+    """One lock stripe: guards state transitions for the approvals hashed to it."""
 
     def __init__(self):
+        self.lock = threading.Lock()
+        # (expires_at epoch, approval_id); entries for decided approvals are
+        # skipped lazily when popped
+        self.expiry_heap: List[Tuple[float, str]] = []
+        # approval_id -> decided_at epoch, oldest first
+        self.decided: "OrderedDict[str, float]" = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+        self.coalesced = 0
+
+    def next_deadline(self, retention_seconds: float, max_retained: int) -> Optional[float]:
+        """Earliest time this stripe has sweeper work (caller holds the lock)."""
+        if len(self.decided) > max_retained:
+            return 0.0
+        deadlines = []
+        if self.expiry_heap:
+            deadlines.append(self.expiry_heap[0][0])
+        if self.decided:
+            deadlines.append(next(iter(self.decided.values())) + retention_seconds)
+        return min(deadlines) if deadlines else None
+
+
+class ApprovalOrchestrator:
+    """Manages approval requests and notifications.
+
+    Safe for concurrent use without a global lock: each approval hashes to
+    one of `stripes` locks, which orders its state transitions (pending to
+    approved/denied/expired happens exactly once) and guards that stripe's
+    expiry heap and retention queue. Records live in shared dicts whose
+    single-key operations are atomic; nothing iterates them. Identical
+    pending writes are coalesced by request fingerprint under a separate
+    set of fingerprint locks, always taken before a stripe lock.
+
+    Pending approvals are indexed in per-stripe min-heaps by expiry so the
+    sweeper expires them in O(log n) each, and decided records are kept only
+    for a bounded retention window so memory stays flat over long uptimes.
+
+    With a shared state backend, every approval is also written there and
+    the backend decides which transition wins, so a decision made in any
+    worker process counts. The sweeper polls the backend every
+    poll_interval seconds and wakes local waiters for approvals decided
+    elsewhere. Grants and coalescing stay per process.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        retention_seconds: Optional[float] = None,
+        max_retained: Optional[int] = None,
+        stripes: Optional[int] = None,
+        grant_table: Optional[Any] = None,
+        state: Optional[StateBackend] = None,
+        poll_interval: Optional[float] = None,
+        header_allowlist: Optional[List[str]] = None,
+    ):
         """Initialize approval orchestrator."""
-        self.approvals: Dict[str, Dict[str, Any]] = {}
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("APPROVAL_TTL_SECONDS", "3600"))
+        self.retention_seconds = retention_seconds if retention_seconds is not None else float(os.getenv("APPROVAL_RETENTION_SECONDS", "3600"))
+        self.max_retained = max_retained if max_retained is not None else int(os.getenv("APPROVAL_MAX_RETAINED", "10000"))
+        self.stripe_count = stripes or int(os.getenv("APPROVAL_LOCK_STRIPES", "64"))
+        self.grant_table = grant_table
+        self.state = state
+        self.poll_interval = poll_interval or float(os.getenv("GATEWAY_STATE_POLL_INTERVAL", "0.5"))
+        self._decision_cursor = state.last_decision() if state is not None else 0
+        self._last_purge = 0.0
+        # Only these request headers are kept on an approval (never Authorization)
+        if header_allowlist is None:
+            header_allowlist = os.getenv("APPROVAL_HEADER_ALLOWLIST", DEFAULT_HEADER_ALLOWLIST).split(",")
+        self.header_allowlist = frozenset(name.strip().lower() for name in header_allowlist if name.strip())
+
+        self.approvals: Dict[str, Approval] = {}
+        # Only approvals a thread is waiting on have one (see _event)
         self.approval_events: Dict[str, threading.Event] = {}
+        self.decision_callbacks: Dict[str, List[Callable[[str, str], None]]] = {}
+        # request fingerprint -> pending approval_id, for coalescing duplicates
+        self._fingerprints: Dict[str, str] = {}
+        self.eviction_callbacks: List[Callable[[str], None]] = []
+
+        self._stripes = [_Stripe() for _ in range(self.stripe_count)]
+        self._fingerprint_locks = [threading.Lock() for _ in range(self.stripe_count)]
+        # Each stripe keeps an even share of the retention cap
+        self._stripe_max_retained = max(1, -(-self.max_retained // self.stripe_count))
+
+        self._wakeup = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def _stripe(self, approval_id: str) -> _Stripe:
+        """Return the lock stripe for an approval."""
+        return self._stripes[hash(approval_id) % self.stripe_count]
+
+    def _fingerprint_lock(self, fingerprint: str) -> threading.Lock:
+        """Return the lock guarding a request fingerprint."""
+        return self._fingerprint_locks[hash(fingerprint) % self.stripe_count]
 
     def request_approval(
         self,
         gateway_req: Any,
         tenant_id: str,
         details: Dict[str, Any],
+        fingerprint: Optional[str] = None,
+    ) -> str:
+        """Request approval for a write operation.
+
+        When fingerprint matches a still-pending approval, the request is
+        attached to it instead (sharing its event, with no new notification)
+        and the existing approval ID is returned.
+        """
+        if fingerprint is None:
+            return self._create_approval(gateway_req, tenant_id, details, None)
+
+        # Fingerprint lock makes lookup-or-create atomic per fingerprint; it is
+        # always taken before (never inside) an approval stripe lock
+        with self._fingerprint_lock(fingerprint):
+            existing = self._fingerprints.get(fingerprint)
+            if existing is not None:
+                approval = self.approvals.get(existing)
+                if approval is not None and approval.status == ApprovalStatus.PENDING.value:
+                    with self._stripe(existing).lock:
+                        approval.waiters += 1
+                        self._stripe(existing).coalesced += 1
+                    logger.info(f"Request {gateway_req.id} attached to pending approval: {existing}")
+                    return existing
+
+            approval_id = self._create_approval(gateway_req, tenant_id, details, fingerprint)
+            self._fingerprints[fingerprint] = approval_id
+
+        # Notify outside the fingerprint lock
+        self._send_notifications(approval_id)
+        return approval_id
+
+    def _create_approval(
+        self,
+        gateway_req: Any,
+        tenant_id: str,
+        details: Dict[str, Any],
+        fingerprint: Optional[str],
     ) -> str:
-        """Request approval for a write operation."""
+        """Create and index a new pending approval."""
         approval_id = str(uuid.uuid4())
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        stripe = self._stripe(approval_id)
+        approval = Approval(
+            id=approval_id,
+            tenant_id=tenant_id,
+            request_id=gateway_req.id,
+            timestamp=now,
+            expires_at=expires_at,
+            details=details,
+            fingerprint=fingerprint,
+        )
+        approval.headers = self._allowed_headers(approval.headers)
 
-        self.approvals[approval_id] = {
-            "id": approval_id,
-            "tenant_id": tenant_id,
-            "request_id": gateway_req.id,
-            "status": ApprovalStatus.PENDING.value,
-            "timestamp": datetime.utcnow().isoformat(),
-            "expires_at": (datetime.utcnow() + timedelta(seconds=3600)).isoformat(),
-            "details": details,
-            "decided_at": None,
-            "decided_by": None,
-        }
+        with stripe.lock:
+            self.approvals[approval_id] = approval
+            heapq.heappush(stripe.expiry_heap, (expires_at, approval_id))
+            earliest = stripe.expiry_heap[0][1] == approval_id
 
-        self.approval_events[approval_id] = threading.Event()
+        if self.state is not None:
+            self.state.put_approval(approval.to_dict(), expires_at)
+
+        # Wake the sweeper if this may be the new earliest deadline
+        if earliest:
+            self._wakeup.set()
 
         logger.info(
             f"Approval request created: {approval_id}",
             extra={
                 "tenant_id": tenant_id,
-                "details": details,
+                "details": approval.details,
             },
         )
 
-        # Send notifications
-        self._send_notifications(approval_id)
+        # Coalesced approvals notify once the fingerprint is indexed
+        if fingerprint is None:
+            self._send_notifications(approval_id)
 
         return approval_id
 
     def _send_notifications(self, approval_id: str):
         """Send approval notifications (Slack, terminal, desktop)."""
-        approval = self.approvals[approval_id]
+        approval = self.approvals.get(approval_id)
 
         # TODO: Implement notification channels:
         # - Slack DM
@@ -74,69 +360,439 @@ class ApprovalOrchestrator:
 
         logger.info(f"Notifications sent for approval: {approval_id}")
 
-    def approve(self, approval_id: str, duration_minutes: Optional[int] = None):
-        """Approve a request."""
-        if approval_id not in self.approvals:
-            logger.warning(f"Approval not found: {approval_id}")
-            return
-
-        self.approvals[approval_id]["status"] = ApprovalStatus.APPROVED.value
-        self.approvals[approval_id]["decided_at"] = datetime.utcnow().isoformat()
+    def _allowed_headers(self, headers: Optional[Tuple[Tuple[str, str], ...]]) -> Optional[Tuple[Tuple[str, str], ...]]:
+        """The allowlisted subset of a request's (name, value) header pairs."""
+        if not headers:
+            return None
+        # Header names come from a small set; share one string per name
+        allowed = tuple((sys.intern(name), value) for name, value in headers if name.lower() in self.header_allowlist)
+        return allowed or None
 
-        # If duration specified, create persistent rule (future)
-        if duration_minutes:
-            logger.info(f"Approval granted with {duration_minutes} minute duration: {approval_id}")
+    def approve(
+        self,
+        approval_id: str,
+        duration_minutes: Optional[int] = None,
+        always: bool = False,
+        path_pattern: Optional[str] = None,
+    ):
+        """Approve a request.
+
+        With duration_minutes (or always), also grants the same tenant,
+        session, provider and method on the request path (or path_pattern)
+        so repeats skip the approval round trip. The approval stands and its
+        waiters are woken even if recording the grant fails (the error is
+        then raised to the caller).
+        """
+        if not self._decide(approval_id, ApprovalStatus.APPROVED):
+            return
 
-        logger.info(f"Approval granted: {approval_id}")
-        self.approval_events[approval_id].set()
+        try:
+            if (duration_minutes or always) and self.grant_table is None:
+                logger.warning(f"Grants are disabled, approving once: {approval_id}")
+            elif duration_minutes or always:
+                approval = self.get_status(approval_id)
+                self.grant_table.grant(
+                    tenant_id=approval.tenant_id,
+                    session_id=approval.session_id,
+                    provider=approval.provider,
+                    method=approval.method,
+                    path=path_pattern or approval.path,
+                    duration_minutes=duration_minutes,
+                    always=always,
+                )
+                logger.info(f"Approval granted with {'permanent' if always else f'{duration_minutes} minute'} grant: {approval_id}")
+        finally:
+            logger.info(f"Approval granted: {approval_id}")
+            self._notify_decision(approval_id)
 
     def deny(self, approval_id: str):
         """Deny a request."""
-        if approval_id not in self.approvals:
-            logger.warning(f"Approval not found: {approval_id}")
+        if not self._decide(approval_id, ApprovalStatus.DENIED):
             return
 
-        self.approvals[approval_id]["status"] = ApprovalStatus.DENIED.value
-        self.approvals[approval_id]["decided_at"] = datetime.utcnow().isoformat()
-
         logger.info(f"Approval denied: {approval_id}")
-        self.approval_events[approval_id].set()
+        self._notify_decision(approval_id)
+
+    def _decide(self, approval_id: str, status: ApprovalStatus) -> bool:
+        """Move a pending approval to a final status; False if unknown or already decided."""
+        if approval_id not in self.approvals:
+            # May belong to another worker process
+            if self.state is None or not self.state.decide_approval(approval_id, status.value, time.time()):
+                logger.warning(f"Approval not found: {approval_id}")
+                return False
+            return True
+
+        now = time.time()
+        stripe = self._stripe(approval_id)
+        with stripe.lock:
+            if not self._claim_shared(approval_id, status, now) or not self._decide_locked(stripe, approval_id, status, now):
+                logger.warning(f"Approval already decided: {approval_id}")
+                return False
+            # New earliest retention deadline, or over the retention cap
+            wake = len(stripe.decided) == 1 or len(stripe.decided) > self._stripe_max_retained
+
+        if wake:
+            self._wakeup.set()
+        return True
+
+    def _claim_shared(self, approval_id: str, status: ApprovalStatus, now: float) -> bool:
+        """Record a local pending approval's decision in the shared backend first.
+
+        False when another worker decided it already; the sweeper's next
+        poll applies that decision here.
+        """
+        if self.state is None:
+            return True
+        approval = self.approvals.get(approval_id)
+        if approval is None or approval.status != ApprovalStatus.PENDING.value:
+            return False
+        return self.state.decide_approval(approval_id, status.value, now)
+
+    def _decide_locked(self, stripe: _Stripe, approval_id: str, status: ApprovalStatus, now: float) -> bool:
+        """Transition pending -> status (caller holds the stripe lock)."""
+        approval = self.approvals.get(approval_id)
+        if approval is None or approval.status != ApprovalStatus.PENDING.value:
+            return False
+
+        approval.status = status.value
+        approval.decided_at = now
+        stripe.decided[approval_id] = now
+        if status == ApprovalStatus.EXPIRED:
+            stripe.expired += 1
+        return True
+
+    def _notify_decision(self, approval_id: str):
+        """Wake waiters, stop coalescing onto the approval and run decision callbacks."""
+        approval = self.approvals.get(approval_id)
+        fingerprint = approval.fingerprint if approval else None
+        if fingerprint is not None:
+            with self._fingerprint_lock(fingerprint):
+                if self._fingerprints.get(fingerprint) == approval_id:
+                    del self._fingerprints[fingerprint]
+
+        # Later waiters see the decided status and get an already-set event
+        event = self.approval_events.pop(approval_id, None)
+        if event is not None:
+            event.set()
+        self._run_decision_callbacks(approval_id)
+
+    def on_decision(self, approval_id: str, callback: Callable[[str, str], None]):
+        """Run callback(approval_id, status) once the approval is decided."""
+        stripe = self._stripe(approval_id)
+        with stripe.lock:
+            approval = self.approvals.get(approval_id)
+            if approval is None:
+                logger.warning(f"Approval not found: {approval_id}")
+                return
+            self.decision_callbacks.setdefault(approval_id, []).append(callback)
+            decided = approval.status != ApprovalStatus.PENDING.value
+
+        # Already decided: run now
+        if decided:
+            self._run_decision_callbacks(approval_id)
+
+    def _remove_decision_callback(self, approval_id: str, callback: Callable[[str, str], None]):
+        """Drop a callback registered with on_decision that has not run yet."""
+        with self._stripe(approval_id).lock:
+            callbacks = self.decision_callbacks.get(approval_id)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self.decision_callbacks[approval_id]
+
+    def on_evict(self, callback: Callable[[str], None]):
+        """Run callback(approval_id) whenever a record is evicted."""
+        self.eviction_callbacks.append(callback)
+
+    def _run_decision_callbacks(self, approval_id: str):
+        """Run and clear the decision callbacks for an approval (each runs once)."""
+        with self._stripe(approval_id).lock:
+            approval = self.approvals.get(approval_id)
+            callbacks = self.decision_callbacks.pop(approval_id, [])
+
+        if approval is None:
+            return
+
+        for callback in callbacks:
+            try:
+                callback(approval_id, approval.status)
+            except Exception as e:
+                logger.error(f"Decision callback failed for {approval_id}: {str(e)}")
+
+    def _event(self, approval: Approval) -> threading.Event:
+        """The event a thread waits on for an approval's decision.
+
+        Created on first wait rather than per approval, since parked
+        (async) writes and coroutines never wait on one; already set if the
+        approval is decided.
+        """
+        with self._stripe(approval.id).lock:
+            event = self.approval_events.get(approval.id)
+            if event is None:
+                event = threading.Event()
+                if approval.status == ApprovalStatus.PENDING.value:
+                    self.approval_events[approval.id] = event
+                else:
+                    event.set()
+        return event
 
     def wait_for_approval(self, approval_id: str, timeout_seconds: int = 3600) -> bool:
         """Block and wait for approval decision."""
-        if approval_id not in self.approvals:
+        # Hold the record itself: it may be evicted right after the decision
+        approval = self.approvals.get(approval_id)
+        if approval is None:
             logger.error(f"Approval not found: {approval_id}")
             return False
+        event = self._event(approval)
 
         logger.debug(f"Waiting for approval decision: {approval_id}")
 
         # Wait for approval event with timeout
-        approved = self.approval_events[approval_id].wait(timeout=timeout_seconds)
+        approved = event.wait(timeout=timeout_seconds)
 
         if not approved:
             # Timeout expired
-            self.approvals[approval_id]["status"] = ApprovalStatus.EXPIRED.value
+            self.expire(approval_id)
             logger.warning(f"Approval timed out: {approval_id}")
-            return False
 
         # Check final status
-        final_status = self.approvals[approval_id]["status"]
-        return final_status == ApprovalStatus.APPROVED.value
+        return approval.status == ApprovalStatus.APPROVED.value
+
+    def wait_for_decision(self, approval_id: str, timeout_seconds: float) -> Optional[Approval]:
+        """Wait up to timeout_seconds for a decision and return the current status.
+
+        Unlike wait_for_approval, a timeout here does not expire the approval;
+        long-poll and SSE clients simply get the still-pending record back.
+        """
+        approval = self.approvals.get(approval_id)
+        if approval is None:
+            return self._poll_shared(approval_id, timeout_seconds)
+
+        self._event(approval).wait(timeout=timeout_seconds)
+        return self.get_status(approval_id)
+
+    def _poll_shared(self, approval_id: str, timeout_seconds: float) -> Optional[Approval]:
+        """Wait on an approval owned by another worker by polling the shared backend."""
+        deadline = time.monotonic() + timeout_seconds
+        approval = self.get_status(approval_id)
+        while approval is not None and approval.status == ApprovalStatus.PENDING.value:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(self.poll_interval, remaining))
+            approval = self.get_status(approval_id)
+        return approval
+
+    async def wait_for_decision_async(self, approval_id: str, timeout_seconds: float) -> Optional[Approval]:
+        """wait_for_decision for asyncio callers: parks a coroutine, not a thread."""
+        approval = self.approvals.get(approval_id)
+        if approval is None:
+            return await self._poll_shared_async(approval_id, timeout_seconds)
+
+        if approval.status == ApprovalStatus.PENDING.value:
+            loop = asyncio.get_running_loop()
+            decided = asyncio.Event()
+
+            def wake(approval_id: str, status: str):
+                # Runs on whichever thread decided the approval
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(decided.set)
+
+            self.on_decision(approval_id, wake)
+            try:
+                await asyncio.wait_for(decided.wait(), timeout_seconds)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                # Timed-out or cancelled waits must not leave their callback behind
+                self._remove_decision_callback(approval_id, wake)
+
+        # The record itself: it may be evicted right after the decision
+        return approval
+
+    async def _poll_shared_async(self, approval_id: str, timeout_seconds: float) -> Optional[Approval]:
+        """_poll_shared for asyncio callers (backend reads run in a worker thread)."""
+        deadline = time.monotonic() + timeout_seconds
+        approval = await asyncio.to_thread(self.get_status, approval_id)
+        while approval is not None and approval.status == ApprovalStatus.PENDING.value:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(self.poll_interval, remaining))
+            approval = await asyncio.to_thread(self.get_status, approval_id)
+        return approval
+
+    async def wait_for_approval_async(self, approval_id: str, timeout_seconds: float = 3600) -> bool:
+        """wait_for_approval for asyncio callers."""
+        approval = await self.wait_for_decision_async(approval_id, timeout_seconds)
+        if approval is None:
+            logger.error(f"Approval not found: {approval_id}")
+            return False
 
-    def get_status(self, approval_id: str) -> Optional[Dict[str, Any]]:
-        """Get approval status."""
-        return self.approvals.get(approval_id)
+        if approval.status == ApprovalStatus.PENDING.value:
+            # Recording the expiry may wait on the shared backend's write lock
+            await asyncio.to_thread(self.expire, approval_id)
+            logger.warning(f"Approval timed out: {approval_id}")
 
-    def cleanup_expired_approvals(self):
-        """Periodically clean up expired approvals."""
-        now = datetime.utcnow()
-        expired = []
+        return approval.status == ApprovalStatus.APPROVED.value
+
+    def expire(self, approval_id: str) -> bool:
+        """Expire a still-pending approval now; False if it was already decided."""
+        if not self._decide(approval_id, ApprovalStatus.EXPIRED):
+            return False
+        self._notify_decision(approval_id)
+        return True
 
-        for approval_id, approval in self.approvals.items():
-            expires_at = datetime.fromisoformat(approval["expires_at"])
-            if now > expires_at and approval["status"] == ApprovalStatus.PENDING.value:
-                approval["status"] = ApprovalStatus.EXPIRED.value
-                expired.append(approval_id)
+    def get_status(self, approval_id: str) -> Optional[Approval]:
+        """Get approval status."""
+        approval = self.approvals.get(approval_id)
+        if approval is None and self.state is not None:
+            record = self.state.get_approval(approval_id)
+            return Approval.from_dict(record) if record is not None else None
+        return approval
+
+    def cleanup_expired_approvals(self) -> int:
+        """Expire overdue pending approvals and evict decided records past retention.
+
+        Pops only the overdue heap entries (O(log n) each) rather than
+        scanning every approval, taking one stripe lock at a time.
+        """
+        now = time.time()
+        expired = []
+        evicted = []
+
+        for stripe in self._stripes:
+            with stripe.lock:
+                while stripe.expiry_heap and stripe.expiry_heap[0][0] <= now:
+                    _, approval_id = heapq.heappop(stripe.expiry_heap)
+                    if not self._claim_shared(approval_id, ApprovalStatus.EXPIRED, now):
+                        continue
+                    if self._decide_locked(stripe, approval_id, ApprovalStatus.EXPIRED, now):
+                        expired.append(approval_id)
+                evicted.extend(self._evict_decided_locked(stripe, now))
+
+        for approval_id in expired:
+            self._notify_decision(approval_id)
+
+        for approval_id in evicted:
+            for callback in self.eviction_callbacks:
+                try:
+                    callback(approval_id)
+                except Exception as e:
+                    logger.error(f"Eviction callback failed for {approval_id}: {str(e)}")
 
         if expired:
             logger.info(f"Expired {len(expired)} pending approvals")
+        if evicted:
+            logger.debug(f"Evicted {len(evicted)} decided approvals")
+
+        return len(expired)
+
+    def sync_shared_state(self) -> int:
+        """Apply decisions other workers recorded for approvals waiting here.
+
+        Also purges expired rows from the backend about once per minute.
+        Returns the number of local approvals decided.
+        """
+        decisions, self._decision_cursor = self.state.decisions_since(self._decision_cursor)
+        now = time.time()
+        applied = []
+        for approval_id, status in decisions:
+            if approval_id not in self.approvals:
+                continue
+            stripe = self._stripe(approval_id)
+            with stripe.lock:
+                if self._decide_locked(stripe, approval_id, ApprovalStatus(status), now):
+                    applied.append(approval_id)
+
+        for approval_id in applied:
+            logger.info(f"Approval {approval_id} decided by another worker")
+            self._notify_decision(approval_id)
+
+        if now - self._last_purge >= 60:
+            self._last_purge = now
+            self.state.purge_expired(now, self.retention_seconds)
+        return len(applied)
+
+    def _evict_decided_locked(self, stripe: _Stripe, now: float) -> List[str]:
+        """Drop a stripe's decided records past retention or its share of max_retained."""
+        evicted = []
+        while stripe.decided:
+            approval_id, decided_at = next(iter(stripe.decided.items()))
+            if now - decided_at <= self.retention_seconds and len(stripe.decided) <= self._stripe_max_retained:
+                break
+            del stripe.decided[approval_id]
+            self.approvals.pop(approval_id, None)
+            self.approval_events.pop(approval_id, None)
+            self.decision_callbacks.pop(approval_id, None)
+            evicted.append(approval_id)
+        stripe.evicted += len(evicted)
+        return evicted
+
+    def _next_deadline(self) -> Optional[float]:
+        """Earliest time the sweeper has work to do."""
+        deadlines = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                deadline = stripe.next_deadline(self.retention_seconds, self._stripe_max_retained)
+            if deadline is not None:
+                deadlines.append(deadline)
+        return min(deadlines) if deadlines else None
+
+    def start_sweeper(self):
+        """Start the background expiry sweeper thread."""
+        if self._sweeper is not None:
+            return
+
+        self._stopping = False
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="approval-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweeper thread."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self):
+        """Sleep until the next expiry or retention deadline, then sweep."""
+        while not self._stopping:
+            # Clear before computing the deadline so a wakeup for a newer,
+            # earlier deadline is never lost
+            self._wakeup.clear()
+            deadline = self._next_deadline()
+            timeout = None if deadline is None else deadline - time.time()
+            if self.state is not None:
+                timeout = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+            if timeout is None or timeout > 0:
+                self._wakeup.wait(timeout)
+            if self._stopping:
+                return
+
+            try:
+                if self.state is not None:
+                    self.sync_shared_state()
+                self.cleanup_expired_approvals()
+            except Exception as e:
+                logger.error(f"Approval sweep failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return approval counts."""
+        stats = {"expired": 0, "evicted": 0, "coalesced": 0, "retained_decided": 0, "expiry_heap": 0}
+        for stripe in self._stripes:
+            with stripe.lock:
+                stats["expired"] += stripe.expired
+                stats["evicted"] += stripe.evicted
+                stats["coalesced"] += stripe.coalesced
+                stats["retained_decided"] += len(stripe.decided)
+                stats["expiry_heap"] += len(stripe.expiry_heap)
+
+        records = len(self.approvals)
+        stats.update({
+            "records": records,
+            "pending": max(records - stats["retained_decided"], 0),
+            "stripes": self.stripe_count,
+        })
+        return stats
@@ -0,0 +1,402 @@
+"""ASGI serving mode: the gateway's endpoints on asyncio.
+
+Run under any ASGI server, for example:
+
+    uvicorn --factory gatewayd.asgi:create_asgi_app --host 0.0.0.0 --port 5000
+
+Endpoints, replies and policy are the same as the Flask app (both sit on
+gatewayd.gateway.Gateway). The difference is what a waiting request costs:
+sync-mode approval waits, long-polls and SSE streams park a coroutine on an
+asyncio.Event instead of holding a thread, and with httpx installed upstream
+calls run on the event loop over a pooled AsyncClient.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Optional, Any, AsyncIterator, Callable, List, Tuple
+from urllib.parse import parse_qs
+
+from .approvals import ApprovalStatus
+from .gateway import Gateway, json_result
+from .pending import PendingRequest
+from .proxy import RequestBody
+
+logger = logging.getLogger(__name__)
+
+ALL_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS")
+
+
+class ASGIRequest:
+    """The parts of an ASGI HTTP request the gateway reads."""
+
+    def __init__(self, scope: Dict[str, Any], receive: Callable):
+        """Initialize request from an ASGI scope."""
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.root = scope.get("root_path", "")
+        self._receive = receive
+        # ASGI header names are lowercase; repeated headers are joined
+        self.headers: Dict[str, str] = {}
+        for name, value in scope.get("headers", []):
+            name, value = name.decode("latin-1"), value.decode("latin-1")
+            self.headers[name] = f"{self.headers[name]}, {value}" if name in self.headers else value
+        self.query = {
+            name: values[-1]
+            for name, values in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()
+        }
+
+    def header(self, name: str, default: str = "") -> str:
+        """Header value by (case-insensitive) name."""
+        return self.headers.get(name.lower(), default)
+
+    def query_float(self, name: str, default: float) -> float:
+        """Query parameter as a float, or default if missing or malformed."""
+        try:
+            return float(self.query[name])
+        except (KeyError, ValueError):
+            return default
+
+    @property
+    def has_body(self) -> bool:
+        """Whether the agent sent a request body."""
+        length = self.header("content-length")
+        return bool((length.isdigit() and int(length)) or self.header("transfer-encoding").lower() == "chunked")
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """The request body as it arrives."""
+        while True:
+            message = await self._receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            if chunk:
+                yield chunk
+            if not message.get("more_body", False):
+                return
+
+    async def body(self) -> bytes:
+        """The whole request body (small control-plane payloads only)."""
+        return b"".join([chunk async for chunk in self.stream()])
+
+    async def json(self) -> Dict[str, Any]:
+        """The body parsed as a JSON object, or {} if it is not one."""
+        try:
+            data = json.loads(await self.body() or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    async def spool(self, threshold: int, spool_dir: Optional[str]) -> RequestBody:
+        """Drain the body into a spool that spills to disk above threshold (see HTTPProxy.spool_body)."""
+        spool = tempfile.SpooledTemporaryFile(max_size=threshold, dir=spool_dir)
+        digest = hashlib.sha256()
+        async for chunk in self.stream():
+            digest.update(chunk)
+            spool.write(chunk)
+        length = spool.tell()
+        spool.seek(0)
+        return RequestBody(spool, length, digest.hexdigest())
+
+
+async def send_result(send: Callable, result: Dict[str, Any], head: bool = False):
+    """Send a gateway result dict (see gatewayd.gateway.json_result) as the ASGI response.
+
+    Bodies may be bytes, async iterators (httpx streams, SSE) or blocking
+    iterators (StreamingBody), which are advanced in a worker thread. Either
+    kind is closed if the agent disconnects mid-stream.
+    """
+    headers = dict(result.get("headers") or {})
+    body = result.get("body", b"")
+    if "json" in result:
+        body = json.dumps(result["json"]).encode()
+        headers["Content-Type"] = "application/json"
+
+    raw_headers = [(name.lower().encode("latin-1"), str(value).encode("latin-1")) for name, value in headers.items()]
+    start = {"type": "http.response.start", "status": result.get("status_code", 200), "headers": raw_headers}
+
+    if body is None or isinstance(body, (bytes, bytearray)):
+        body = bytes(body or b"")
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+        await send(start)
+        await send({"type": "http.response.body", "body": b"" if head else body})
+        return
+
+    await send(start)
+    if hasattr(body, "__aiter__"):
+        iterator = body.__aiter__()
+        try:
+            async for chunk in iterator:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+            if iterator is not body and hasattr(body, "aclose"):
+                await body.aclose()
+    else:
+        iterator = iter(body)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, None)
+                if chunk is None:
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            if hasattr(body, "close"):
+                await asyncio.to_thread(body.close)
+    await send({"type": "http.response.body", "body": b""})
+
+
+class GatewayASGI:
+    """ASGI application serving the gateway's HTTP API."""
+
+    def __init__(self, gateway: Gateway):
+        """Initialize routes over gateway components."""
+        self.gateway = gateway
+        # First match wins, so the resume route comes before the proxy catch-all
+        self.routes: List[Tuple[Tuple[str, ...], re.Pattern, Callable]] = [
+            (("GET",), re.compile(r"/health"), self.health),
+            (("GET",), re.compile(r"/metrics"), self.metrics),
+            (("POST",), re.compile(r"/session/new"), self.create_session),
+            (("GET", "POST"), re.compile(r"/api/v1/proxy/resume/(?P<approval_id>[^/]+)"), self.resume_request),
+            (ALL_METHODS, re.compile(r"/api/v1/proxy/(?P<target_path>.+)"), self.proxy_request),
+            (("POST",), re.compile(r"/approvals/(?P<approval_id>[^/]+)/approve"), self.approve_request),
+            (("POST",), re.compile(r"/approvals/(?P<approval_id>[^/]+)/deny"), self.deny_request),
+            (("GET",), re.compile(r"/approvals/(?P<approval_id>[^/]+)/status"), self.approval_status),
+            (("GET",), re.compile(r"/approvals/(?P<approval_id>[^/]+)/wait"), self.approval_wait),
+            (("GET",), re.compile(r"/approvals/(?P<approval_id>[^/]+)/events"), self.approval_events),
+        ]
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        request = ASGIRequest(scope, receive)
+        logger.debug(f"Incoming request: {request.method} {request.path}")
+        try:
+            result = await self._dispatch(request)
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+            result = json_result({"error": "Internal server error"}, 500)
+        await send_result(send, result, head=request.method == "HEAD")
+
+    async def _dispatch(self, request: ASGIRequest) -> Dict[str, Any]:
+        """Route a request to its handler."""
+        allowed = False
+        for methods, pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if request.method in methods:
+                return await handler(request, **match.groupdict())
+            allowed = True
+        if allowed:
+            return json_result({"error": "Method not allowed"}, 405)
+        return json_result({"error": "Not found"}, 404)
+
+    async def _lifespan(self, receive: Callable, send: Callable):
+        """Handle ASGI lifespan events: release pooled connections at shutdown."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.gateway.http_proxy.async_pool.aclose()
+                self.gateway.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def health(self, request: ASGIRequest) -> Dict[str, Any]:
+        """Health check endpoint."""
+        return json_result({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
+
+    async def metrics(self, request: ASGIRequest) -> Dict[str, Any]:
+        """Runtime statistics for gateway components."""
+        return json_result(self.gateway.get_stats())
+
+    async def create_session(self, request: ASGIRequest) -> Dict[str, Any]:
+        """Create a new agent session."""
+        data = await request.json()
+        return await asyncio.to_thread(self.gateway.create_session, data)
+
+    async def proxy_request(self, request: ASGIRequest, target_path: str) -> Dict[str, Any]:
+        """HTTP proxy endpoint for external API calls."""
+        gateway = self.gateway
+        http_proxy = gateway.http_proxy
+        policy_engine = gateway.policy_engine
+
+        # Verify session
+        auth_header = request.header("authorization")
+        if not auth_header.startswith("Bearer "):
+            return json_result({"error": "Missing or invalid Authorization header"}, 401)
+
+        token = auth_header[7:]
+        # Session, approval and credential stores may block (SQLite, files):
+        # they run in worker threads, not on the event loop
+        session_info = await asyncio.to_thread(gateway.session_manager.validate_token, token)
+        if not session_info:
+            return json_result({"error": "Invalid or expired session"}, 401)
+
+        tenant_id = session_info["tenant_id"]
+        cred_selector = request.header("x-creds") or None
+        provider = request.header("x-provider", "unknown")
+
+        # Bodies the policy inspects (GraphQL) are spooled first
+        body = None
+        inspected = None
+        has_body = request.has_body
+        if has_body and policy_engine.inspects_body(provider, request.method, target_path):
+            body = await request.spool(http_proxy.spool_threshold, http_proxy.spool_dir)
+            if len(body) <= policy_engine.max_inspect_bytes:
+                inspected = body.read()
+                body.rewind()
+        gateway_req = gateway.classify(token, tenant_id, provider, request.method, target_path, cred_selector, inspected)
+
+        # Writes awaiting approval are spooled. Other bodies stream through
+        # when the async client can take them; the threaded fallback needs a
+        # blocking file, so they are spooled too.
+        if body is None and has_body:
+            if gateway_req.requires_approval or not http_proxy.async_pool.available:
+                body = await request.spool(http_proxy.spool_threshold, http_proxy.spool_dir)
+            else:
+                body = request.stream()
+
+        pending = PendingRequest(
+            gateway_req=gateway_req,
+            tenant_id=tenant_id,
+            provider=provider,
+            cred_selector=cred_selector,
+            headers=gateway.pending_headers(request.headers),
+            body=body,
+        )
+
+        if not gateway_req.requires_approval:
+            try:
+                return await gateway.forward_result_async(pending)
+            finally:
+                # Bodies spooled for inspection (GraphQL) may be on disk
+                pending.release_body()
+
+        approval_id = await asyncio.to_thread(
+            gateway.request_approval, gateway_req, tenant_id, dict(request.headers), body,
+        )
+
+        # Async mode: park the request and answer 202 right away
+        if gateway.wants_async(request.header("prefer")):
+            pending.execute_on_approval = request.header("x-gate-on-approval").lower() == "execute"
+            return gateway.park(approval_id, pending, request.root)
+
+        try:
+            # Park this coroutine until the approval is decided
+            approved = await gateway.approval_orchestrator.wait_for_approval_async(approval_id, timeout_seconds=3600)
+
+            if not approved:
+                logger.warning(f"Approval denied or timed out: {approval_id}")
+                return json_result({"error": "Request not approved"}, 403)
+
+            logger.info(f"Approval granted: {approval_id}")
+            return await gateway.forward_result_async(pending)
+        finally:
+            pending.release_body()
+
+    async def resume_request(self, request: ASGIRequest, approval_id: str) -> Dict[str, Any]:
+        """Resume a write parked by async approval mode."""
+        authorization = request.header("authorization")
+        session_info = await asyncio.to_thread(self.gateway.authenticate, authorization)
+        if not session_info:
+            return json_result({"error": "Invalid or expired session"}, 401)
+
+        reply, claimed = await asyncio.to_thread(
+            self.gateway.resume, approval_id, session_info["tenant_id"], authorization[7:],
+        )
+        if reply is not None:
+            return reply
+
+        try:
+            return await self.gateway.forward_result_async(claimed)
+        finally:
+            self.gateway.pending_requests.remove(approval_id)
+
+    async def approve_request(self, request: ASGIRequest, approval_id: str) -> Dict[str, Any]:
+        """Approve a pending request."""
+        data = await request.json()
+        await asyncio.to_thread(
+            self.gateway.approval_orchestrator.approve,
+            approval_id,
+            duration_minutes=data.get("duration_minutes"),
+            always=bool(data.get("always", False)),
+            path_pattern=data.get("path_pattern"),
+        )
+        logger.info(f"Approval granted: {approval_id}")
+        return json_result({"status": "approved"})
+
+    async def deny_request(self, request: ASGIRequest, approval_id: str) -> Dict[str, Any]:
+        """Deny a pending request."""
+        await asyncio.to_thread(self.gateway.approval_orchestrator.deny, approval_id)
+        logger.info(f"Approval denied: {approval_id}")
+        return json_result({"status": "denied"})
+
+    async def approval_status(self, request: ASGIRequest, approval_id: str) -> Dict[str, Any]:
+        """Get approval status."""
+        status = await asyncio.to_thread(self.gateway.approval_orchestrator.get_status, approval_id)
+        if not status:
+            return json_result({"error": "Approval not found"}, 404)
+        return json_result(status.to_dict())
+
+    async def approval_wait(self, request: ASGIRequest, approval_id: str) -> Dict[str, Any]:
+        """Long-poll until the approval is decided or timeout (seconds) passes."""
+        timeout = min(request.query_float("timeout", 30), self.gateway.max_wait_seconds)
+        status = await self.gateway.approval_orchestrator.wait_for_decision_async(approval_id, max(timeout, 0))
+        if not status:
+            return json_result({"error": "Approval not found"}, 404)
+        return json_result(status.to_dict())
+
+    async def approval_events(self, request: ASGIRequest, approval_id: str) -> Dict[str, Any]:
+        """Server-Sent Events stream of approval status, closed once decided."""
+        orchestrator = self.gateway.approval_orchestrator
+        status = await asyncio.to_thread(orchestrator.get_status, approval_id)
+        if not status:
+            return json_result({"error": "Approval not found"}, 404)
+
+        max_wait_seconds = self.gateway.max_wait_seconds
+        heartbeat_seconds = self.gateway.sse_heartbeat_seconds
+        timeout = min(request.query_float("timeout", max_wait_seconds), max_wait_seconds)
+
+        async def stream() -> AsyncIterator[bytes]:
+            deadline = time.monotonic() + timeout
+            current = status
+            yield f"event: status\ndata: {json.dumps(current.to_dict())}\n\n".encode()
+
+            while current and current["status"] == ApprovalStatus.PENDING.value:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                current = await orchestrator.wait_for_decision_async(
+                    approval_id, min(remaining, heartbeat_seconds),
+                )
+                if current and current["status"] != ApprovalStatus.PENDING.value:
+                    yield f"event: status\ndata: {json.dumps(current.to_dict())}\n\n".encode()
+                else:
+                    # Comment line keeps intermediaries from closing the stream
+                    yield b": heartbeat\n\n"
+
+        return {
+            "status_code": 200,
+            "body": stream(),
+            "headers": {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"},
+        }
+
+
+def create_asgi_app(config_path: Optional[str] = None) -> GatewayASGI:
+    """Create the ASGI application (the asyncio counterpart of create_app)."""
+    gateway = Gateway(config_path)
+    gateway.start()
+    return GatewayASGI(gateway)
@@ -3,20 +3,102 @@
 import os
 import secrets
 import hashlib
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import heapq
+import logging
+import sys
+import threading
+import time
+from typing import Dict, Optional, Any, List, Tuple
 import json
 
+from .state import StateBackend
+from .tokens import RevocationList, SignedTokens, SigningKeyring
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """One opaque session's record, with epoch-second timestamps.
+
+    Reads like the dict it replaces (session["tenant_id"]) for callers.
+    """
+
+    __slots__ = ("tenant_id", "created_at", "expires_at")
+
+    def __init__(self, tenant_id: str, created_at: float, expires_at: float):
+        # Every session of a tenant shares one tenant_id string
+        self.tenant_id = sys.intern(tenant_id)
+        self.created_at = created_at
+        self.expires_at = expires_at
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Field value, or default for unknown keys."""
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict, for JSON and the shared state backend."""
+        return {"tenant_id": self.tenant_id, "created_at": self.created_at, "expires_at": self.expires_at}
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "Session":
+        """Inverse of to_dict."""
+        return cls(record["tenant_id"], record["created_at"], record["expires_at"])
+
 
 class SessionManager:
-    """Manages agent sessions and authentication."""
+    """Manages agent sessions and authentication.
+
+    Opaque sessions live in this process unless a shared state backend is
+    given, in which case any worker process can validate or revoke them.
+    Local sessions are compact Session records indexed by a min-heap on
+    expiry, so abandoned tokens are evicted by the sweeper (and on every
+    create_session) rather than only when presented again.
+
+    With a signing keyring configured, signed tokens (see SignedTokens) are
+    also accepted, and with token_format "signed" they are what
+    create_session issues. They validate without any lookup, so any process
+    or node holding the keyring can serve them. Revoked signed tokens are
+    kept in a RevocationList, shared through the state backend when there
+    is one.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        state: Optional[StateBackend] = None,
+        token_format: Optional[str] = None,
+        keyring: Optional[SigningKeyring] = None,
+    ):
         """Initialize session manager."""
-        self.sessions: Dict[str, Dict] = {}
+        self.state = state
+        self.sessions: Dict[str, Session] = {}
+        # (expires_at, token); entries for revoked tokens are skipped when popped
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stopping = False
+        self.evicted = 0
         self.enrollments: Dict[str, str] = {}
         self._load_enrollments()
 
+        self.token_format = (token_format or os.getenv("SESSION_TOKEN_FORMAT", "opaque")).lower()
+        if self.token_format not in ("opaque", "signed"):
+            raise ValueError(f"Unknown session token format: {self.token_format}")
+        keyring = keyring or SigningKeyring.from_env()
+        if self.token_format == "signed" and keyring is None:
+            raise ValueError("SESSION_TOKEN_FORMAT=signed needs SESSION_SIGNING_KEYS or SESSION_KEYS_FILE")
+        self.signer = SignedTokens(keyring) if keyring is not None else None
+        self.revocations = RevocationList()
+        self.poll_interval = float(os.getenv("GATEWAY_STATE_POLL_INTERVAL", "0.5"))
+        self._revocation_cursor = 0
+        self._revocations_synced = 0.0
+        self._sync_lock = threading.Lock()
+
     def _load_enrollments(self):
         """Load enrollment secrets from file or environment."""
         enrollment_file = os.getenv("ENROLLMENT_SECRETS_FILE", "config/enrollments.json")
@@ -40,31 +122,153 @@ class SessionManager:
 
     def create_session(self, tenant_id: str, ttl_seconds: int = 3600) -> str:
         """Create a new session token."""
+        if self.token_format == "signed":
+            return self.signer.issue(tenant_id, ttl_seconds)
+
         token = secrets.token_urlsafe(32)
-        self.sessions[token] = {
-            "tenant_id": tenant_id,
-            "created_at": datetime.utcnow().isoformat(),
-            "expires_at": (datetime.utcnow() + timedelta(seconds=ttl_seconds)).isoformat(),
-        }
+        now = time.time()
+        session = Session(tenant_id, now, now + ttl_seconds)
+        if self.state is not None:
+            self.state.put_session(token, session.to_dict(), session.expires_at)
+            return token
+
+        self.evict_expired(now)
+        with self._lock:
+            self.sessions[token] = session
+            heapq.heappush(self._expiry_heap, (session.expires_at, token))
+            earliest = self._expiry_heap[0][1] == token
+        # The sweeper may be sleeping until a later deadline
+        if earliest:
+            self._wakeup.set()
         return token
 
     def validate_token(self, token: str) -> Optional[Dict]:
         """Validate a session token."""
-        if token not in self.sessions:
-            return None
+        if self.signer is not None and SignedTokens.is_signed(token):
+            return self._validate_signed(token)
 
-        session = self.sessions[token]
-        expires_at = datetime.fromisoformat(session["expires_at"])
+        if self.state is not None:
+            record = self.state.get_session(token)
+            session = Session.from_dict(record) if record is not None else None
+        else:
+            session = self.sessions.get(token)
+        if session is None:
+            return None
 
-        if datetime.utcnow() > expires_at:
-            del self.sessions[token]
+        if time.time() > session.expires_at:
+            self.revoke_session(token)
             return None
 
         return session
 
+    def _validate_signed(self, token: str) -> Optional[Dict]:
+        """Session for a signed token: signature, expiry and revocation checks, no lookup."""
+        claims = self.signer.verify(token)
+        if claims is None:
+            return None
+
+        tenant_id, expires_at, token_id = claims
+        self._sync_revocations()
+        if token_id in self.revocations:
+            return None
+        return {"tenant_id": tenant_id, "expires_at": expires_at, "token_id": token_id}
+
+    def _sync_revocations(self):
+        """Pick up signed tokens revoked by other workers, at most every poll_interval."""
+        if self.state is None or time.monotonic() - self._revocations_synced < self.poll_interval:
+            return
+        # One thread syncs; the others go on with what is already known
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            revoked, self._revocation_cursor = self.state.revocations_since(self._revocation_cursor)
+            for token_id, expires_at in revoked:
+                self.revocations.add(token_id, expires_at)
+            self._revocations_synced = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
     def revoke_session(self, token: str) -> bool:
         """Revoke a session token."""
-        if token in self.sessions:
-            del self.sessions[token]
+        if self.signer is not None and SignedTokens.is_signed(token):
+            claims = self.signer.verify(token)
+            if claims is None:
+                return False
+            _, expires_at, token_id = claims
+            if token_id in self.revocations:
+                return False
+            self.revocations.add(token_id, expires_at)
+            if self.state is not None:
+                self.state.put_revocation(token_id, expires_at)
             return True
-        return False
+
+        if self.state is not None:
+            return self.state.delete_session(token)
+        # The heap entry is dropped lazily when it comes due
+        return self.sessions.pop(token, None) is not None
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Drop local sessions past expiry; O(log n) per session dropped."""
+        now = now if now is not None else time.time()
+        evicted = 0
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                expires_at, token = heapq.heappop(heap)
+                session = self.sessions.get(token)
+                if session is not None and session.expires_at == expires_at:
+                    del self.sessions[token]
+                    evicted += 1
+            self.evicted += evicted
+        return evicted
+
+    def start_sweeper(self):
+        """Start the background thread that evicts expired sessions."""
+        if self._sweeper is not None:
+            return
+
+        self._stopping = False
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweeper thread."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self):
+        """Sleep until the earliest session expiry, then evict."""
+        while not self._stopping:
+            # Clear before reading the deadline so a wakeup for an earlier one is not lost
+            self._wakeup.clear()
+            with self._lock:
+                deadline = self._expiry_heap[0][0] if self._expiry_heap else None
+            timeout = None if deadline is None else deadline - time.time()
+            if timeout is None or timeout > 0:
+                self._wakeup.wait(timeout)
+            if self._stopping:
+                return
+
+            try:
+                evicted = self.evict_expired()
+                if evicted:
+                    logger.debug(f"Evicted {evicted} expired sessions")
+            except Exception as e:
+                logger.error(f"Session sweep failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return session counts and token settings."""
+        stats: Dict[str, Any] = {
+            "token_format": self.token_format,
+            "local_sessions": len(self.sessions),
+            "expiry_heap": len(self._expiry_heap),
+            "evicted": self.evicted,
+            "revocations": self.revocations.get_stats(),
+        }
+        if self.signer is not None:
+            stats["signing_key"] = self.signer.keyring.active
+            stats["verification_keys"] = sorted(self.signer.keyring.keys)
+        return stats
@@ -0,0 +1,268 @@
+"""Per-tenant, per-credential cache of upstream GET responses."""
+
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Any, Tuple, Mapping
+
+logger = logging.getLogger(__name__)
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    """Case-insensitive header lookup on a plain dict or a case-insensitive mapping."""
+    value = headers.get(name)
+    if value is not None:
+        return value
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into {directive: argument or None}."""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds of an HTTP date, or None."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class CachedResponse:
+    """A stored upstream response plus what is needed to revalidate it."""
+
+    __slots__ = ("status_code", "headers", "body", "etag", "last_modified", "expires_at", "url")
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes, url: str):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.expires_at = 0.0
+
+    @property
+    def size(self) -> int:
+        """Approximate bytes held by this entry."""
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """Whether the entry may be served without asking the upstream."""
+        return (now or time.time()) < self.expires_at
+
+
+class ResponseCache:
+    """LRU cache of GET responses, bounded by total bytes.
+
+    Entries are keyed by tenant, credential selector, URL and Accept header,
+    so agents never see responses fetched with someone else's credentials.
+    Freshness follows the upstream's Cache-Control (max-age, no-cache,
+    no-store) or Expires. Stale entries with an ETag or Last-Modified are
+    revalidated with a conditional request; a 304 (which GitHub does not
+    count against the rate limit) refreshes and serves the stored body.
+    """
+
+    # Request headers that make a GET uncacheable through the gateway
+    BYPASS_REQUEST_HEADERS = ("range", "if-none-match", "if-modified-since", "if-match", "if-unmodified-since")
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_entry_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ):
+        """Initialize response cache from arguments or environment."""
+        if enabled is None:
+            enabled = os.getenv("PROXY_CACHE_ENABLED", "true").lower() == "true"
+        self.enabled = enabled
+        self.max_bytes = max_bytes or int(os.getenv("PROXY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.max_entry_bytes = max_entry_bytes or int(os.getenv("PROXY_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        # (tenant, url) -> keys, for invalidation after writes
+        self._by_url: Dict[Tuple[Optional[str], str], set] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def key(
+        self,
+        tenant_id: Optional[str],
+        cred_selector: Optional[str],
+        url: str,
+        headers: Mapping[str, str],
+    ) -> Optional[Tuple]:
+        """Cache key for a GET, or None if this request must bypass the cache."""
+        if not self.enabled:
+            return None
+        if any(_header(headers, name) is not None for name in self.BYPASS_REQUEST_HEADERS):
+            return None
+        if "no-store" in parse_cache_control(_header(headers, "Cache-Control")):
+            return None
+        return (tenant_id, cred_selector, url, _header(headers, "Accept") or "")
+
+    @staticmethod
+    def wants_revalidation(headers: Mapping[str, str]) -> bool:
+        """Whether the agent asked for an end-to-end check (no-cache / max-age=0)."""
+        directives = parse_cache_control(_header(headers, "Cache-Control"))
+        return "no-cache" in directives or directives.get("max-age") == "0"
+
+    def lookup(self, key: Tuple) -> Optional[CachedResponse]:
+        """Return the stored entry for key (fresh or stale), counting a miss if none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def record_hit(self):
+        """Count a response served from the cache without an upstream call."""
+        with self._lock:
+            self._stats["hits"] += 1
+
+    @staticmethod
+    def conditional_headers(entry: CachedResponse) -> Dict[str, str]:
+        """Validators to send when revalidating a stale entry."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    @staticmethod
+    def _expires_at(response_headers: Mapping[str, str], now: float) -> Optional[float]:
+        """Freshness deadline from Cache-Control / Expires; None if not storable."""
+        directives = parse_cache_control(_header(response_headers, "Cache-Control"))
+        if "no-store" in directives:
+            return None
+        if "no-cache" in directives:
+            return now
+        if directives.get("max-age") is not None:
+            try:
+                return now + max(int(directives["max-age"]), 0)
+            except ValueError:
+                return now
+        expires = _http_date(_header(response_headers, "Expires"))
+        if expires is not None:
+            date = _http_date(_header(response_headers, "Date")) or now
+            return now + max(expires - date, 0)
+        return now
+
+    def store(
+        self,
+        key: Tuple,
+        status_code: int,
+        response_headers: Mapping[str, str],
+        served_headers: Dict[str, str],
+        body: bytes,
+    ) -> bool:
+        """Store a 200 response if the upstream allows it; False if not stored."""
+        if status_code != 200 or len(body) > self.max_entry_bytes:
+            return False
+        if (_header(response_headers, "Vary") or "").strip() == "*":
+            return False
+
+        now = time.time()
+        expires_at = self._expires_at(response_headers, now)
+        etag = _header(response_headers, "ETag")
+        last_modified = _header(response_headers, "Last-Modified")
+        # Useless unless it is fresh for a while or can be revalidated
+        if expires_at is None or (expires_at <= now and not etag and not last_modified):
+            return False
+
+        entry = CachedResponse(status_code, dict(served_headers), body, key[2])
+        entry.etag = etag
+        entry.last_modified = last_modified
+        entry.expires_at = expires_at
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._by_url.setdefault((key[0], entry.url), set()).add(key)
+            self._bytes += entry.size
+            self._stats["stores"] += 1
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+        return True
+
+    def refresh(self, key: Tuple, entry: CachedResponse, response_headers: Mapping[str, str]):
+        """Apply a 304 Not Modified: extend freshness and update validators."""
+        now = time.time()
+        expires_at = self._expires_at(response_headers, now)
+        with self._lock:
+            self._stats["revalidations"] += 1
+            self._stats["revalidated"] += 1
+            if expires_at is None:
+                self._remove(key)
+                return
+            entry.expires_at = expires_at
+            entry.etag = _header(response_headers, "ETag") or entry.etag
+            entry.last_modified = _header(response_headers, "Last-Modified") or entry.last_modified
+
+    def record_changed(self):
+        """Count a revalidation that came back with a new body."""
+        with self._lock:
+            self._stats["revalidations"] += 1
+
+    def invalidate(self, tenant_id: Optional[str], url: str):
+        """Drop every cached variant of url for a tenant (after a write to it)."""
+        with self._lock:
+            keys = self._by_url.get((tenant_id, url))
+            if not keys:
+                return
+            for key in list(keys):
+                self._remove(key)
+            self._stats["invalidations"] += 1
+
+    def _remove(self, key: Tuple):
+        """Remove an entry and its index (caller holds the lock)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        index_key = (key[0], entry.url)
+        keys = self._by_url.get(index_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_url[index_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache size and hit/miss/revalidation statistics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"] + stats["revalidations"]
+        stats["hit_ratio"] = (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        stats["max_bytes"] = self.max_bytes
+        stats["enabled"] = self.enabled
+        return stats
@@ -0,0 +1,367 @@
+"""Token-based read/write classification of CLI commands.
+
+Shared by the policy engine and the ssh-gw wrappers. Each tool is described
+by data: the global flags that take a value (so their values are never
+mistaken for subcommands) and a command tree. Arguments are split into
+flags and positionals once, then the positionals walk a precompiled trie:
+
+    aws --region us-east-1 s3 rm s3://bucket/key   -> aws / s3 / rm   -> write
+    kubectl -n prod delete pod web-0                -> kubectl / delete -> write
+
+This module only uses the standard library so ssh-gw can ship it on its own.
+"""
+
+import shlex
+from typing import Dict, Optional, Any, List, Tuple, Union
+
+READ = "read"
+WRITE = "write"
+
+# A node spec is either a verdict string or a dict with any of:
+#   verdict       result when the walk ends here or the next token is unknown
+#   children      token -> node spec ("*" matches any token, SELF loops back)
+#   prefixes      [(token prefix, verdict)] tried before "*"
+#   suffixes      [(token suffix, verdict)] tried after prefixes
+#   method_flags  flags whose value is an HTTP method (non-GET/HEAD/OPTIONS = write)
+#   write_flags   flags whose presence means write (request bodies, uploads)
+SELF = "<self>"
+
+_AWS_READ_PREFIXES = [("list", READ), ("describe", READ), ("get", READ), ("head", READ), ("wait", READ), ("help", READ)]
+
+# Compound verbs that change things (gh release delete-asset, gcloud compute
+# instances attach-disk), whatever group they appear in
+_WRITE_PREFIXES = [
+    ("create-", WRITE), ("delete-", WRITE), ("update-", WRITE), ("set-", WRITE), ("add-", WRITE),
+    ("remove-", WRITE), ("attach-", WRITE), ("detach-", WRITE),
+]
+_WRITE_SUFFIXES = [
+    ("-create", WRITE), ("-delete", WRITE), ("-update", WRITE), ("-edit", WRITE), ("-add", WRITE),
+    ("-remove", WRITE),
+]
+
+_GCLOUD_READ_VERBS = [
+    "list", "describe", "help", "info", "read", "tail", "print-access-token", "get", "ls", "cat", "du",
+    "search", "version",
+]
+_GCLOUD_WRITE_VERBS = [
+    "create", "delete", "update", "deploy", "set", "enable", "disable", "patch", "import", "reset",
+    "start", "stop", "resize", "ssh", "scp", "undelete", "rollback", "submit", "cancel", "execute",
+    "rm", "cp", "mv", "rsync", "publish", "restart", "upgrade", "ack",
+]
+
+# gcloud command groups nest to any depth (gcloud compute instances list), so
+# the group node loops back on itself until a verb is found. Only known read
+# verbs are reads: a walk that never reaches one (gcloud storage rm ...) is a
+# write.
+_GCLOUD_GROUP = {
+    "verdict": WRITE,
+    "prefixes": [("get-", READ)] + _WRITE_PREFIXES,
+    "suffixes": _WRITE_SUFFIXES,
+    "children": {
+        **{verb: READ for verb in _GCLOUD_READ_VERBS},
+        **{verb: WRITE for verb in _GCLOUD_WRITE_VERBS},
+        "*": SELF,
+    },
+}
+
+_GH_READ_VERBS = [
+    "list", "view", "status", "diff", "checks", "search", "clone", "checkout", "download", "watch", "browse",
+    "get", "check", "verify",
+]
+_GH_WRITE_VERBS = [
+    "create", "delete", "update", "edit", "merge", "close", "reopen", "open", "fork", "comment", "review",
+    "ready", "sync", "archive", "unarchive", "rename", "transfer", "set", "add", "remove", "upload",
+    "lock", "unlock", "pin", "unpin", "enable", "disable", "run", "rerun", "cancel",
+]
+
+# gh <group> [<subgroup> ...] <verb>. The top-level token is always consumed
+# as a group, so "run" is a group there (gh run list) and a verb below it
+# (gh workflow run). As with gcloud, only known read verbs are reads.
+_GH_GROUP = {
+    "verdict": WRITE,
+    "prefixes": _WRITE_PREFIXES,
+    "suffixes": _WRITE_SUFFIXES,
+    "children": {
+        **{verb: READ for verb in _GH_READ_VERBS},
+        **{verb: WRITE for verb in _GH_WRITE_VERBS},
+        "*": SELF,
+    },
+}
+
+_CRUD_VERBS = [
+    ("create", WRITE), ("delete", WRITE), ("update", WRITE), ("edit", WRITE), ("set", WRITE),
+    ("post", WRITE), ("mute", WRITE), ("unmute", WRITE),
+]
+
+CLI_COMMANDS: Dict[str, Dict[str, Any]] = {
+    "aws": {
+        "value_flags": [
+            "--region", "--profile", "--output", "--endpoint-url", "--query", "--color",
+            "--ca-bundle", "--cli-read-timeout", "--cli-connect-timeout", "--cli-binary-format",
+        ],
+        "tree": {
+            "verdict": READ,
+            "prefixes": _AWS_READ_PREFIXES,
+            "children": {
+                "s3": {
+                    "verdict": WRITE,
+                    "children": {"ls": READ, "presign": READ, "help": READ},
+                },
+                "*": {"verdict": WRITE, "prefixes": _AWS_READ_PREFIXES},
+            },
+        },
+    },
+    "gcloud": {
+        "value_flags": [
+            "--project", "--account", "--configuration", "--format", "--verbosity",
+            "--impersonate-service-account", "--billing-project", "--region", "--zone",
+        ],
+        # Bare flags (gcloud --version) are reads; any group below is walked as above
+        "tree": {**_GCLOUD_GROUP, "verdict": READ, "children": {**_GCLOUD_GROUP["children"], "*": _GCLOUD_GROUP}},
+    },
+    "gh": {
+        "value_flags": ["-R", "--repo", "--hostname", "-X", "--method", "-H", "--header", "--jq", "-q", "--template", "-t"],
+        "tree": {
+            "verdict": READ,
+            "children": {
+                "api": {
+                    "verdict": READ,
+                    "method_flags": ["-X", "--method"],
+                    "write_flags": ["-f", "--raw-field", "-F", "--field", "--input"],
+                },
+                # Top-level commands whose arguments are free text
+                "status": READ,
+                "browse": READ,
+                "search": READ,
+                # Copies labels into the target repository
+                "label": {**_GH_GROUP, "children": {**_GH_GROUP["children"], "clone": WRITE}},
+                "*": _GH_GROUP,
+            },
+        },
+    },
+    "kubectl": {
+        "value_flags": [
+            "-n", "--namespace", "--context", "--cluster", "--user", "--kubeconfig", "-s", "--server",
+            "--as", "--as-group", "--token", "-l", "--selector", "-o", "--output", "-f", "--filename",
+            "-c", "--container", "--request-timeout",
+        ],
+        "tree": {
+            "verdict": WRITE,
+            "children": {
+                **{verb: READ for verb in [
+                    "get", "describe", "logs", "top", "explain", "api-resources", "api-versions",
+                    "version", "cluster-info", "diff", "wait", "events", "completion", "help",
+                ]},
+                **{verb: WRITE for verb in [
+                    "apply", "create", "delete", "edit", "patch", "replace", "scale", "autoscale",
+                    "expose", "run", "set", "label", "annotate", "cordon", "uncordon", "drain",
+                    "taint", "exec", "cp", "attach", "port-forward", "debug",
+                ]},
+                "rollout": {
+                    "verdict": WRITE,
+                    "children": {"status": READ, "history": READ},
+                },
+                "auth": {"verdict": READ},
+                "config": {
+                    "verdict": READ,
+                    "prefixes": [("set", WRITE), ("delete", WRITE), ("rename", WRITE), ("use", WRITE)],
+                },
+            },
+        },
+    },
+    "terraform": {
+        "value_flags": [],
+        "tree": {
+            "verdict": READ,
+            "children": {
+                **{command: WRITE for command in [
+                    "apply", "destroy", "import", "taint", "untaint", "refresh", "force-unlock",
+                ]},
+                "state": {
+                    "verdict": WRITE,
+                    "children": {"list": READ, "show": READ, "pull": READ},
+                },
+                "workspace": {
+                    "verdict": READ,
+                    "children": {"new": WRITE, "delete": WRITE},
+                },
+            },
+        },
+    },
+    "curl": {
+        "value_flags": [
+            "-X", "--request", "-H", "--header", "-d", "--data", "--data-raw", "--data-binary",
+            "--data-urlencode", "--data-ascii", "-F", "--form", "--form-string", "-T", "--upload-file",
+            "--json", "-o", "--output", "-u", "--user", "-A", "--user-agent", "-e", "--referer",
+            "-b", "--cookie", "-c", "--cookie-jar", "-m", "--max-time", "--connect-timeout", "-x", "--proxy",
+        ],
+        "tree": {
+            "verdict": READ,
+            "method_flags": ["-X", "--request"],
+            "write_flags": [
+                "-d", "--data", "--data-raw", "--data-binary", "--data-urlencode", "--data-ascii",
+                "-F", "--form", "--form-string", "-T", "--upload-file", "--json",
+            ],
+        },
+    },
+    "datadog": {
+        "value_flags": ["--config", "--api-key", "--application-key"],
+        "tree": {"verdict": READ, "prefixes": _CRUD_VERBS, "children": {"*": SELF}},
+    },
+    "linear": {
+        "value_flags": ["--team", "--workspace"],
+        "tree": {
+            "verdict": READ,
+            "prefixes": _CRUD_VERBS + [("assign", WRITE), ("move", WRITE)],
+            "children": {"*": SELF},
+        },
+    },
+}
+
+# Provider names used by the HTTP side for the same tools
+TOOL_ALIASES = {"gcp": "gcloud"}
+
+_READ_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+
+class _Node:
+    """One compiled command-tree node."""
+
+    __slots__ = ("children", "prefixes", "suffixes", "verdict", "method_flags", "write_flags")
+
+    def __init__(self, verdict: str):
+        self.children: Dict[str, "_Node"] = {}
+        self.prefixes: Tuple[Tuple[str, str], ...] = ()
+        self.suffixes: Tuple[Tuple[str, str], ...] = ()
+        self.verdict = verdict
+        self.method_flags: frozenset = frozenset()
+        self.write_flags: frozenset = frozenset()
+
+
+def _compile_node(spec: Union[str, Dict[str, Any]]) -> _Node:
+    """Compile a node spec (recursively)."""
+    if isinstance(spec, str):
+        return _Node(spec)
+
+    node = _Node(spec.get("verdict", WRITE))
+    node.prefixes = tuple((prefix.lower(), verdict) for prefix, verdict in spec.get("prefixes", ()))
+    node.suffixes = tuple((suffix.lower(), verdict) for suffix, verdict in spec.get("suffixes", ()))
+    node.method_flags = frozenset(spec.get("method_flags", ()))
+    node.write_flags = frozenset(spec.get("write_flags", ()))
+    for token, child in spec.get("children", {}).items():
+        node.children[token.lower()] = node if child == SELF else _compile_node(child)
+    return node
+
+
+class CommandClassifier:
+    """Classifies CLI invocations as read or write from per-tool command tries."""
+
+    def __init__(self, commands: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Compile the command tables (CLI_COMMANDS by default)."""
+        commands = commands if commands is not None else CLI_COMMANDS
+        self.tools: Dict[str, Tuple[_Node, frozenset]] = {}
+        for tool, spec in commands.items():
+            value_flags = set(spec.get("value_flags", ()))
+            root = _compile_node(spec["tree"])
+            # Flags the tree inspects always carry a value
+            stack, seen = [root], set()
+            while stack:
+                node = stack.pop()
+                if id(node) in seen:
+                    continue
+                seen.add(id(node))
+                value_flags.update(node.method_flags, node.write_flags)
+                stack.extend(node.children.values())
+            self.tools[tool] = (root, frozenset(value_flags))
+
+    def classify(self, tool: str, args: List[str]) -> str:
+        """Classify a tool invocation; unknown tools are writes.
+
+        One pass over the arguments: flags (and the values of flags that
+        take one) are skipped, positionals walk the trie, and the walk stops
+        as soon as a verdict is certain.
+        """
+        entry = self.tools.get(TOOL_ALIASES.get(tool, tool))
+        if entry is None:
+            return WRITE
+        if not args:
+            return READ
+
+        node, value_flags = entry
+        flags: Dict[str, Optional[str]] = {}
+        walking = True
+        args = iter(args)
+        for arg in args:
+            if len(arg) > 1 and arg[0] == "-":
+                if arg == "--":
+                    break
+                if arg[1] == "-":
+                    name, eq, value = arg.partition("=")
+                    if not eq:
+                        value = next(args, None) if name in value_flags else None
+                else:
+                    # A cluster of short flags (-sSX POST, -sd x=1, -XPOST): the
+                    # first one that takes a value consumes the rest or the next arg
+                    for i in range(1, len(arg)):
+                        name = "-" + arg[i]
+                        if name in value_flags:
+                            flags[name] = arg[i + 1:] or next(args, None)
+                            break
+                        flags[name] = None
+                    continue
+                flags[name] = value
+                continue
+
+            if not walking:
+                continue
+            token = arg.lower()
+            child = node.children.get(token)
+            if child is None:
+                for prefix, verdict in node.prefixes:
+                    if token.startswith(prefix):
+                        return verdict
+                for suffix, verdict in node.suffixes:
+                    if token.endswith(suffix):
+                        return verdict
+                child = node.children.get("*")
+                if child is None:
+                    walking = False
+                    continue
+            node = child
+            if not node.children and not node.prefixes and not node.suffixes:
+                # A leaf: only flag rules (curl, gh api) can still change the answer
+                if not node.write_flags and not node.method_flags:
+                    return node.verdict
+                walking = False
+
+        if node.write_flags and any(flag in flags for flag in node.write_flags):
+            return WRITE
+        for flag in node.method_flags:
+            method = flags.get(flag)
+            if method:
+                return READ if method.upper() in _READ_METHODS else WRITE
+        return node.verdict
+
+    def classify_command_line(self, tool: str, command: str) -> str:
+        """Classify a command given as a single string (shell-quoted)."""
+        try:
+            args = shlex.split(command)
+        except ValueError:
+            args = command.split()
+        return self.classify(tool, args)
+
+
+_default_classifier: Optional[CommandClassifier] = None
+
+
+def get_classifier() -> CommandClassifier:
+    """Shared classifier compiled from CLI_COMMANDS on first use."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = CommandClassifier()
+    return _default_classifier
+
+
+def classify_command(tool: str, args: List[str]) -> str:
+    """Classify a tool invocation as "read" or "write"."""
+    return get_classifier().classify(tool, args)
@@ -0,0 +1,296 @@
+"""Single-flight coalescing of identical concurrent upstream reads."""
+
+import os
+import logging
+import threading
+from typing import Dict, Optional, Any, Callable, Hashable, Iterator, List, Set
+
+logger = logging.getLogger(__name__)
+
+
+class SlowReaderError(Exception):
+    """Raised to a shared-stream reader that fell more than max_buffer behind the others."""
+
+
+class SharedStream:
+    """One upstream streaming body fanned out to several readers.
+
+    Whichever reader needs a chunk nobody has fetched yet pulls it from the
+    upstream, so a slow or departed reader never stalls the others. Chunks
+    are retained so readers can join from the start; once more than
+    max_buffer bytes have been seen the stream stops accepting readers and
+    drops chunks every remaining reader has passed. Retention stays bounded
+    by max_buffer: a reader that falls further behind is detached and gets
+    SlowReaderError. The upstream is closed when it is exhausted or every
+    reader has gone.
+    """
+
+    def __init__(self, source, max_buffer: int, on_closed: Optional[Callable[[], None]] = None):
+        """Initialize shared stream over a closable chunk iterator."""
+        self.source = source
+        self._iter = iter(source)
+        self.max_buffer = max_buffer
+        self.on_closed = on_closed
+        self.joinable = True
+        self._chunks: List[bytes] = []
+        self._base = 0  # absolute index of _chunks[0]
+        self._buffered = 0  # bytes seen
+        self._retained = 0  # bytes held in _chunks
+        self._positions: Dict[int, int] = {}
+        self._detached: Set[int] = set()
+        self._next_reader = 0
+        self._reading = False
+        self._finished = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+
+    def reader(self) -> Optional["SharedStreamReader"]:
+        """A new reader from the first chunk, or None once the stream is no longer joinable."""
+        with self._cond:
+            if not self.joinable:
+                return None
+            reader_id = self._next_reader
+            self._next_reader += 1
+            self._positions[reader_id] = 0
+            return SharedStreamReader(self, reader_id)
+
+    def _read(self, reader_id: int) -> Optional[bytes]:
+        """Next chunk for a reader, or None at the end."""
+        while True:
+            with self._cond:
+                while True:
+                    if reader_id in self._detached:
+                        raise SlowReaderError(f"Reader fell more than {self.max_buffer} bytes behind")
+                    position = self._positions[reader_id]
+                    if position < self._base + len(self._chunks):
+                        chunk = self._chunks[position - self._base]
+                        self._positions[reader_id] = position + 1
+                        self._trim()
+                        return chunk
+                    if self._finished:
+                        if self._error is not None:
+                            raise self._error
+                        return None
+                    if not self._reading:
+                        self._reading = True
+                        break
+                    self._cond.wait()
+
+            # Pull from the upstream without holding the lock
+            chunk, error = None, None
+            try:
+                chunk = next(self._iter, None)
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._reading = False
+                if chunk is None:
+                    self._finish(error)
+                else:
+                    self._chunks.append(chunk)
+                    self._buffered += len(chunk)
+                    self._retained += len(chunk)
+                    if self._buffered > self.max_buffer:
+                        self._close_to_joiners()
+                        self._detach_laggards(reader_id)
+                self._cond.notify_all()
+
+    def _trim(self):
+        """Drop chunks every reader has passed, once no one can join (caller holds the lock)."""
+        if self.joinable or not self._positions:
+            return
+        drop = min(self._positions.values()) - self._base
+        if drop > 0:
+            self._retained -= sum(len(chunk) for chunk in self._chunks[:drop])
+            del self._chunks[:drop]
+            self._base += drop
+
+    def _detach_laggards(self, keep: int):
+        """Detach the furthest-behind readers until at most max_buffer bytes are retained (caller holds the lock)."""
+        self._trim()
+        while self._retained > self.max_buffer:
+            slowest = min(self._positions.values())
+            laggards = [reader for reader, position in self._positions.items() if position == slowest and reader != keep]
+            if not laggards:
+                return
+            for reader in laggards:
+                del self._positions[reader]
+                self._detached.add(reader)
+            logger.warning(f"Detached {len(laggards)} slow reader(s) from a shared stream")
+            self._trim()
+
+    def _close_to_joiners(self):
+        """Stop accepting readers (caller holds the lock)."""
+        if self.joinable:
+            self.joinable = False
+            if self.on_closed:
+                self.on_closed()
+
+    def _finish(self, error: Optional[BaseException] = None):
+        """Mark the upstream done and release it (caller holds the lock)."""
+        if self._finished:
+            return
+        self._finished = True
+        self._error = error
+        self._close_to_joiners()
+        if hasattr(self.source, "close"):
+            self.source.close()
+
+    def _release(self, reader_id: int):
+        """Forget a reader; close the upstream when the last one goes."""
+        with self._cond:
+            self._detached.discard(reader_id)
+            if self._positions.pop(reader_id, None) is None:
+                return
+            if not self._positions:
+                self._finish()
+                self._chunks = []
+                self._retained = 0
+            else:
+                self._trim()
+            self._cond.notify_all()
+
+
+class SharedStreamReader:
+    """One agent's view of a SharedStream (iterable, closable, like StreamingBody)."""
+
+    def __init__(self, stream: SharedStream, reader_id: int):
+        self.stream = stream
+        self.reader_id = reader_id
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            while True:
+                chunk = self.stream._read(self.reader_id)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop reading; the upstream closes once every reader has."""
+        self.stream._release(self.reader_id)
+
+
+class _Flight:
+    """One in-progress upstream call and the callers waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.shared: Optional[SharedStream] = None
+        # Readers reserved for callers that joined before the stream was published
+        self.readers: List[SharedStreamReader] = []
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls so one upstream request serves them all.
+
+    The first caller for a key (the leader) runs the fetch; callers arriving
+    while it is in flight wait for its result. Buffered bodies are shared
+    as-is. Streaming bodies are fanned out through a SharedStream, which
+    keeps the flight joinable until the body is done or too large to
+    buffer for late joiners.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, max_buffer: Optional[int] = None):
+        """Initialize single-flight group from arguments or environment."""
+        if enabled is None:
+            enabled = os.getenv("PROXY_COALESCE_ENABLED", "true").lower() == "true"
+        self.enabled = enabled
+        self.max_buffer = max_buffer or int(os.getenv("PROXY_COALESCE_MAX_BUFFER", str(8 * 1024 * 1024)))
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"flights": 0, "coalesced": 0, "stream_joins": 0, "late_misses": 0}
+
+    def do(self, key: Hashable, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run fetch once per key among concurrent callers and give each its own result view."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._stats["flights"] += 1
+                leader = True
+            else:
+                slot = flight.waiters
+                flight.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if leader:
+            return self._lead(key, flight, fetch)
+
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        if flight.shared is None:
+            return self._copy(flight.result)
+
+        if slot < len(flight.readers):
+            reader = flight.readers[slot]
+        else:
+            reader = flight.shared.reader()
+        if reader is None:
+            # Too late to replay the body from the start: fetch independently
+            with self._lock:
+                self._stats["late_misses"] += 1
+            return fetch()
+        with self._lock:
+            self._stats["stream_joins"] += 1
+        return self._copy(flight.result, reader)
+
+    def _lead(self, key: Hashable, flight: _Flight, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run the fetch as leader and publish its result."""
+        try:
+            result = fetch()
+        except BaseException as e:
+            flight.error = e
+            self._forget(key, flight)
+            flight.done.set()
+            raise
+
+        body = result.get("body")
+        if isinstance(body, (bytes, bytearray)) or body is None:
+            flight.result = result
+            self._forget(key, flight)
+            flight.done.set()
+            return self._copy(result)
+
+        # Streaming: the flight stays joinable until the SharedStream closes it.
+        # Callers already waiting get their readers now, before anyone can
+        # drain the stream; later joiners ask the stream themselves.
+        shared = SharedStream(body, self.max_buffer, on_closed=lambda: self._forget(key, flight))
+        reader = shared.reader()
+        with self._lock:
+            flight.readers = [shared.reader() for _ in range(flight.waiters)]
+            flight.shared = shared
+            flight.result = result
+            flight.done.set()
+        return self._copy(result, reader)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        """Stop routing new callers to this flight."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    @staticmethod
+    def _copy(result: Dict[str, Any], body: Any = None) -> Dict[str, Any]:
+        """Per-caller result (own headers dict, optionally its own body reader)."""
+        copy = dict(result)
+        copy["headers"] = dict(result.get("headers") or {})
+        if body is not None:
+            copy["body"] = body
+        return copy
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        stats["enabled"] = self.enabled
+        return stats
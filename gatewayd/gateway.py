@@ -0,0 +1,384 @@
+"""Gateway components and request handling shared by the Flask and ASGI apps."""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, Optional, Any, Tuple
+
+from .proxy import HTTPProxy, RequestBody
+from .approvals import ApprovalOrchestrator, ApprovalStatus, request_fingerprint
+from .credentials import CredentialBroker
+from .policy import PolicyEngine
+from .auth import SessionManager
+from .grants import GrantTable, session_key
+from .pending import PendingRequest, PendingRequestStore, PendingState
+from .state import create_state_backend
+
+logger = logging.getLogger(__name__)
+
+
+class ActionType(Enum):
+    """Classification of actions."""
+    READ = "read"
+    WRITE = "write"
+
+
+class CredentialsUnavailable(Exception):
+    """Raised when a request's credential selector cannot be resolved."""
+
+
+@dataclass(slots=True)
+class GatewayRequest:
+    """Request metadata for logging and classification (timestamp in epoch seconds)."""
+    id: str
+    timestamp: float
+    method: str
+    path: str
+    provider: str
+    action_type: ActionType
+    requires_approval: bool
+    session_token: Optional[str] = None
+    cred_selector: Optional[str] = None
+    approval_id: Optional[str] = None
+
+
+def json_result(payload: Dict[str, Any], status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """A JSON reply in the same result shape HTTPProxy.forward_request uses."""
+    return {"status_code": status_code, "json": payload, "headers": headers or {}}
+
+
+class Gateway:
+    """The gateway's components and the request flow both serving modes share.
+
+    The Flask app (threads) and the ASGI app (asyncio) only translate HTTP
+    to and from these calls. Replies are result dicts: forwarded upstream
+    responses have "body", local replies have "json" (see json_result).
+    """
+
+    def __init__(self, config_path: Optional[str] = None):
+        """Initialize core components."""
+        # Shared with other worker processes when GATEWAY_STATE_BACKEND is set
+        self.state = create_state_backend()
+        self.session_manager = SessionManager(state=self.state)
+        self.credential_broker = CredentialBroker(config_path)
+        self.policy_engine = PolicyEngine(config_path)
+        self.grant_table = GrantTable()
+        # Grants and async-parked requests are per process, so serve only
+        # runs several workers with both off (see __main__)
+        self.workers = int(os.getenv("GATEWAY_WORKERS", "1"))
+        self.grants_enabled = os.getenv("APPROVAL_GRANTS", "true").lower() == "true"
+        self.approval_orchestrator = ApprovalOrchestrator(
+            grant_table=self.grant_table if self.grants_enabled else None, state=self.state,
+        )
+        self.http_proxy = HTTPProxy(self.credential_broker, self.policy_engine)
+        self.pending_requests = PendingRequestStore()
+        self.approval_mode = os.getenv("APPROVAL_MODE", "sync").lower()
+        self.max_wait_seconds = float(os.getenv("APPROVAL_WAIT_MAX_SECONDS", "60"))
+        self.sse_heartbeat_seconds = float(os.getenv("APPROVAL_SSE_HEARTBEAT_SECONDS", "15"))
+
+    def start(self):
+        """Start background work (session and approval sweepers, policy watcher)."""
+        # Parked requests go away with their approval record
+        self.approval_orchestrator.on_evict(self.pending_requests.remove)
+        self.approval_orchestrator.start_sweeper()
+        self.session_manager.start_sweeper()
+        self.http_proxy.session_pool.start_sweeper()
+        if os.getenv("POLICY_HOT_RELOAD", "true").lower() == "true":
+            self.policy_engine.start_watcher()
+
+    def stop(self):
+        """Stop the background work started by start()."""
+        self.session_manager.stop_sweeper()
+        self.approval_orchestrator.stop_sweeper()
+        self.http_proxy.session_pool.stop_sweeper()
+        self.policy_engine.stop_watcher()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Runtime statistics for gateway components."""
+        stats = {
+            "policy": self.policy_engine.get_stats(),
+            "sessions": self.session_manager.get_stats(),
+            "proxy": self.http_proxy.get_stats(),
+            "approvals": self.approval_orchestrator.get_stats(),
+            "grants": self.grant_table.get_stats(),
+            "pending_requests": self.pending_requests.get_stats(),
+        }
+        if self.state is not None:
+            stats["state"] = self.state.get_stats()
+        return stats
+
+    def create_session(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Enroll an agent and issue a session token (POST /session/new)."""
+        tenant_id = data.get("tenant_id")
+        enrollment_secret = data.get("enrollment_secret")
+
+        if not tenant_id or not enrollment_secret:
+            return json_result({"error": "Missing tenant_id or enrollment_secret"}, 400)
+
+        # Verify enrollment secret (in production, validate against secure storage)
+        if not self.session_manager.verify_enrollment(tenant_id, enrollment_secret):
+            logger.warning(f"Failed enrollment attempt for tenant: {tenant_id}")
+            return json_result({"error": "Invalid credentials"}, 401)
+
+        # Generate session token
+        token = self.session_manager.create_session(tenant_id)
+        ttl_seconds = 3600  # 1 hour default
+
+        return json_result({
+            "session_token": token,
+            "ttl_seconds": ttl_seconds,
+            "expires_at": (datetime.utcnow() + timedelta(seconds=ttl_seconds)).isoformat(),
+        }, 201)
+
+    def authenticate(self, authorization: str) -> Optional[Dict[str, Any]]:
+        """Validate an "Authorization: Bearer" header and return its session."""
+        if not authorization.startswith("Bearer "):
+            return None
+        return self.session_manager.validate_token(authorization[7:])
+
+    def classify(
+        self,
+        token: str,
+        tenant_id: str,
+        provider: str,
+        method: str,
+        path: str,
+        cred_selector: Optional[str],
+        inspected: Optional[bytes] = None,
+    ) -> GatewayRequest:
+        """Classify a proxied request and decide whether it needs approval."""
+        action = self.policy_engine.classify_http_request(provider, method, path, inspected)
+
+        # Create request metadata
+        gateway_req = GatewayRequest(
+            id=str(uuid.uuid4()),
+            timestamp=time.time(),
+            method=method,
+            path=path,
+            provider=provider,
+            action_type=ActionType(action),
+            session_token=token,
+            cred_selector=cred_selector,
+            requires_approval=False,  # Will be determined by policy engine
+        )
+
+        # Classify and determine if approval required
+        gateway_req.requires_approval = self.policy_engine.requires_approval(
+            tenant_id=tenant_id,
+            action_type=gateway_req.action_type,
+            provider=provider,
+            method=method,
+            path=path,
+        )
+
+        # An earlier time-bounded or "always" approval covers repeats
+        if gateway_req.requires_approval and self.grant_table.is_granted(
+            tenant_id, session_key(token), provider, method, path,
+        ):
+            gateway_req.requires_approval = False
+            logger.info(f"Request {gateway_req.id} covered by approval grant")
+
+        logger.info(
+            f"Classified request {gateway_req.id}: {method} {path} "
+            f"({gateway_req.action_type.value}, approval_required={gateway_req.requires_approval})"
+        )
+        return gateway_req
+
+    def request_approval(
+        self,
+        gateway_req: GatewayRequest,
+        tenant_id: str,
+        headers: Dict[str, str],
+        body: Optional[RequestBody],
+    ) -> str:
+        """Request approval for a write.
+
+        Identical writes (retries from the same session, with the same
+        credentials) attach to the same pending approval.
+        """
+        session_id = session_key(gateway_req.session_token)
+        approval_id = self.approval_orchestrator.request_approval(
+            gateway_req=gateway_req,
+            tenant_id=tenant_id,
+            details={
+                "method": gateway_req.method,
+                "path": gateway_req.path,
+                "provider": gateway_req.provider,
+                "session_id": session_id,
+                "headers": headers,
+            },
+            fingerprint=request_fingerprint(
+                tenant_id, gateway_req.provider, gateway_req.method, gateway_req.path,
+                body.digest if body else None, gateway_req.cred_selector, session_id,
+            ),
+        )
+        gateway_req.approval_id = approval_id
+
+        logger.info(f"Approval requested: {approval_id} for request {gateway_req.id}")
+        return approval_id
+
+    def wants_async(self, prefer: str) -> bool:
+        """Whether to park the write and answer 202 (APPROVAL_MODE=async or Prefer: respond-async).
+
+        Never with several workers: a resume landing on another worker
+        would not find the parked request.
+        """
+        if self.workers > 1:
+            return False
+        return self.approval_mode == "async" or "respond-async" in prefer.lower()
+
+    def park(self, approval_id: str, pending: PendingRequest, root: str = "") -> Dict[str, Any]:
+        """Park a write for async approval and build the 202 reply.
+
+        No thread or coroutine waits while a human decides; the request runs
+        on approval or when the agent calls the resume URL.
+        """
+        if self.pending_requests.add(approval_id, pending):
+            self.approval_orchestrator.on_decision(approval_id, self._on_async_decision)
+        else:
+            # Duplicate of an already parked write: share its resume URL
+            pending.release_body()
+
+        resume_url = f"{root}/api/v1/proxy/resume/{approval_id}"
+        return json_result(
+            {
+                "approval_id": approval_id,
+                "status": ApprovalStatus.PENDING.value,
+                "resume_url": resume_url,
+                "status_url": f"{root}/approvals/{approval_id}/status",
+            },
+            202,
+            {"Location": resume_url, "Preference-Applied": "respond-async"},
+        )
+
+    def resume(
+        self, approval_id: str, tenant_id: str, token: str,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[PendingRequest]]:
+        """Decide what a resume call gets.
+
+        Only the session that made the request can resume it, as with
+        session-scoped grants. Returns (reply, None), or (None, pending) when
+        the caller should forward the claimed request and then remove it
+        from the store.
+        """
+        pending = self.pending_requests.get(approval_id)
+        if not pending or pending.tenant_id != tenant_id:
+            return json_result({"error": "Pending request not found"}, 404), None
+
+        status = self.approval_orchestrator.get_status(approval_id)
+        owner = status.session_id if status is not None else session_key(pending.gateway_req.session_token)
+        if owner != session_key(token):
+            logger.warning(f"Resume from another session refused: {approval_id}")
+            return json_result({"error": "Pending request not found"}, 404), None
+        decision = status["status"] if status else ApprovalStatus.EXPIRED.value
+
+        if decision == ApprovalStatus.PENDING.value:
+            return json_result({"approval_id": approval_id, "status": decision}, 202), None
+
+        if decision != ApprovalStatus.APPROVED.value:
+            self.pending_requests.remove(approval_id)
+            logger.warning(f"Resume of unapproved request: {approval_id} ({decision})")
+            return json_result({"error": "Request not approved"}, 403), None
+
+        # Gateway already ran (or is running) the request on approval
+        if pending.execute_on_approval:
+            if pending.state in (PendingState.WAITING, PendingState.EXECUTING):
+                return json_result({"approval_id": approval_id, "status": PendingState.EXECUTING.value}, 202), None
+
+            self.pending_requests.remove(approval_id)
+            if pending.state == PendingState.FAILED:
+                return json_result({"error": "Proxy error"}, 502), None
+            return pending.result, None
+
+        claimed = self.pending_requests.take(approval_id)
+        if not claimed:
+            return json_result({"error": "Request already resumed"}, 409), None
+        return None, claimed
+
+    def _on_async_decision(self, approval_id: str, status: str):
+        """Run or release a parked request once its approval is decided."""
+        pending = self.pending_requests.get(approval_id)
+        if not pending:
+            return
+
+        if status == ApprovalStatus.APPROVED.value:
+            if pending.execute_on_approval:
+                self.pending_requests.execute(approval_id, lambda p: self.forward(p, stream=False))
+        else:
+            pending.release_body()
+
+    def _credentials(self, pending: PendingRequest) -> Optional[Dict[str, Any]]:
+        """Credentials for a request's selector, if it has one."""
+        if not pending.cred_selector:
+            return None
+        credentials = self.credential_broker.get_credentials(pending.tenant_id, pending.cred_selector)
+        if not credentials:
+            logger.error(f"Failed to retrieve credentials: {pending.cred_selector}")
+            raise CredentialsUnavailable(pending.cred_selector)
+        return credentials
+
+    def forward(self, pending: PendingRequest, stream: Optional[bool] = None) -> Dict[str, Any]:
+        """Fetch credentials and forward a request upstream."""
+        return self.http_proxy.forward_request(
+            method=pending.gateway_req.method,
+            path=pending.gateway_req.path,
+            headers=pending.headers,
+            data=pending.body,
+            credentials=self._credentials(pending),
+            provider=pending.provider,
+            tenant_id=pending.tenant_id,
+            stream=stream,
+            cred_selector=pending.cred_selector,
+        )
+
+    async def forward_async(self, pending: PendingRequest, stream: Optional[bool] = None) -> Dict[str, Any]:
+        """forward for asyncio callers."""
+        # The broker may read files or a secrets store: keep it off the loop
+        credentials = await asyncio.to_thread(self._credentials, pending)
+        return await self.http_proxy.forward_request_async(
+            method=pending.gateway_req.method,
+            path=pending.gateway_req.path,
+            headers=pending.headers,
+            data=pending.body,
+            credentials=credentials,
+            provider=pending.provider,
+            tenant_id=pending.tenant_id,
+            stream=stream,
+            cred_selector=pending.cred_selector,
+        )
+
+    def forward_result(self, pending: PendingRequest) -> Dict[str, Any]:
+        """Forward a request and turn failures into error replies."""
+        try:
+            result = self.forward(pending)
+        except CredentialsUnavailable:
+            return json_result({"error": "Failed to retrieve credentials"}, 500)
+        except Exception as e:
+            logger.error(f"Error forwarding request {pending.gateway_req.id}: {str(e)}")
+            return json_result({"error": "Proxy error"}, 502)
+
+        logger.info(f"Request {pending.gateway_req.id} completed successfully")
+        return result
+
+    async def forward_result_async(self, pending: PendingRequest) -> Dict[str, Any]:
+        """forward_result for asyncio callers."""
+        try:
+            result = await self.forward_async(pending)
+        except CredentialsUnavailable:
+            return json_result({"error": "Failed to retrieve credentials"}, 500)
+        except Exception as e:
+            logger.error(f"Error forwarding request {pending.gateway_req.id}: {str(e)}")
+            return json_result({"error": "Proxy error"}, 502)
+
+        logger.info(f"Request {pending.gateway_req.id} completed successfully")
+        return result
+
+    @staticmethod
+    def pending_headers(headers) -> Dict[str, str]:
+        """Agent request headers to keep for forwarding (never the gateway session token)."""
+        return {k: v for k, v in headers.items() if k.lower() != "authorization"}
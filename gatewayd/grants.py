@@ -0,0 +1,159 @@
+"""Time-bounded and persistent approval grants."""
+
+import os
+import json
+import fnmatch
+import hashlib
+import logging
+import re
+import threading
+import time
+from typing import Dict, Optional, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def session_key(token: Optional[str]) -> Optional[str]:
+    """Stable, non-reversible identifier for a session token."""
+    if not token:
+        return None
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def _normalize_path(path: str) -> str:
+    """Grant paths are compared without a leading slash."""
+    return path.lstrip("/")
+
+
+class GrantTable:
+    """Approval grants keyed by tenant, session, provider, method and path.
+
+    Exact-path grants are found with two dict lookups (session-scoped, then
+    tenant-wide). Wildcard grants are kept in short per
+    (tenant, session, provider, method) lists. "Always approve" grants have
+    no expiry, are tenant-wide and persist to the rules file.
+    """
+
+    def __init__(self, rules_file: Optional[str] = None):
+        """Initialize grant table and load persisted rules."""
+        self.rules_file = rules_file or os.getenv("APPROVAL_RULES_FILE", "config/approval_rules.json")
+        # (tenant, session, provider, method, path) -> expires_at epoch (None = never)
+        self._exact: Dict[Tuple, Optional[float]] = {}
+        # (tenant, session, provider, method) -> [(regex, pattern, expires_at)]
+        self._patterns: Dict[Tuple, List[Tuple[Any, str, Optional[float]]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        self._load_rules()
+
+    def _load_rules(self):
+        """Load persistent "always approve" rules."""
+        if not os.path.exists(self.rules_file):
+            return
+
+        with open(self.rules_file) as f:
+            rules = json.load(f)
+
+        for rule in rules:
+            self._add(rule["tenant_id"], None, rule["provider"], rule["method"], rule["path"], None)
+        logger.info(f"Loaded {len(rules)} approval rules from {self.rules_file}")
+
+    def _save_rules(self):
+        """Persist tenant-wide permanent grants (caller holds the lock)."""
+        rules = [
+            {"tenant_id": tenant, "provider": provider, "method": method, "path": path}
+            for (tenant, session, provider, method, path), expires_at in self._exact.items()
+            if session is None and expires_at is None
+        ]
+        for (tenant, session, provider, method), entries in self._patterns.items():
+            rules.extend(
+                {"tenant_id": tenant, "provider": provider, "method": method, "path": pattern}
+                for _, pattern, expires_at in entries
+                if session is None and expires_at is None
+            )
+
+        tmp_file = f"{self.rules_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(rules, f, indent=2)
+        os.replace(tmp_file, self.rules_file)
+
+    def grant(
+        self,
+        tenant_id: str,
+        session_id: Optional[str],
+        provider: str,
+        method: str,
+        path: str,
+        duration_minutes: Optional[float] = None,
+        always: bool = False,
+    ):
+        """Add a grant for duration_minutes, or a persistent tenant-wide one if always."""
+        if always:
+            expires_at = None
+            session_id = None
+        elif duration_minutes:
+            expires_at = time.time() + float(duration_minutes) * 60
+        else:
+            return
+
+        with self._lock:
+            self._purge_expired()
+            self._add(tenant_id, session_id, provider, method.upper(), path, expires_at)
+            if always:
+                self._save_rules()
+
+        logger.info(
+            f"Approval grant added: {tenant_id} {method} {provider}:{path}",
+            extra={"always": always, "duration_minutes": duration_minutes},
+        )
+
+    def _add(self, tenant_id, session_id, provider, method, path, expires_at):
+        """Index a grant (caller holds the lock, or is the constructor)."""
+        path = _normalize_path(path)
+        if any(c in path for c in "*?["):
+            key = (tenant_id, session_id, provider, method)
+            entries = [e for e in self._patterns.get(key, []) if e[1] != path]
+            entries.append((re.compile(fnmatch.translate(path)), path, expires_at))
+            self._patterns[key] = entries
+        else:
+            self._exact[(tenant_id, session_id, provider, method, path)] = expires_at
+
+    def is_granted(self, tenant_id: str, session_id: Optional[str], provider: str, method: str, path: str) -> bool:
+        """Check whether a live grant covers this request."""
+        now = time.time()
+        method = method.upper()
+        path = _normalize_path(path)
+
+        for scope in (session_id, None):
+            expires_at = self._exact.get((tenant_id, scope, provider, method, path), 0)
+            if expires_at is None or expires_at > now:
+                self._stats["hits"] += 1
+                return True
+
+        if self._patterns:
+            for scope in (session_id, None):
+                for regex, _, expires_at in self._patterns.get((tenant_id, scope, provider, method), ()):
+                    if (expires_at is None or expires_at > now) and regex.match(path):
+                        self._stats["hits"] += 1
+                        return True
+
+        self._stats["misses"] += 1
+        return False
+
+    def _purge_expired(self):
+        """Drop expired grants (caller holds the lock)."""
+        now = time.time()
+        for key in [k for k, expires_at in self._exact.items() if expires_at is not None and expires_at <= now]:
+            del self._exact[key]
+        for key, entries in list(self._patterns.items()):
+            live = [e for e in entries if e[2] is None or e[2] > now]
+            if live:
+                self._patterns[key] = live
+            else:
+                del self._patterns[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return grant counts and hit/miss statistics."""
+        stats = dict(self._stats)
+        stats["exact"] = len(self._exact)
+        stats["patterns"] = sum(len(entries) for entries in self._patterns.values())
+        return stats
@@ -0,0 +1,173 @@
+"""GraphQL operation classification for POSTed queries."""
+
+import os
+import json
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lexical tokens that matter for finding operation definitions. Strings,
+# block strings and comments are matched so their contents are skipped.
+_TOKEN = re.compile(
+    r'"""(?:\\"""|[^"]|"(?!""))*"""'    # block string
+    r'|"(?:\\.|[^"\\\n])*"'             # string
+    r"|#[^\n]*"                          # comment
+    r"|[_A-Za-z][_0-9A-Za-z]*"           # name
+    r"|[{}()]"                           # the punctuators we track
+    r"|[^\s,]"                           # anything else, one character at a time
+)
+
+_NAME = re.compile(r"[_A-Za-z][_0-9A-Za-z]*")
+
+OPERATION_TYPES = ("query", "mutation", "subscription")
+
+
+class GraphQLParseError(ValueError):
+    """The document is not GraphQL we can classify."""
+
+
+def parse_operations(document: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """List the (operation type, name) of each operation in a GraphQL document.
+
+    Only the top level is tokenized: keywords inside selection sets,
+    arguments, strings and comments are never taken for operation types.
+    Fragment definitions are skipped. An anonymous `{ ... }` is a query.
+    """
+    operations: List[Tuple[str, Optional[str]]] = []
+    depth = 0
+    pending: Optional[List[Any]] = None  # [type, name] until its selection set opens
+    expect_name = False
+    in_fragment = False
+
+    for match in _TOKEN.finditer(document):
+        token = match.group()
+        if token[0] == "#":
+            continue
+        if token[0] == '"':
+            if token == '"':
+                raise GraphQLParseError("unterminated string")
+            continue
+        if token in "({":
+            if depth == 0 and token == "{":
+                if pending is not None:
+                    operations.append((pending[0], pending[1]))
+                    pending = None
+                elif not in_fragment:
+                    operations.append(("query", None))
+                in_fragment = False
+            depth += 1
+            expect_name = False
+        elif token in ")}":
+            depth -= 1
+            if depth < 0:
+                raise GraphQLParseError("unbalanced brackets")
+        elif depth == 0:
+            if pending is not None:
+                # The name, if any, directly follows the keyword
+                if expect_name and _NAME.fullmatch(token):
+                    pending[1] = token
+                expect_name = False
+            elif token in OPERATION_TYPES:
+                pending = [token, None]
+                expect_name = True
+            elif token == "fragment":
+                in_fragment = True
+            elif not in_fragment:
+                raise GraphQLParseError(f"unexpected token {token!r}")
+
+    if depth != 0 or pending is not None:
+        raise GraphQLParseError("incomplete document")
+    if not operations:
+        raise GraphQLParseError("no operations")
+    return tuple(operations)
+
+
+class GraphQLClassifier:
+    """Classifies GraphQL request bodies as read (query) or write (mutation/subscription).
+
+    Parsed documents are cached in an LRU keyed by the sha256 of the query
+    text, so an agent repeating a query pays for a hash and a dict lookup,
+    not a parse. Anything that cannot be classified with certainty is left
+    to the caller's conservative default (None).
+    """
+
+    def __init__(self, cache_size: Optional[int] = None):
+        """Initialize classifier."""
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("GRAPHQL_CACHE_SIZE", "1024"))
+        self._cache: "OrderedDict[str, Optional[Tuple[Tuple[str, Optional[str]], ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "parse_errors": 0}
+
+    def operations(self, document: str) -> Optional[Tuple[Tuple[str, Optional[str]], ...]]:
+        """Parsed operations of a document (cached), or None if it does not parse."""
+        key = hashlib.sha256(document.encode()).hexdigest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._cache[key]
+            self._stats["misses"] += 1
+
+        try:
+            operations = parse_operations(document)
+        except GraphQLParseError as e:
+            logger.debug(f"Unclassifiable GraphQL document: {str(e)}")
+            self._stats["parse_errors"] += 1
+            operations = None
+
+        if self.cache_size:
+            with self._lock:
+                self._cache[key] = operations
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return operations
+
+    def classify(self, body: bytes) -> Optional[str]:
+        """Classify a GraphQL POST body as "read" or "write"; None if unknown.
+
+        Batched requests (a JSON array) are a read only if every entry is.
+        """
+        try:
+            payload = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+        requests = payload if isinstance(payload, list) else [payload]
+        if not requests:
+            return None
+
+        for entry in requests:
+            if not isinstance(entry, dict) or not isinstance(entry.get("query"), str):
+                return None
+            operations = self.operations(entry["query"])
+            if operations is None:
+                return None
+
+            name = entry.get("operationName")
+            if name:
+                selected = [op_type for op_type, op_name in operations if op_name == name]
+                if not selected:
+                    return None
+            else:
+                # Without operationName the server only accepts a single
+                # operation; be conservative if there are several.
+                selected = [op_type for op_type, _ in operations]
+
+            if any(op_type != "query" for op_type in selected):
+                return "write"
+
+        return "read"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache size and hit/miss statistics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,117 @@
+"""Parked proxied requests awaiting an asynchronous approval decision."""
+
+import os
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Optional, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PendingState(Enum):
+    """Lifecycle of a parked request."""
+    WAITING = "waiting"
+    EXECUTING = "executing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class PendingRequest:
+    """Everything needed to forward a proxied request later."""
+    gateway_req: Any
+    tenant_id: str
+    provider: str
+    cred_selector: Optional[str]
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+    execute_on_approval: bool = False
+    state: PendingState = PendingState.WAITING
+    result: Optional[Dict[str, Any]] = None
+    created_at: float = field(default_factory=time.time)
+
+    def release_body(self):
+        """Close the spooled body, if any."""
+        if self.body is not None and hasattr(self.body, "close"):
+            self.body.close()
+        self.body = None
+
+
+class PendingRequestStore:
+    """Holds parked requests by approval ID and runs approved ones in a small worker pool.
+
+    No thread is held while a human decides: requests sit here until the
+    approval callback (execute-on-approval) or the agent's resume call picks
+    them up.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize pending request store."""
+        self.max_workers = max_workers or int(os.getenv("APPROVAL_EXECUTOR_WORKERS", "4"))
+        self.pending: Dict[str, PendingRequest] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="approval-exec")
+
+    def add(self, approval_id: str, pending: PendingRequest) -> bool:
+        """Park a request under its approval ID; False if one is already parked there."""
+        with self._lock:
+            if approval_id in self.pending:
+                return False
+            self.pending[approval_id] = pending
+            return True
+
+    def get(self, approval_id: str) -> Optional[PendingRequest]:
+        """Look up a parked request."""
+        return self.pending.get(approval_id)
+
+    def take(self, approval_id: str) -> Optional[PendingRequest]:
+        """Claim a waiting request for execution (at most once)."""
+        with self._lock:
+            pending = self.pending.get(approval_id)
+            if pending is None or pending.state != PendingState.WAITING:
+                return None
+            pending.state = PendingState.EXECUTING
+            return pending
+
+    def remove(self, approval_id: str) -> Optional[PendingRequest]:
+        """Drop a parked request and release its body."""
+        with self._lock:
+            pending = self.pending.pop(approval_id, None)
+        if pending is not None:
+            pending.release_body()
+        return pending
+
+    def execute(self, approval_id: str, forward: Callable[[PendingRequest], Dict[str, Any]]) -> bool:
+        """Run a waiting request in the worker pool, storing its buffered result."""
+        pending = self.take(approval_id)
+        if pending is None:
+            return False
+
+        def run():
+            try:
+                pending.result = forward(pending)
+                pending.state = PendingState.COMPLETED
+                logger.info(f"Executed approved request: {approval_id}")
+            except Exception as e:
+                pending.result = {"error": str(e)}
+                pending.state = PendingState.FAILED
+                logger.error(f"Error executing approved request {approval_id}: {str(e)}")
+            finally:
+                pending.release_body()
+
+        self._executor.submit(run)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return counts of parked requests by state."""
+        with self._lock:
+            states = [pending.state.value for pending in self.pending.values()]
+        return {state.value: states.count(state.value) for state in PendingState}
+
+    def shutdown(self):
+        """Stop the worker pool."""
+        self._executor.shutdown(wait=False)
@@ -1,11 +1,24 @@
 """Policy engine for classifying and gating requests."""
 
 import os
+import re
 import json
+import fnmatch
 import logging
-from typing import Dict, Optional, Any
+import threading
+import time
+from typing import Dict, Optional, Any, List, Tuple, Pattern, Iterable
+from collections import OrderedDict
 from enum import Enum
 
+from gatewayd.cli_classifier import get_classifier
+from gatewayd.graphql import GraphQLClassifier
+
+try:
+    import inotify_simple
+except ImportError:  # optional; PolicyWatcher falls back to mtime polling
+    inotify_simple = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,30 +28,378 @@ class SecurityMode(Enum):
     CAUTIOUS = "cautious"
 
 
+class CompiledPolicy:
+    """A tenant policy compiled into a provider -> method -> regex index.
+
+    Each (provider, method) bucket holds one combined regex of every path
+    pattern that applies to it, with a named group per exception, so a
+    lookup is at most four bucket probes (exact and wildcard provider and
+    method) and one regex match each, instead of an fnmatch per pattern.
+    """
+
+    def __init__(self, policy: Dict[str, Any]):
+        """Compile a tenant policy."""
+        self.mode = policy.get("mode", "strict")
+        self.rule_ids: List[str] = []
+        # provider|None -> method|None -> (combined regex or None, index of first match-all rule or None)
+        self.index: Dict[Optional[str], Dict[Optional[str], Tuple[Optional[Pattern], Optional[int]]]] = {}
+
+        buckets: Dict[Tuple[Optional[str], Optional[str]], List[Tuple[int, List[str]]]] = {}
+        for i, exception in enumerate(policy.get("exceptions", [])):
+            self.rule_ids.append(exception.get("id") or f"exception[{i}]")
+            provider = exception.get("provider") or None
+            for method in exception.get("methods") or [None]:
+                buckets.setdefault((provider, method), []).append((i, exception.get("paths") or []))
+
+        for (provider, method), rules in buckets.items():
+            # An exception without paths matches every path
+            match_all = next((i for i, paths in rules if not paths), None)
+            alternatives = [
+                f"(?P<r{i}>{'|'.join(fnmatch.translate(p) for p in paths)})"
+                for i, paths in rules
+                if paths and (match_all is None or i < match_all)
+            ]
+            regex = re.compile("|".join(alternatives)) if alternatives else None
+            self.index.setdefault(provider, {})[method] = (regex, match_all)
+
+    def match(self, provider: str, method: str, path: str) -> Optional[str]:
+        """Return the ID of the first exception (in policy order) matching the request."""
+        best = None
+        for by_method in (self.index.get(provider), self.index.get(None)):
+            if not by_method:
+                continue
+            for bucket in (by_method.get(method), by_method.get(None)):
+                if bucket is None:
+                    continue
+                regex, match_all = bucket
+                if regex is not None:
+                    m = regex.match(path)
+                    if m is not None:
+                        i = int(m.lastgroup[1:])
+                        best = i if best is None else min(best, i)
+                        continue
+                if match_all is not None:
+                    best = match_all if best is None else min(best, match_all)
+
+        return None if best is None else self.rule_ids[best]
+
+
+# Methods the gateway classifies as reads (never gated)
+READ_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+
+# Provider endpoints that take GraphQL documents over POST (fnmatch patterns).
+# Linear's base URL already is its GraphQL endpoint.
+GRAPHQL_ENDPOINTS: Dict[str, List[str]] = {
+    "github": ["/graphql"],
+    "linear": ["/", "/graphql"],
+}
+
+
+# POST endpoints that only read. Slack Web API methods are listed by name and
+# accepted with or without the "/api" prefix; anything not listed stays a write.
+READ_POST_ENDPOINTS: Dict[str, List[str]] = {
+    "slack": [
+        "auth.test",
+        "bookmarks.list",
+        "bots.info",
+        "conversations.history",
+        "conversations.info",
+        "conversations.list",
+        "conversations.members",
+        "conversations.replies",
+        "dnd.info",
+        "emoji.list",
+        "files.info",
+        "files.list",
+        "pins.list",
+        "reactions.get",
+        "reactions.list",
+        "reminders.info",
+        "reminders.list",
+        "search.all",
+        "search.files",
+        "search.messages",
+        "team.info",
+        "team.profile.get",
+        "usergroups.list",
+        "usergroups.users.list",
+        "users.conversations",
+        "users.getPresence",
+        "users.info",
+        "users.list",
+        "users.lookupByEmail",
+        "users.profile.get",
+    ],
+    "datadog": [
+        "/api/v1/query",
+        "/api/v1/logs-queries/list",
+        "/api/v2/query/timeseries",
+        "/api/v2/query/scalar",
+        "/api/v2/logs/events/search",
+        "/api/v2/logs/analytics/aggregate",
+        "/api/v2/spans/events/search",
+        "/api/v2/spans/analytics/aggregate",
+        "/api/v2/rum/events/search",
+        "/api/v2/rum/analytics/aggregate",
+        "/api/v2/events/search",
+        "/api/v2/audit/events/search",
+        "/api/v2/ci/pipelines/events/search",
+        "/api/v2/ci/tests/events/search",
+        "/api/v2/security_monitoring/signals/search",
+    ],
+}
+
+
+def normalize_policy_path(path: str) -> str:
+    """Canonical form of a request path for matching and caching: one leading slash, no query."""
+    path = path.split("?", 1)[0].split("#", 1)[0]
+    return "/" + path.lstrip("/")
+
+
+class DecisionCache:
+    """Bounded LRU of approval decisions, tagged with the policy version they came from.
+
+    A lookup under a newer version clears the cache first, so a policy
+    reload invalidates every cached decision at once.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """Initialize decision cache (max_entries=0 disables it)."""
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("POLICY_CACHE_SIZE", "4096"))
+        self.version: Optional[int] = None
+        self._entries: "OrderedDict[Tuple[str, str, str, str], bool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _check_version(self, version: int) -> bool:
+        """Drop every entry if the policy version moved forward; False for a stale version (caller holds the lock)."""
+        if self.version is not None and version < self.version:
+            return False
+        if version != self.version:
+            if self._entries:
+                self._entries.clear()
+                self._stats["invalidations"] += 1
+            self.version = version
+        return True
+
+    def get(self, version: int, key: Tuple[str, str, str, str]) -> Optional[bool]:
+        """Cached decision for key under this policy version, or None."""
+        if not self.max_entries:
+            return None
+        with self._lock:
+            decision = self._entries.get(key) if self._check_version(version) else None
+            if decision is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return decision
+
+    def put(self, version: int, key: Tuple[str, str, str, str], decision: bool):
+        """Cache a decision computed under this policy version."""
+        if not self.max_entries:
+            return
+        with self._lock:
+            if not self._check_version(version):
+                return
+            self._entries[key] = decision
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss statistics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        return stats
+
+
+class PolicySnapshot:
+    """One fully parsed and compiled version of every tenant policy.
+
+    Snapshots are built off to the side and published by a single reference
+    assignment, so request threads read either the old or the new version,
+    never a half-loaded one, and take no lock to do so.
+    """
+
+    def __init__(self, version: int, tenant_policies: Dict[str, Dict[str, Any]]):
+        """Compile every tenant policy."""
+        self.version = version
+        self.tenant_policies = tenant_policies
+        self.compiled_policies: Dict[str, CompiledPolicy] = {
+            tenant_id: CompiledPolicy(policy)
+            for tenant_id, policy in tenant_policies.items()
+        }
+        self.compiled_policies.setdefault("default", CompiledPolicy({"mode": "strict", "exceptions": []}))
+        self.loaded_at = time.time()
+
+    def policy_for(self, tenant_id: str) -> CompiledPolicy:
+        """Compiled policy for a tenant, falling back to default."""
+        compiled = self.compiled_policies.get(tenant_id)
+        if compiled is None:
+            compiled = self.compiled_policies["default"]
+        return compiled
+
+
 class PolicyEngine:
     """Classifies requests and determines if approval is required."""
 
-    def __init__(self, config_path: Optional[str] = None):
+    # Distinct requests remembered per evaluate_batch() call before the memo is reset
+    BATCH_MEMO_SIZE = 100000
+
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        policy_file: Optional[str] = None,
+    ):
         """Initialize policy engine."""
         self.config_path = config_path or os.getenv("GATEWAY_CONFIG_PATH", "config/gateway.yaml")
-        self.tenant_policies: Dict[str, Dict[str, Any]] = {}
-        self._load_policies()
+        self.policy_file = policy_file or os.getenv("POLICY_CONFIG_FILE", "config/policies.json")
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[PolicyWatcher] = None
+        self._reload_stats: Dict[str, Any] = {
+            "reloads": 0,
+            "errors": 0,
+            "last_error": None,
+            "last_reload_ms": None,
+        }
+        self._snapshot = PolicySnapshot(1, self._load_policies())
+        self.decision_cache = DecisionCache(cache_size)
+        self.graphql = GraphQLClassifier()
+        self.max_inspect_bytes = int(os.getenv("POLICY_MAX_INSPECT_BYTES", "1048576"))
+        self._read_post_endpoints = self._compile_read_post_endpoints(READ_POST_ENDPOINTS)
+        self._graphql_endpoints: Dict[str, Pattern] = {
+            provider: re.compile("|".join(fnmatch.translate(p) for p in patterns))
+            for provider, patterns in GRAPHQL_ENDPOINTS.items()
+        }
+
+    @property
+    def tenant_policies(self) -> Dict[str, Dict[str, Any]]:
+        """Raw tenant policies of the current snapshot."""
+        return self._snapshot.tenant_policies
+
+    @property
+    def compiled_policies(self) -> Dict[str, CompiledPolicy]:
+        """Compiled tenant policies of the current snapshot."""
+        return self._snapshot.compiled_policies
 
-    def _load_policies(self):
+    @property
+    def version(self) -> int:
+        """Version of the current policy snapshot (bumped on every reload)."""
+        return self._snapshot.version
+
+    def _load_policies(self) -> Dict[str, Dict[str, Any]]:
         """Load tenant policies from config."""
-        config_file = os.getenv("POLICY_CONFIG_FILE", "config/policies.json")
+        config_file = self.policy_file
         if os.path.exists(config_file):
             with open(config_file) as f:
-                self.tenant_policies = json.load(f)
+                tenant_policies = json.load(f)
             logger.info(f"Loaded policies from {config_file}")
-        else:
-            # Default policy: Strict mode for all tenants
-            self.tenant_policies = {
-                "default": {
-                    "mode": "strict",
-                    "exceptions": [],
-                }
+            return tenant_policies
+
+        # Default policy: Strict mode for all tenants
+        return {
+            "default": {
+                "mode": "strict",
+                "exceptions": [],
             }
+        }
+
+    def reload_policies(self) -> bool:
+        """Re-read and recompile policies, then swap them in atomically.
+
+        On a parse or compile error the current snapshot stays in place and
+        the error is recorded in get_stats().
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            try:
+                snapshot = PolicySnapshot(self._snapshot.version + 1, self._load_policies())
+            except Exception as e:
+                self._reload_stats["errors"] += 1
+                self._reload_stats["last_error"] = f"{type(e).__name__}: {e}"
+                logger.error(f"Policy reload failed, keeping version {self._snapshot.version}: {str(e)}")
+                return False
+
+            # Single reference assignment: the atomic swap
+            self._snapshot = snapshot
+            self._reload_stats["reloads"] += 1
+            self._reload_stats["last_error"] = None
+            self._reload_stats["last_reload_ms"] = (time.perf_counter() - started) * 1000
+
+        logger.info(f"Policies reloaded: version {snapshot.version}")
+        return True
+
+    def start_watcher(self, interval: Optional[float] = None):
+        """Watch the policy file and reload it in the background when it changes."""
+        if self._watcher is None:
+            self._watcher = PolicyWatcher(self, interval)
+            self._watcher.start()
+
+    def stop_watcher(self):
+        """Stop the policy file watcher."""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return policy version and reload statistics."""
+        snapshot = self._snapshot
+        stats = dict(self._reload_stats)
+        stats.update({
+            "version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "tenants": len(snapshot.tenant_policies),
+            "watcher": self._watcher.mode if self._watcher else None,
+            "decision_cache": self.decision_cache.get_stats(),
+            "graphql": self.graphql.get_stats(),
+        })
+        return stats
+
+    @staticmethod
+    def _compile_read_post_endpoints(table: Dict[str, List[str]]) -> Dict[str, frozenset]:
+        """Normalize the read-POST table into per-provider path sets."""
+        compiled = {}
+        for provider, endpoints in table.items():
+            paths = set()
+            for endpoint in endpoints:
+                path = normalize_policy_path(endpoint)
+                paths.add(path)
+                if provider == "slack":
+                    paths.add(f"/api{path}")
+            compiled[provider] = frozenset(paths)
+        return compiled
+
+    def inspects_body(self, provider: str, method: str, path: str) -> bool:
+        """Whether classify_http_request looks at the body of this request."""
+        if method.upper() != "POST":
+            return False
+        regex = self._graphql_endpoints.get(provider)
+        return regex is not None and regex.match(normalize_policy_path(path)) is not None
+
+    def classify_http_request(self, provider: str, method: str, path: str, body: Optional[bytes] = None) -> str:
+        """Classify an HTTP request as read or write.
+
+        GET/HEAD/OPTIONS are reads, as are POSTs to the provider read
+        endpoints in READ_POST_ENDPOINTS. A POST to a GraphQL endpoint is a
+        read when its body holds only queries; everything else is a write.
+        """
+        method = method.upper()
+        if method in READ_METHODS:
+            return "read"
+        if method == "POST" and normalize_policy_path(path) in self._read_post_endpoints.get(provider, ()):
+            return "read"
+        if body is not None and self.inspects_body(provider, method, path):
+            if self.graphql.classify(body) == "read":
+                return "read"
+        return "write"
 
     def requires_approval(
         self,
@@ -54,106 +415,185 @@ class PolicyEngine:
         if action_type.value == "read":
             return False
 
-        # Get tenant policy
-        policy = self.tenant_policies.get(tenant_id, self.tenant_policies.get("default"))
-        mode = policy.get("mode", "strict")
+        # One snapshot for the whole decision; its version tags the cache entry
+        snapshot = self._snapshot
+        path = normalize_policy_path(path)
+        key = (tenant_id, provider, method, path)
+        decision = self.decision_cache.get(snapshot.version, key)
+        if decision is None:
+            decision = self._decide(snapshot.policy_for(tenant_id), provider, method, path)
+            self.decision_cache.put(snapshot.version, key, decision)
+        return decision
 
+    def _decide(self, compiled: CompiledPolicy, provider: str, method: str, path: str) -> bool:
+        """Evaluate a write against a compiled tenant policy."""
         # In Strict mode, all writes require approval
-        if mode == "strict":
+        if compiled.mode == "strict":
             return True
 
         # In Cautious mode, check for exceptions
-        if mode == "cautious":
-            return not self._is_exception(provider, method, path, policy)
+        if compiled.mode == "cautious":
+            return compiled.match(provider, method, path) is None
 
         return True
 
-    def _is_exception(
-        self,
-        provider: str,
-        method: str,
-        path: str,
-        policy: Dict[str, Any],
-    ) -> bool:
-        """Check if request matches a cautious-mode exception."""
-        exceptions = policy.get("exceptions", [])
+    def _explain(self, compiled: CompiledPolicy, mode: str, provider: str, method: str, path: str) -> Tuple[bool, str]:
+        """Decide a write and name why: (requires_approval, rule id or "strict"/"no_exception")."""
+        if mode == "cautious":
+            rule_id = compiled.match(provider, method, path)
+            if rule_id is not None:
+                return False, rule_id
+            return True, "no_exception"
+        return True, "strict"
 
-        for exception in exceptions:
-            if self._matches_exception(provider, method, path, exception):
-                return True
+    def evaluate_batch(
+        self,
+        records: Iterable[Tuple],
+        mode: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Evaluate many (tenant_id, provider, method, path[, body]) records and tally the outcomes.
 
-        return False
+        Requests are classified as in production (classify_http_request), so
+        read-only POST endpoints are reads, and so are GraphQL POSTs whose
+        body holds only queries; without a body a GraphQL POST counts as a
+        write. Records that are not strings are counted as skipped.
+        All records are judged against one policy snapshot. Repeated requests
+        are decided once (memoized per batch), and everything else goes
+        straight to the compiled matchers, bypassing the live decision cache.
+        mode overrides every tenant's mode, to preview a strict -> cautious
+        switch.
+        """
+        snapshot = self._snapshot
+        memo: Dict[Tuple[str, str, str, str], Tuple[bool, str]] = {}
+        result: Dict[str, Any] = {
+            "requests": 0,
+            "reads": 0,
+            "writes": 0,
+            "approvals": 0,
+            "exempt": 0,
+            "skipped": 0,
+            "approvals_by_reason": {},
+            "exempt_by_rule": {},
+            "by_tenant": {},
+        }
+        approvals_by_reason = result["approvals_by_reason"]
+        exempt_by_rule = result["exempt_by_rule"]
+        by_tenant = result["by_tenant"]
 
-    def _matches_exception(
-        self,
-        provider: str,
-        method: str,
-        path: str,
-        exception: Dict[str, Any],
-    ) -> bool:
-        """Check if request matches an exception rule."""
-        exc_provider = exception.get("provider")
-        exc_methods = exception.get("methods", [])
-        exc_paths = exception.get("paths", [])
+        for record in records:
+            if len(record) not in (4, 5) or not all(isinstance(field, str) for field in record[:4]):
+                result["skipped"] += 1
+                continue
+            tenant_id, provider, method, path = record[:4]
+            body = record[4] if len(record) == 5 else None
+            if isinstance(body, str):
+                body = body.encode()
 
-        if exc_provider and exc_provider != provider:
-            return False
+            result["requests"] += 1
+            method = method.upper()
+            tenant = by_tenant.get(tenant_id)
+            if tenant is None:
+                tenant = by_tenant[tenant_id] = {"requests": 0, "writes": 0, "approvals": 0}
+            tenant["requests"] += 1
 
-        if exc_methods and method not in exc_methods:
-            return False
+            if self.classify_http_request(provider, method, path, body) == "read":
+                result["reads"] += 1
+                continue
 
-        if exc_paths:
-            for path_pattern in exc_paths:
-                if self._path_matches(path, path_pattern):
-                    return True
-            return False
+            result["writes"] += 1
+            tenant["writes"] += 1
+            key = (tenant_id, provider, method, normalize_policy_path(path))
+            outcome = memo.get(key)
+            if outcome is None:
+                if len(memo) >= self.BATCH_MEMO_SIZE:
+                    memo.clear()
+                compiled = snapshot.policy_for(tenant_id)
+                outcome = memo[key] = self._explain(compiled, mode or compiled.mode, provider, method, key[3])
 
-        return True
+            requires, reason = outcome
+            if requires:
+                result["approvals"] += 1
+                tenant["approvals"] += 1
+                approvals_by_reason[reason] = approvals_by_reason.get(reason, 0) + 1
+            else:
+                result["exempt"] += 1
+                exempt_by_rule[reason] = exempt_by_rule.get(reason, 0) + 1
 
-    def _path_matches(self, path: str, pattern: str) -> bool:
-        """Check if path matches pattern (supports wildcards)."""
-        import fnmatch
-        return fnmatch.fnmatch(path, pattern)
+        result["policy_version"] = snapshot.version
+        return result
 
     def classify_cli_command(self, provider: str, command: str) -> str:
         """Classify CLI command as read or write."""
-        # Based on DESIGN.md heuristics
-        command_lower = command.lower()
+        return get_classifier().classify_command_line(provider, command)
 
-        if provider == "aws":
-            if any(command_lower.startswith(p) for p in ["list", "describe", "get"]):
-                return "read"
-            return "write"
 
-        elif provider == "gcp":
-            if command_lower in ["list", "describe"]:
-                return "read"
-            if any(command_lower.startswith(p) for p in ["create", "delete", "update", "deploy", "set", "enable", "disable"]):
-                return "write"
-            return "read"
+class PolicyWatcher:
+    """Background watcher that reloads the policy file when it changes.
 
-        elif provider == "terraform":
-            if any(p in command_lower for p in ["apply", "destroy"]):
-                return "write"
-            return "read"
+    Uses inotify (via the optional inotify_simple package) on the file's
+    directory, so editor-style atomic replaces are seen; otherwise polls the
+    file's mtime, size and inode every `interval` seconds.
+    """
 
-        elif provider == "kubectl":
-            if any(p in command_lower for p in ["apply", "delete", "scale", "patch", "set image", "rollout restart"]):
-                return "write"
-            return "read"
+    def __init__(self, engine: PolicyEngine, interval: Optional[float] = None):
+        """Initialize policy watcher."""
+        self.engine = engine
+        self.path = os.path.abspath(engine.policy_file)
+        self.interval = interval if interval is not None else float(os.getenv("POLICY_RELOAD_INTERVAL", "2"))
+        self.mode = "inotify" if inotify_simple is not None else "poll"
+        self._stop = threading.Event()
+        # Baseline taken now, so edits made before the thread runs are not missed
+        self._last_signature = self._signature()
+        self._thread = threading.Thread(target=self._run, name="policy-watcher", daemon=True)
 
-        elif provider == "gh":
-            # GitHub mutations
-            mutating = ["create", "delete", "update", "edit", "merge", "close", "open", "fork"]
-            if any(m in command_lower for m in mutating):
-                return "write"
-            return "read"
+    def start(self):
+        """Start watching."""
+        self._thread.start()
 
-        elif provider == "curl":
-            # curl: non-GET is write
-            if any(method in command_lower for method in ["-X POST", "-X PUT", "-X PATCH", "-X DELETE", "-d "]):
-                return "write"
-            return "read"
+    def stop(self):
+        """Stop watching."""
+        self._stop.set()
+        self._thread.join()
 
-        # Default: conservative (treat as write)
-        return "write"
+    def _signature(self) -> Optional[Tuple[int, int, int]]:
+        """File identity and modification signature, or None if missing."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _run(self):
+        """Watch loop."""
+        if self.mode == "inotify":
+            try:
+                self._run_inotify()
+                return
+            except OSError as e:
+                logger.warning(f"inotify unavailable, polling policy file instead: {str(e)}")
+                self.mode = "poll"
+        self._run_poll()
+
+    def _run_poll(self):
+        """Poll the file signature."""
+        while not self._stop.wait(self.interval):
+            current = self._signature()
+            if current != self._last_signature and current is not None:
+                self._last_signature = current
+                self.engine.reload_policies()
+
+    def _run_inotify(self):
+        """Block on inotify events for the policy file's directory."""
+        watch_flags = inotify_simple.flags
+        name = os.path.basename(self.path)
+        with inotify_simple.INotify() as inotify:
+            inotify.add_watch(
+                os.path.dirname(self.path),
+                watch_flags.CLOSE_WRITE | watch_flags.MOVED_TO | watch_flags.CREATE,
+            )
+            if self._signature() != self._last_signature:
+                self.engine.reload_policies()
+            while not self._stop.is_set():
+                events = inotify.read(timeout=int(self.interval * 1000))
+                if any(event.name == name for event in events):
+                    self.engine.reload_policies()
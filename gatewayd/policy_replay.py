@@ -0,0 +1,104 @@
+"""Replay recorded requests through the policy engine to preview approval rates.
+
+Usage:
+    python -m gatewayd.policy_replay requests.jsonl [--policies FILE] [--mode cautious] [--json]
+
+Each input line is a JSON object with tenant_id (or tenant), provider,
+method and path, plus body (the request body as a string) for GraphQL
+POSTs so queries count as reads. Use "-" to read from stdin.
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Iterator, Optional, Tuple, Any, TextIO
+
+from gatewayd.policy import PolicyEngine
+
+
+def read_records(stream: TextIO, stats: Dict[str, int]) -> Iterator[Tuple[str, ...]]:
+    """Yield (tenant_id, provider, method, path[, body]) from a JSONL stream, counting bad lines."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            fields = (
+                record.get("tenant_id") or record["tenant"],
+                record.get("provider", "unknown"),
+                record["method"],
+                record["path"],
+            )
+            body = record.get("body")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            stats["skipped"] += 1
+            continue
+        if not all(isinstance(field, str) and field for field in fields) or not isinstance(body, (str, type(None))):
+            stats["skipped"] += 1
+            continue
+        yield fields + (body,) if body is not None else fields
+
+
+def replay(engine: PolicyEngine, stream: TextIO, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Evaluate every record in stream and add skipped-line and throughput figures."""
+    stats = {"skipped": 0}
+    started = time.perf_counter()
+    result = engine.evaluate_batch(read_records(stream, stats), mode=mode)
+    elapsed = time.perf_counter() - started
+
+    result["skipped"] += stats["skipped"]
+    result["elapsed_seconds"] = elapsed
+    result["requests_per_second"] = result["requests"] / elapsed if elapsed else 0.0
+    return result
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    """Human-readable summary of a replay."""
+    writes = result["writes"]
+    rate = result["approvals"] / writes if writes else 0.0
+    lines = [
+        f"Policy version {result['policy_version']}: {result['requests']} requests "
+        f"({result['reads']} reads, {writes} writes, {result['skipped']} skipped)",
+        f"Approvals: {result['approvals']} ({rate:.1%} of writes), exempt: {result['exempt']}",
+    ]
+    for reason, count in sorted(result["approvals_by_reason"].items(), key=lambda item: -item[1]):
+        lines.append(f"  approval  {reason:<30} {count}")
+    for rule_id, count in sorted(result["exempt_by_rule"].items(), key=lambda item: -item[1]):
+        lines.append(f"  exempt    {rule_id:<30} {count}")
+    for tenant_id, tenant in sorted(result["by_tenant"].items()):
+        lines.append(
+            f"  tenant    {tenant_id:<30} {tenant['approvals']}/{tenant['writes']} writes need approval"
+        )
+    lines.append(
+        f"Throughput: {result['requests_per_second']:.0f} requests/s ({result['elapsed_seconds']:.2f}s)"
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    """Policy replay entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m gatewayd.policy_replay",
+        description="Replay JSONL request records through the policy engine.",
+    )
+    parser.add_argument("input", help='JSONL file of requests, or "-" for stdin')
+    parser.add_argument("--policies", help="Policy file to evaluate (default: POLICY_CONFIG_FILE)")
+    parser.add_argument("--mode", choices=["strict", "cautious"], help="Override every tenant's mode")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args(argv)
+
+    engine = PolicyEngine(policy_file=args.policies, cache_size=0)
+    if args.input == "-":
+        result = replay(engine, sys.stdin, mode=args.mode)
+    else:
+        with open(args.input) as f:
+            result = replay(engine, f, mode=args.mode)
+
+    print(json.dumps(result, indent=2) if args.json else format_report(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
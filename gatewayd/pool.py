@@ -0,0 +1,300 @@
+"""Pooled keep-alive upstream sessions for the HTTP proxy."""
+
+import asyncio
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Optional, Any, Tuple, AsyncIterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # optional: only the ASGI serving mode uses it
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+def _no_cookie_policy() -> DefaultCookiePolicy:
+    """A cookie policy that never stores or sends cookies.
+
+    Pooled clients are shared across tenants and credentials, so an upstream
+    Set-Cookie from one request must not be replayed on the next. An empty
+    allowed_domains list refuses every cookie on both set and return.
+    """
+    return DefaultCookiePolicy(allowed_domains=[])
+
+
+class UpstreamSessionPool:
+    """Keeps one keep-alive requests.Session per provider base URL (and optionally per tenant).
+
+    Each session mounts an HTTPAdapter backed by urllib3 connection pools, so
+    repeated calls to the same upstream reuse TCP/TLS connections instead of
+    handshaking on every proxied request. A background sweeper closes
+    sessions (and their keep-alive sockets) once idle_timeout passes without
+    use, including upstreams that are never called again.
+    """
+
+    def __init__(
+        self,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None,
+        pool_block: Optional[bool] = None,
+        idle_timeout: Optional[float] = None,
+        max_sessions: Optional[int] = None,
+        per_tenant: Optional[bool] = None,
+    ):
+        """Initialize session pool from arguments or environment."""
+        self.pool_connections = pool_connections or int(os.getenv("PROXY_POOL_CONNECTIONS", "10"))
+        self.pool_maxsize = pool_maxsize or int(os.getenv("PROXY_POOL_MAXSIZE", "20"))
+        if pool_block is None:
+            pool_block = os.getenv("PROXY_POOL_BLOCK", "false").lower() == "true"
+        self.pool_block = pool_block
+        self.idle_timeout = idle_timeout if idle_timeout is not None else float(os.getenv("PROXY_POOL_IDLE_TIMEOUT", "300"))
+        self.max_sessions = max_sessions or int(os.getenv("PROXY_POOL_MAX_SESSIONS", "64"))
+        if per_tenant is None:
+            per_tenant = os.getenv("PROXY_POOL_PER_TENANT", "false").lower() == "true"
+        self.per_tenant = per_tenant
+
+        # key -> (session, last_used); ordered least- to most-recently used
+        self._sessions: "OrderedDict[Tuple[str, Optional[str]], Tuple[requests.Session, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "idle_evictions": 0,
+            "capacity_evictions": 0,
+        }
+        self._sweeper: Optional[threading.Thread] = None
+        self._stopping = False
+        self._wakeup = threading.Event()
+
+    def get_session(self, base_url: str, tenant_id: Optional[str] = None) -> requests.Session:
+        """Return a pooled session for an upstream base URL."""
+        key = (base_url, tenant_id if self.per_tenant else None)
+        now = time.monotonic()
+        stale = []
+
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None and now - entry[1] > self.idle_timeout:
+                stale.append(self._sessions.pop(key)[0])
+                self._stats["idle_evictions"] += 1
+                entry = None
+
+            if entry is not None:
+                session = entry[0]
+                self._stats["hits"] += 1
+            else:
+                session = self._create_session()
+                self._stats["misses"] += 1
+
+            self._sessions[key] = (session, now)
+            self._sessions.move_to_end(key)
+
+            while len(self._sessions) > self.max_sessions:
+                _, (evicted, _) = self._sessions.popitem(last=False)
+                stale.append(evicted)
+                self._stats["capacity_evictions"] += 1
+
+        # Close outside the lock; closing drains urllib3 pools
+        for evicted in stale:
+            evicted.close()
+
+        return session
+
+    def _create_session(self) -> requests.Session:
+        """Create a session with a sized connection pool adapter and no cookie persistence."""
+        session = requests.Session()
+        session.cookies.set_policy(_no_cookie_policy())
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def evict_idle(self) -> int:
+        """Close sessions that have been idle longer than idle_timeout."""
+        now = time.monotonic()
+        stale = []
+
+        with self._lock:
+            for key, (session, last_used) in list(self._sessions.items()):
+                if now - last_used > self.idle_timeout:
+                    del self._sessions[key]
+                    stale.append(session)
+            self._stats["idle_evictions"] += len(stale)
+
+        for session in stale:
+            session.close()
+
+        return len(stale)
+
+    def start_sweeper(self):
+        """Start the background thread that closes idle sessions."""
+        if self._sweeper is not None:
+            return
+
+        self._stopping = False
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="pool-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweeper thread."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self):
+        """Sleep until the least recently used session goes idle, then evict."""
+        while not self._stopping:
+            self._wakeup.clear()
+            with self._lock:
+                oldest = next(iter(self._sessions.values()), None)
+            # Sessions created later go idle later, so they need no wakeup
+            timeout = self.idle_timeout if oldest is None else oldest[1] + self.idle_timeout - time.monotonic()
+            self._wakeup.wait(max(timeout, 0.01))
+            if self._stopping:
+                return
+
+            try:
+                evicted = self.evict_idle()
+                if evicted:
+                    logger.debug(f"Closed {evicted} idle upstream sessions")
+            except Exception as e:
+                logger.error(f"Upstream pool sweep failed: {str(e)}")
+
+    def close(self):
+        """Close every pooled session."""
+        with self._lock:
+            sessions = [session for session, _ in self._sessions.values()]
+            self._sessions.clear()
+
+        for session in sessions:
+            session.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return pool hit/miss statistics and configuration."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["sessions"] = len(self._sessions)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["config"] = {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "pool_block": self.pool_block,
+            "idle_timeout": self.idle_timeout,
+            "max_sessions": self.max_sessions,
+            "per_tenant": self.per_tenant,
+        }
+        return stats
+
+
+async def _aiter_file(fileobj, chunk_size: int) -> AsyncIterator[bytes]:
+    """Read a file-like request body in chunks for the async client.
+
+    Spooled bodies may have spilled to disk, so each read runs in a worker
+    thread rather than on the event loop.
+    """
+    while True:
+        chunk = await asyncio.to_thread(fileobj.read, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class AsyncUpstreamPool:
+    """Pooled keep-alive upstream connections for asyncio callers.
+
+    Wraps one httpx.AsyncClient, whose connection pool is shared by every
+    upstream host, so thousands of concurrent calls cost coroutines rather
+    than threads. The client is created on first use inside the running
+    event loop. httpx is optional: without it, available is False and the
+    proxy falls back to the threaded UpstreamSessionPool.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+    ):
+        """Initialize async pool from arguments or environment."""
+        self.max_connections = max_connections or int(os.getenv("PROXY_ASYNC_MAX_CONNECTIONS", "500"))
+        self.max_keepalive = max_keepalive or int(os.getenv("PROXY_ASYNC_MAX_KEEPALIVE", "100"))
+        self.idle_timeout = idle_timeout if idle_timeout is not None else float(os.getenv("PROXY_POOL_IDLE_TIMEOUT", "300"))
+        self._client = None
+        self._stats = {"requests": 0, "clients": 0}
+
+    @property
+    def available(self) -> bool:
+        """Whether an async HTTP client is installed."""
+        return httpx is not None
+
+    def _get_client(self):
+        """The shared AsyncClient, created in the running loop on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.idle_timeout,
+                ),
+                # Match requests, which follows redirects by default
+                follow_redirects=True,
+                # Shared by every tenant: never carry cookies between requests
+                cookies=CookieJar(policy=_no_cookie_policy()),
+            )
+            self._stats["clients"] += 1
+        return self._client
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        data: Any,
+        timeout: float,
+        chunk_size: int,
+    ):
+        """Send a request and return the httpx response with its body still unread."""
+        headers = dict(headers)
+        content = data
+        if data is not None and hasattr(data, "read"):
+            # Spooled bodies: sized upload, read in chunks
+            headers["Content-Length"] = str(len(data))
+            content = _aiter_file(data, chunk_size)
+
+        client = self._get_client()
+        self._stats["requests"] += 1
+        request = client.build_request(method, url, headers=headers, content=content, timeout=timeout)
+        return await client.send(request, stream=True)
+
+    async def aclose(self):
+        """Close the client and its connections."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return request counts and configuration."""
+        stats = dict(self._stats)
+        stats["available"] = self.available
+        stats["config"] = {
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            "idle_timeout": self.idle_timeout,
+        }
+        return stats
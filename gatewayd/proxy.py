@@ -1,20 +1,198 @@
 """HTTP forward proxy implementation."""
 
+import os
+import asyncio
 import logging
+import json
+import hashlib
+import tempfile
+import time
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator, AsyncIterator, BinaryIO, Union, Tuple
 from urllib.parse import urljoin
 
+from .cache import ResponseCache, CachedResponse
+from .coalesce import SingleFlight
+from .pool import UpstreamSessionPool, AsyncUpstreamPool
+from .ratelimit import RateLimiter, retry_after_header
+from .resilience import UpstreamHealth
+
 logger = logging.getLogger(__name__)
 
 
+class StreamingBody:
+    """Iterator over an upstream body in bounded chunks.
+
+    close() releases the upstream connection back to its pool, whether or not
+    iteration ever started (a generator's finally block would not run if the
+    agent disconnects before the first chunk).
+    """
+
+    def __init__(self, response: requests.Response, chunk_size: int):
+        """Initialize streaming body."""
+        self.response = response
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        """Release the upstream connection."""
+        self.response.close()
+
+
+class AsyncStreamingBody:
+    """Async iterator over an httpx streamed response in bounded chunks (see StreamingBody)."""
+
+    def __init__(self, response, chunk_size: int):
+        """Initialize async streaming body."""
+        self.response = response
+        self.chunk_size = chunk_size
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self.response.aiter_bytes(chunk_size=self.chunk_size):
+                if chunk:
+                    yield chunk
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        """Release the upstream connection."""
+        await self.response.aclose()
+
+
+class RequestBody:
+    """File-like request body of known length, read by the upstream client in chunks.
+
+    requests sizes the upload from __len__ and sends it with Content-Length,
+    reading blocks from the underlying file instead of loading it whole.
+    """
+
+    def __init__(self, fileobj: BinaryIO, length: int, digest: Optional[str] = None):
+        """Initialize request body."""
+        self.fileobj = fileobj
+        self.length = length
+        # SHA-256 of the content, when it was read through the gateway (spooled)
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes."""
+        return self.fileobj.read(size)
+
+    def rewind(self):
+        """Seek back to the start (spooled bodies only)."""
+        self.fileobj.seek(0)
+
+    def close(self):
+        """Close the underlying file."""
+        self.fileobj.close()
+
+
+class UpstreamCall:
+    """A prepared upstream request and the cache and quota state it was prepared with."""
+
+    __slots__ = ("method", "url", "base_url", "headers", "provider", "tenant_id", "quota_key", "cache_key", "cached")
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        base_url: str,
+        headers: Dict[str, str],
+        provider: str,
+        tenant_id: Optional[str],
+        quota_key: tuple,
+        cache_key: Optional[tuple],
+        cached: Optional[CachedResponse],
+    ):
+        self.method = method
+        self.url = url
+        self.base_url = base_url
+        self.headers = headers
+        self.provider = provider
+        self.tenant_id = tenant_id
+        self.quota_key = quota_key
+        self.cache_key = cache_key
+        self.cached = cached
+
+
 class HTTPProxy:
     """HTTP forward proxy that intercepts, classifies, and forwards requests."""
 
-    def __init__(self, credential_broker, policy_engine):
+    ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+    # Never returned to agents
+    SENSITIVE_RESPONSE_HEADERS = {"authorization", "x-api-key", "cookie"}
+
+    # Gateway-specific request headers, never forwarded upstream
+    GATEWAY_REQUEST_HEADERS = {"x-creds", "x-provider", "authorization"}
+
+    HOP_BY_HOP_HEADERS = {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    }
+
+    # Recomputed by requests from the forwarded body
+    REQUEST_FRAMING_HEADERS = {"host", "content-length"}
+
+    # No longer describe the body once requests has decoded it
+    # (iter_content/content decompress)
+    RESPONSE_FRAMING_HEADERS = {"content-encoding", "content-length"}
+
+    # Methods that never invalidate cached responses and may be coalesced
+    SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+    # Request headers that change the upstream response, so coalesced reads
+    # must agree on them
+    COALESCE_VARY_HEADERS = {
+        "accept",
+        "accept-language",
+        "range",
+        "if-none-match",
+        "if-modified-since",
+        "if-match",
+        "if-unmodified-since",
+    }
+
+    def __init__(
+        self,
+        credential_broker,
+        policy_engine,
+        session_pool: Optional[UpstreamSessionPool] = None,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        upstream_health: Optional[UpstreamHealth] = None,
+        async_pool: Optional[AsyncUpstreamPool] = None,
+    ):
         """Initialize HTTP proxy."""
         self.credential_broker = credential_broker
         self.policy_engine = policy_engine
+        self.session_pool = session_pool or UpstreamSessionPool()
+        self.response_cache = response_cache or ResponseCache()
+        self.single_flight = single_flight or SingleFlight()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.upstream_health = upstream_health or UpstreamHealth()
+        self.async_pool = async_pool or AsyncUpstreamPool()
+        self.stream_responses = os.getenv("PROXY_STREAM_RESPONSES", "false").lower() == "true"
+        self.stream_chunk_size = int(os.getenv("PROXY_STREAM_CHUNK_SIZE", "65536"))
+        self.spool_threshold = int(os.getenv("PROXY_SPOOL_THRESHOLD", str(1024 * 1024)))
+        self.spool_dir = os.getenv("PROXY_SPOOL_DIR") or None
         self.base_urls = {
             "github": "https://api.github.com",
             "aws": "https://aws.amazonaws.com",
@@ -29,61 +207,358 @@ class HTTPProxy:
         method: str,
         path: str,
         headers: Dict[str, str],
-        data: Optional[bytes],
+        data: Optional[Union[bytes, RequestBody, Iterator[bytes]]],
         credentials: Optional[Dict[str, Any]],
         provider: str,
+        tenant_id: Optional[str] = None,
+        stream: Optional[bool] = None,
+        cred_selector: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Forward request with credential injection."""
+        """Forward request with credential injection.
+
+        When streaming, "body" is an iterator of at most stream_chunk_size
+        byte chunks; the upstream connection is released once it is exhausted
+        or closed. GETs go through the response cache first (see
+        ResponseCache); the "X-Gate-Cache" header says how they were served.
+        Requests are paced against the credential's upstream quota (see
+        RateLimiter) and refused with a local 429 when it is exhausted.
+        Timeouts, circuit breaking and hedging are per provider (see
+        UpstreamHealth); an open circuit gives a local 503.
+        """
+        if stream is None:
+            stream = self.stream_responses
+
+        result, call = self._prepare(method, path, headers, credentials, provider, tenant_id, cred_selector)
+        if result is not None:
+            return result
+
+        def fetch() -> Dict[str, Any]:
+            return self._fetch(call, data, stream)
 
+        # Identical concurrent reads share one upstream call
+        if call.method in self.SAFE_METHODS and data is None and self.single_flight.enabled:
+            flight_key = (
+                tenant_id,
+                cred_selector,
+                call.method,
+                call.url,
+                stream,
+                tuple(sorted(
+                    (name.lower(), value)
+                    for name, value in call.headers.items()
+                    if name.lower() in self.COALESCE_VARY_HEADERS
+                )),
+            )
+            return self.single_flight.do(flight_key, fetch)
+        return fetch()
+
+    async def forward_request_async(
+        self,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        data: Optional[Union[bytes, RequestBody]],
+        credentials: Optional[Dict[str, Any]],
+        provider: str,
+        tenant_id: Optional[str] = None,
+        stream: Optional[bool] = None,
+        cred_selector: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """forward_request for asyncio callers.
+
+        With httpx installed the upstream call runs on the event loop over a
+        pooled AsyncClient, and a streamed "body" is an async iterator.
+        Cache, quota and circuit breaking apply as in forward_request;
+        coalescing and hedging do not. Without httpx, forward_request runs
+        in a worker thread.
+        """
+        if not self.async_pool.available:
+            return await asyncio.to_thread(
+                self.forward_request, method, path, headers, data, credentials, provider,
+                tenant_id, stream, cred_selector,
+            )
+
+        if stream is None:
+            stream = self.stream_responses
+
+        result, call = self._prepare(method, path, headers, credentials, provider, tenant_id, cred_selector)
+        if result is not None:
+            return result
+        return await self._fetch_async(call, data, stream)
+
+    def _prepare(
+        self,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        credentials: Optional[Dict[str, Any]],
+        provider: str,
+        tenant_id: Optional[str],
+        cred_selector: Optional[str],
+    ) -> Tuple[Optional[Dict[str, Any]], Optional["UpstreamCall"]]:
+        """Build the upstream call, or the result when the request is answered locally."""
         # Build full URL
         base_url = self.base_urls.get(provider, "https://api.example.com")
         url = urljoin(base_url, path)
 
         logger.debug(f"Forwarding {method} request to {url}")
 
-        # Prepare request headers
-        request_headers = dict(headers)
-        # Remove gateway-specific headers
-        request_headers.pop("X-Creds", None)
-        request_headers.pop("X-Provider", None)
-        request_headers.pop("Authorization", None)
+        # Prepare request headers (gateway-specific and framing headers removed)
+        request_headers = self._scrub_request_headers(headers)
 
         # Inject credentials if provided
         if credentials:
             request_headers.update(self._inject_credentials(credentials, provider))
 
-        # Make request
+        method = method.upper()
+        if method not in self.ALLOWED_METHODS:
+            return {"status_code": 405, "body": b"Method not allowed"}, None
+
+        # Serve fresh cached GETs; revalidate stale ones with their validators
+        cache = self.response_cache
+        cache_key = cache.key(tenant_id, cred_selector, url, headers) if method == "GET" else None
+        cached = cache.lookup(cache_key) if cache_key else None
+        if cached is not None:
+            if cached.is_fresh() and not cache.wants_revalidation(headers):
+                cache.record_hit()
+                return self._cached_result(cached, "HIT"), None
+            request_headers.update(cache.conditional_headers(cached))
+
+        call = UpstreamCall(
+            method, url, base_url, request_headers, provider, tenant_id,
+            self.rate_limiter.key(tenant_id, provider, cred_selector), cache_key, cached,
+        )
+        return None, call
+
+    def _fetch(
+        self,
+        call: "UpstreamCall",
+        data: Optional[Union[bytes, RequestBody, Iterator[bytes]]],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """Make the upstream call and apply its outcome to the response cache, quota and provider health."""
+        health = self.upstream_health
+
+        retry_after = self.rate_limiter.acquire(call.quota_key)
+        if retry_after:
+            logger.info(f"Upstream quota exhausted for {call.url}; retry in {retry_after:.0f}s")
+            return self._rate_limited_result(retry_after)
+
+        retry_in = health.check(call.provider)
+        if retry_in:
+            logger.info(f"Circuit open for {call.provider}; failing fast")
+            return self._unavailable_result(call.provider, retry_in)
+
+        # Make request over a pooled keep-alive session
+        session = self.session_pool.get_session(call.base_url, call.tenant_id)
+        timeout = health.timeout(call.provider)
+
+        def send() -> requests.Response:
+            return session.request(
+                call.method, call.url, headers=call.headers, data=data, timeout=timeout, stream=stream,
+            )
+
+        hedge_delay = health.hedge_delay(call.provider) if call.method in self.SAFE_METHODS and data is None else None
+        started = time.monotonic()
         try:
-            if method.upper() == "GET":
-                response = requests.get(url, headers=request_headers, timeout=30)
-            elif method.upper() == "POST":
-                response = requests.post(url, headers=request_headers, data=data, timeout=30)
-            elif method.upper() == "PUT":
-                response = requests.put(url, headers=request_headers, data=data, timeout=30)
-            elif method.upper() == "PATCH":
-                response = requests.patch(url, headers=request_headers, data=data, timeout=30)
-            elif method.upper() == "DELETE":
-                response = requests.delete(url, headers=request_headers, timeout=30)
-            elif method.upper() == "HEAD":
-                response = requests.head(url, headers=request_headers, timeout=30)
+            if hedge_delay is not None:
+                response = health.hedged(send, hedge_delay, discard=lambda r: r.close())
             else:
-                return {"status_code": 405, "body": b"Method not allowed"}
+                response = send()
+        except Exception as e:
+            health.record(call.provider, time.monotonic() - started, ok=False)
+            logger.error(f"Request failed: {str(e)}")
+            raise
+        except BaseException:
+            # Interrupted: says nothing about the upstream, but a half-open probe must not stay claimed
+            health.release(call.provider)
+            raise
+
+        health.record(call.provider, response.elapsed.total_seconds(), ok=response.status_code < 500)
+
+        revalidated = self._apply_response(call, response.status_code, response.headers)
+        if revalidated is not None:
+            response.close()
+            return revalidated
+
+        # Scrub sensitive data from response headers
+        response_headers = self._scrub_response_headers(response.headers)
+
+        if self._cacheable(call, response.status_code, response.headers, stream):
+            body = response.content
+            return self._store_result(call, response.status_code, response.headers, response_headers, body)
+
+        return {
+            "status_code": response.status_code,
+            "body": StreamingBody(response, self.stream_chunk_size) if stream else response.content,
+            "headers": response_headers,
+        }
+
+    async def _fetch_async(
+        self,
+        call: "UpstreamCall",
+        data: Optional[Union[bytes, RequestBody]],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """_fetch over the async client."""
+        health = self.upstream_health
 
-            # Scrub sensitive data from response headers
-            response_headers = dict(response.headers)
-            sensitive_headers = ["authorization", "x-api-key", "cookie"]
-            for header in sensitive_headers:
-                response_headers.pop(header, None)
+        delay, retry_after = self.rate_limiter.reserve(call.quota_key)
+        if retry_after:
+            logger.info(f"Upstream quota exhausted for {call.url}; retry in {retry_after:.0f}s")
+            return self._rate_limited_result(retry_after)
+        if delay:
+            await asyncio.sleep(delay)
 
-            return {
-                "status_code": response.status_code,
-                "body": response.content,
-                "headers": response_headers,
-            }
+        retry_in = health.check(call.provider)
+        if retry_in:
+            logger.info(f"Circuit open for {call.provider}; failing fast")
+            return self._unavailable_result(call.provider, retry_in)
 
-        except requests.exceptions.RequestException as e:
+        started = time.monotonic()
+        try:
+            response = await self.async_pool.send(
+                call.method, call.url, call.headers, data, health.timeout(call.provider), self.stream_chunk_size,
+            )
+        except Exception as e:
+            health.record(call.provider, time.monotonic() - started, ok=False)
             logger.error(f"Request failed: {str(e)}")
             raise
+        except BaseException:
+            # Cancelled (client went away): release a half-open probe so the breaker can try again
+            health.release(call.provider)
+            raise
+
+        health.record(call.provider, time.monotonic() - started, ok=response.status_code < 500)
+
+        revalidated = self._apply_response(call, response.status_code, response.headers)
+        if revalidated is not None:
+            await response.aclose()
+            return revalidated
+
+        response_headers = self._scrub_response_headers(response.headers)
+
+        if self._cacheable(call, response.status_code, response.headers, stream):
+            body = await response.aread()
+            return self._store_result(call, response.status_code, response.headers, response_headers, body)
+
+        if stream:
+            body = AsyncStreamingBody(response, self.stream_chunk_size)
+        else:
+            body = await response.aread()
+        return {"status_code": response.status_code, "body": body, "headers": response_headers}
+
+    def _apply_response(self, call: "UpstreamCall", status_code: int, headers) -> Optional[Dict[str, Any]]:
+        """Update quota and cache from an upstream response; the cached result if it was a 304."""
+        cache = self.response_cache
+        self.rate_limiter.observe(call.quota_key, status_code, headers)
+
+        if call.cached is not None:
+            if status_code == 304:
+                cache.refresh(call.cache_key, call.cached, headers)
+                return self._cached_result(call.cached, "REVALIDATED")
+            cache.record_changed()
+        elif call.method not in self.SAFE_METHODS and status_code < 400:
+            cache.invalidate(call.tenant_id, call.url)
+        return None
+
+    def _cacheable(self, call: "UpstreamCall", status_code: int, headers, stream: bool) -> bool:
+        """Whether to buffer a response for the cache (streams only when small enough)."""
+        if call.cache_key is None or status_code != 200:
+            return False
+        length = headers.get("Content-Length")
+        return not stream or (length is not None and length.isdigit() and int(length) <= self.response_cache.max_entry_bytes)
+
+    def _store_result(
+        self,
+        call: "UpstreamCall",
+        status_code: int,
+        upstream_headers,
+        response_headers: Dict[str, str],
+        body: bytes,
+    ) -> Dict[str, Any]:
+        """Store a buffered response in the cache and build its result."""
+        self.response_cache.store(call.cache_key, status_code, upstream_headers, response_headers, body)
+        response_headers["X-Gate-Cache"] = "MISS"
+        return {"status_code": status_code, "body": body, "headers": response_headers}
+
+    def _cached_result(self, entry: CachedResponse, outcome: str) -> Dict[str, Any]:
+        """Build a forward_request result from a cache entry."""
+        headers = dict(entry.headers)
+        headers["X-Gate-Cache"] = outcome
+        return {"status_code": entry.status_code, "body": entry.body, "headers": headers}
+
+    @staticmethod
+    def _rate_limited_result(retry_after: float) -> Dict[str, Any]:
+        """Local 429 for a request the upstream quota cannot take yet."""
+        seconds = retry_after_header(retry_after)
+        return {
+            "status_code": 429,
+            "body": json.dumps({"error": "Upstream rate limit exhausted", "retry_after": int(seconds)}).encode(),
+            "headers": {"Content-Type": "application/json", "Retry-After": seconds, "X-Gate-RateLimit": "local"},
+        }
+
+    @staticmethod
+    def _unavailable_result(provider: str, retry_in: float) -> Dict[str, Any]:
+        """Local 503 for a provider whose circuit is open."""
+        seconds = retry_after_header(retry_in)
+        return {
+            "status_code": 503,
+            "body": json.dumps({"error": f"Upstream {provider} unavailable", "retry_after": int(seconds)}).encode(),
+            "headers": {"Content-Type": "application/json", "Retry-After": seconds, "X-Gate-Circuit": "open"},
+        }
+
+    def stream_body(self, stream: BinaryIO, content_length: Optional[int]) -> Optional[Union[RequestBody, Iterator[bytes]]]:
+        """Pass an agent's request body through to the upstream without buffering it.
+
+        Bodies of known length are sent with Content-Length; bodies without
+        one (chunked uploads) are re-chunked from the input stream.
+        """
+        if content_length is not None:
+            return RequestBody(stream, content_length) if content_length else None
+        return iter(lambda: stream.read(self.stream_chunk_size), b"")
+
+    def spool_body(self, stream: BinaryIO) -> RequestBody:
+        """Drain an agent's request body into a spool that spills to disk above spool_threshold."""
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold, dir=self.spool_dir)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(self.stream_chunk_size), b""):
+            digest.update(chunk)
+            spool.write(chunk)
+        length = spool.tell()
+        spool.seek(0)
+        return RequestBody(spool, length, digest.hexdigest())
+
+    def _scrub_request_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
+        """Drop gateway, hop-by-hop and framing request headers (case-insensitive)."""
+        return {
+            name: value
+            for name, value in headers.items()
+            if name.lower() not in self.GATEWAY_REQUEST_HEADERS
+            and name.lower() not in self.HOP_BY_HOP_HEADERS
+            and name.lower() not in self.REQUEST_FRAMING_HEADERS
+        }
+
+    def _scrub_response_headers(self, headers) -> Dict[str, str]:
+        """Drop sensitive, hop-by-hop and framing response headers (case-insensitive)."""
+        return {
+            name: value
+            for name, value in headers.items()
+            if name.lower() not in self.SENSITIVE_RESPONSE_HEADERS
+            and name.lower() not in self.HOP_BY_HOP_HEADERS
+            and name.lower() not in self.RESPONSE_FRAMING_HEADERS
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return proxy statistics."""
+        return {
+            "pool": self.session_pool.get_stats(),
+            "cache": self.response_cache.get_stats(),
+            "coalesce": self.single_flight.get_stats(),
+            "ratelimit": self.rate_limiter.get_stats(),
+            "upstreams": self.upstream_health.get_stats(),
+            "async_pool": self.async_pool.get_stats(),
+        }
 
     def _inject_credentials(self, credentials: Dict[str, Any], provider: str) -> Dict[str, str]:
         """Inject credentials into request headers."""
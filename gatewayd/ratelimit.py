@@ -0,0 +1,209 @@
+"""Upstream rate-limit tracking and pacing per credential."""
+
+import os
+import math
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Any, Tuple, Mapping
+
+logger = logging.getLogger(__name__)
+
+# X-RateLimit-Reset values above this are epoch seconds (GitHub); below it,
+# seconds until the reset (Datadog)
+_EPOCH_THRESHOLD = 1_000_000_000
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    """Integer header value, or None if absent or malformed."""
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def parse_retry_after(value: Optional[str], now: float) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - now, 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After value for a wait, rounded up to whole seconds."""
+    return str(max(int(math.ceil(seconds)), 1))
+
+
+class QuotaState:
+    """Last known upstream quota for one credential."""
+
+    __slots__ = ("limit", "remaining", "reset_at", "blocked_until", "next_send_at", "updated_at")
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+        self.next_send_at = 0.0
+        self.updated_at = 0.0
+
+
+class RateLimiter:
+    """Tracks upstream quota per credential and paces requests to stay under it.
+
+    Quota is learned from the upstream's own X-RateLimit-Limit, -Remaining
+    and -Reset headers, and 429 (or 403 with Retry-After or no remaining
+    quota) responses block the credential until Retry-After or the reset.
+    Each request reserves one unit of the known remaining quota before it is
+    sent, so concurrent agents do not overshoot. Once less than pace_below
+    of the limit is left, requests are spaced evenly over the time to the
+    reset. A request that would have to wait longer than max_wait is refused
+    locally with the number of seconds until it could be sent.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        max_wait: Optional[float] = None,
+        pace_below: Optional[float] = None,
+        default_block: Optional[float] = None,
+    ):
+        """Initialize rate limiter from arguments or environment."""
+        if enabled is None:
+            enabled = os.getenv("PROXY_RATELIMIT_ENABLED", "true").lower() == "true"
+        self.enabled = enabled
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("PROXY_RATELIMIT_MAX_WAIT", "5"))
+        self.pace_below = pace_below if pace_below is not None else float(os.getenv("PROXY_RATELIMIT_PACE_BELOW", "0.1"))
+        # Block length when the upstream limits us without saying for how long
+        self.default_block = default_block if default_block is not None else float(
+            os.getenv("PROXY_RATELIMIT_DEFAULT_BLOCK", "60")
+        )
+
+        self._quotas: Dict[Tuple, QuotaState] = {}
+        self._lock = threading.Lock()
+        self._stats = {"delayed": 0, "rejected": 0, "upstream_limited": 0}
+
+    @staticmethod
+    def key(tenant_id: Optional[str], provider: str, cred_selector: Optional[str]) -> Tuple:
+        """Quota key for a request; unauthenticated calls share the gateway's own quota."""
+        if not cred_selector:
+            return (None, provider, None)
+        return (tenant_id, provider, cred_selector)
+
+    def acquire(self, key: Tuple) -> float:
+        """Reserve quota for one request, waiting up to max_wait for it.
+
+        Returns 0 when the request may be sent, or the seconds until it could
+        be when it must be refused.
+        """
+        delay, retry_after = self.reserve(key)
+        if retry_after:
+            return retry_after
+        if delay > 0:
+            time.sleep(delay)
+        return 0.0
+
+    def reserve(self, key: Tuple) -> Tuple[float, float]:
+        """Reserve quota for one request without waiting.
+
+        Returns (seconds to wait before sending, 0) when admitted, or
+        (0, seconds until it could be sent) when refused.
+        """
+        if not self.enabled:
+            return 0.0, 0.0
+
+        now = time.time()
+        with self._lock:
+            state = self._quotas.get(key)
+            if state is None:
+                return 0.0, 0.0
+
+            send_at = now
+            if state.blocked_until > now:
+                send_at = state.blocked_until
+            elif state.reset_at and now >= state.reset_at:
+                # The window rolled over; the next response tells us the new quota
+                state.remaining = None
+            elif state.remaining is not None:
+                if state.remaining <= 0:
+                    send_at = state.reset_at or now + self.default_block
+                elif state.limit and state.reset_at and state.remaining < state.limit * self.pace_below:
+                    interval = (state.reset_at - now) / state.remaining
+                    send_at = max(now, state.next_send_at)
+                    state.next_send_at = send_at + interval
+
+            wait = send_at - now
+            if wait > self.max_wait:
+                self._stats["rejected"] += 1
+                return 0.0, wait
+            if state.remaining is not None and state.remaining > 0:
+                state.remaining -= 1
+            if wait > 0:
+                self._stats["delayed"] += 1
+        return max(wait, 0.0), 0.0
+
+    def observe(self, key: Tuple, status_code: int, headers: Mapping[str, str]):
+        """Update a credential's quota from an upstream response."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        limit = _int_header(headers, "X-RateLimit-Limit")
+        remaining = _int_header(headers, "X-RateLimit-Remaining")
+        reset = _int_header(headers, "X-RateLimit-Reset")
+        retry_after = parse_retry_after(headers.get("Retry-After"), now)
+        limited = status_code == 429 or (status_code == 403 and (retry_after is not None or remaining == 0))
+
+        if limit is None and remaining is None and reset is None and not limited:
+            return
+
+        with self._lock:
+            state = self._quotas.get(key)
+            if state is None:
+                state = self._quotas[key] = QuotaState()
+            state.updated_at = now
+            if limit is not None:
+                state.limit = limit
+            if remaining is not None:
+                state.remaining = remaining
+            if reset is not None:
+                state.reset_at = float(reset) if reset > _EPOCH_THRESHOLD else now + reset
+            if limited:
+                self._stats["upstream_limited"] += 1
+                if retry_after is not None:
+                    state.blocked_until = now + retry_after
+                elif state.reset_at > now:
+                    state.blocked_until = state.reset_at
+                else:
+                    state.blocked_until = now + self.default_block
+
+        if limited:
+            logger.warning(f"Upstream rate limit hit for {key[1]} credential {key[2]}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return counters and per-credential quota gauges."""
+        now = time.time()
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            credentials = {}
+            for (tenant_id, provider, cred_selector), state in self._quotas.items():
+                name = "/".join(part or "-" for part in (tenant_id, provider, cred_selector))
+                credentials[name] = {
+                    "limit": state.limit,
+                    "remaining": state.remaining,
+                    "reset_in": max(state.reset_at - now, 0.0) if state.reset_at else None,
+                    "blocked_for": max(state.blocked_until - now, 0.0),
+                }
+        stats["credentials"] = credentials
+        stats["enabled"] = self.enabled
+        return stats
@@ -0,0 +1,257 @@
+"""Per-provider upstream health: adaptive timeouts, circuit breaking and hedged reads."""
+
+import bisect
+import os
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Optional, Any, Callable, Deque, List
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Sliding window of upstream latencies for one provider.
+
+    The window is also kept sorted, so recording a sample is a bisect
+    removal and insertion rather than a sort, and percentiles are an index.
+    """
+
+    def __init__(self, window: int):
+        """Initialize latency tracker."""
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._ordered: List[float] = []
+
+    def record(self, latency: float):
+        """Add a sample, dropping the oldest once the window is full (caller holds the lock)."""
+        if len(self.samples) == self.samples.maxlen:
+            del self._ordered[bisect.bisect_left(self._ordered, self.samples[0])]
+        self.samples.append(latency)
+        bisect.insort(self._ordered, latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Sample at fraction (0-1) of the sorted window, or None without samples."""
+        if not self._ordered:
+            return None
+        return self._ordered[int((len(self._ordered) - 1) * fraction)]
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    @property
+    def p99(self) -> Optional[float]:
+        return self.percentile(0.99)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one provider.
+
+    After failure_threshold consecutive failures the breaker opens and calls
+    fail fast for reset_timeout seconds. Then a single probe is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """Initialize circuit breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+
+    def check(self, now: float) -> float:
+        """0 if a call may go ahead, else seconds until one might (caller holds the lock)."""
+        if self.state == self.CLOSED:
+            return 0.0
+        if self.state == self.OPEN:
+            retry_in = self.opened_at + self.reset_timeout - now
+            if retry_in > 0:
+                return retry_in
+            self.state = self.HALF_OPEN
+        if self.probing:
+            return 1.0
+        self.probing = True
+        return 0.0
+
+    def record(self, ok: bool, now: float):
+        """Apply the outcome of a call (caller holds the lock)."""
+        if ok:
+            self.failures = 0
+            self.probing = False
+            self.state = self.CLOSED
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = now
+            self.probing = False
+
+    def release(self):
+        """Give up the half-open probe slot without an outcome (caller holds the lock)."""
+        self.probing = False
+
+
+class UpstreamHealth:
+    """Tracks each provider's latency and failures to size timeouts and isolate outages.
+
+    Timeouts follow the observed p99 (times timeout_multiplier, clamped to
+    [min_timeout, max_timeout]) once min_samples calls have been seen, so a
+    fast provider no longer holds a gateway thread for the full default when
+    it stalls. Connection errors, timeouts and 5xx responses feed a circuit
+    breaker per provider. With hedging enabled, an idempotent read still
+    pending after the provider's p95 is sent a second time and whichever
+    answer comes first is used.
+    """
+
+    def __init__(
+        self,
+        max_timeout: Optional[float] = None,
+        min_timeout: Optional[float] = None,
+        timeout_multiplier: Optional[float] = None,
+        window: Optional[int] = None,
+        min_samples: Optional[int] = None,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        hedge_enabled: Optional[bool] = None,
+        hedge_workers: Optional[int] = None,
+    ):
+        """Initialize upstream health tracking from arguments or environment."""
+        self.max_timeout = max_timeout or float(os.getenv("PROXY_UPSTREAM_TIMEOUT", "30"))
+        self.min_timeout = min_timeout or float(os.getenv("PROXY_MIN_TIMEOUT", "2"))
+        self.timeout_multiplier = timeout_multiplier or float(os.getenv("PROXY_TIMEOUT_MULTIPLIER", "4"))
+        self.window = window or int(os.getenv("PROXY_LATENCY_WINDOW", "200"))
+        self.min_samples = min_samples or int(os.getenv("PROXY_LATENCY_MIN_SAMPLES", "20"))
+        self.failure_threshold = failure_threshold or int(os.getenv("PROXY_BREAKER_FAILURES", "5"))
+        self.reset_timeout = reset_timeout or float(os.getenv("PROXY_BREAKER_RESET", "30"))
+        if hedge_enabled is None:
+            hedge_enabled = os.getenv("PROXY_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_enabled = hedge_enabled
+        self.hedge_workers = hedge_workers or int(os.getenv("PROXY_HEDGE_WORKERS", "16"))
+
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {"fast_failures": 0, "hedges": 0, "hedge_wins": 0}
+
+    def _provider(self, provider: str):
+        """Latency tracker and breaker for a provider (caller holds the lock)."""
+        tracker = self._latency.get(provider)
+        if tracker is None:
+            tracker = self._latency[provider] = LatencyTracker(self.window)
+            self._breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return tracker, self._breakers[provider]
+
+    def check(self, provider: str) -> float:
+        """0 if a call to provider may go ahead, else seconds until its breaker lets one through."""
+        with self._lock:
+            _, breaker = self._provider(provider)
+            retry_in = breaker.check(time.time())
+            if retry_in:
+                self._stats["fast_failures"] += 1
+            return retry_in
+
+    def record(self, provider: str, latency: float, ok: bool):
+        """Record a finished call's latency and whether the upstream was healthy."""
+        with self._lock:
+            tracker, breaker = self._provider(provider)
+            tracker.record(latency)
+            was_open = breaker.state == CircuitBreaker.OPEN
+            breaker.record(ok, time.time())
+            opened = not was_open and breaker.state == CircuitBreaker.OPEN
+        if opened:
+            logger.warning(f"Circuit opened for {provider} after {breaker.failures} failures")
+
+    def release(self, provider: str):
+        """A call that check() let through ended with no verdict on the upstream (cancelled)."""
+        with self._lock:
+            _, breaker = self._provider(provider)
+            breaker.release()
+
+    def timeout(self, provider: str) -> float:
+        """Upstream timeout for provider from its p99, or max_timeout until enough samples."""
+        with self._lock:
+            tracker = self._latency.get(provider)
+            if tracker is None or len(tracker.samples) < self.min_samples:
+                return self.max_timeout
+            return min(max(tracker.p99 * self.timeout_multiplier, self.min_timeout), self.max_timeout)
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds after which a read to provider is hedged, or None if it should not be."""
+        if not self.hedge_enabled:
+            return None
+        with self._lock:
+            tracker = self._latency.get(provider)
+            if tracker is None or len(tracker.samples) < self.min_samples:
+                return None
+            return tracker.p95
+
+    def hedged(self, call: Callable[[], Any], delay: float, discard: Callable[[Any], None]) -> Any:
+        """Run call, and run it again if it has not returned after delay; first success wins.
+
+        The losing result is handed to discard once it arrives (to release
+        its connection). If both attempts fail, the first error is raised.
+        """
+        executor = self._get_executor()
+        attempts: List[Future] = [executor.submit(call)]
+        done, _ = wait(attempts, timeout=delay)
+        if not done:
+            attempts.append(executor.submit(call))
+            with self._lock:
+                self._stats["hedges"] += 1
+
+        pending = set(attempts)
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    first_error = first_error or error
+                    continue
+                for other in pending:
+                    other.add_done_callback(lambda f: f.exception() is None and discard(f.result()))
+                if future is not attempts[0]:
+                    with self._lock:
+                        self._stats["hedge_wins"] += 1
+                return future.result()
+        raise first_error
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for hedged calls, created on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix="hedge")
+            return self._executor
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return per-provider latency percentiles, timeouts and breaker states."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            providers = {}
+            for provider, tracker in self._latency.items():
+                breaker = self._breakers[provider]
+                providers[provider] = {
+                    "samples": len(tracker.samples),
+                    "p95": tracker.p95,
+                    "p99": tracker.p99,
+                    "state": breaker.state,
+                    "consecutive_failures": breaker.failures,
+                    "trips": breaker.trips,
+                }
+        for provider, entry in providers.items():
+            entry["timeout"] = self.timeout(provider)
+        stats["providers"] = providers
+        stats["hedge_enabled"] = self.hedge_enabled
+        return stats
@@ -0,0 +1,147 @@
+"""Multi-process launcher: python -m gatewayd serve --workers N --threads M."""
+
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from werkzeug.serving import BaseWSGIServer
+
+logger = logging.getLogger(__name__)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that handles requests on a fixed pool of threads.
+
+    Unlike the development server's thread-per-request, concurrency per
+    worker process is capped at `threads`; further connections queue in
+    the listen backlog. Requests waiting for a sync-mode approval hold a
+    thread, so size the pool for them or use APPROVAL_MODE=async.
+    """
+
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, threads: int, fd: Optional[int] = None):
+        """Initialize server on an existing listening socket (fd) or a new one."""
+        super().__init__(host, port, app, fd=fd)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="http")
+
+    def process_request(self, request, client_address):
+        """Hand the connection to the pool instead of handling it inline."""
+        self.executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        """Run one connection on a pool thread."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def _listen(host: str, port: int) -> socket.socket:
+    """Bind the listening socket every worker accepts from."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(socket.SOMAXCONN)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, host: str, port: int, threads: int):
+    """Build the app and serve until SIGTERM/SIGINT."""
+    # Imported here so each worker builds its components after the fork
+    from .app import create_app
+
+    app = create_app()
+    server = PooledWSGIServer(host, port, app, threads, fd=sock.fileno())
+
+    def stop(signum, frame):
+        # shutdown() blocks until serve_forever returns, so not on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"Worker {os.getpid()} serving on {host}:{port} with {threads} threads")
+    try:
+        server.serve_forever()
+    finally:
+        # Stop accepting, then let in-flight requests finish
+        server.server_close()
+        server.executor.shutdown(wait=True)
+        app.extensions["gateway"].stop()
+
+
+def serve(host: str, port: int, workers: int, threads: int):
+    """Run `workers` processes sharing one listening socket, restarting any that die.
+
+    More than one worker needs a shared state backend so a session token or
+    approval created by one worker is valid in the others; if none is
+    configured, the SQLite backend is selected.
+    """
+    if workers > 1 and os.environ.setdefault("GATEWAY_STATE_BACKEND", "sqlite").lower() == "memory":
+        logger.warning("GATEWAY_STATE_BACKEND=memory: sessions and approvals are only valid in the worker that created them")
+
+    sock = _listen(host, port)
+    if workers == 1:
+        _run_worker(sock, host, port, threads)
+        return
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(worker: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _run_worker(sock, host, port, threads)
+            except BaseException:
+                logger.exception(f"Worker {worker} failed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = worker
+
+    def stop(signum, frame):
+        nonlocal stopping
+        # A second signal stops workers without waiting for in-flight requests
+        kill = signal.SIGKILL if stopping else signal.SIGTERM
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, kill)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for worker in range(workers):
+        spawn(worker)
+    logger.info(f"Serving on {host}:{port} with {workers} workers x {threads} threads")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        worker = children.pop(pid, None)
+        if worker is None or stopping:
+            continue
+        logger.warning(f"Worker {worker} (pid {pid}) exited with status {status}, restarting")
+        # Avoid a tight loop if workers crash on startup
+        time.sleep(1)
+        if not stopping:
+            spawn(worker)
+
+    sock.close()
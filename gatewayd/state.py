@@ -0,0 +1,296 @@
+"""Shared state backends so several gatewayd worker processes see the same sessions and approvals."""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Optional, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StateBackend(ABC):
+    """Interface for state shared between worker processes.
+
+    Without a backend (the default) sessions and approvals live only in the
+    process that created them. With one, any worker can validate a session
+    token or decide an approval; the worker holding the waiting request
+    learns of the decision by polling decisions_since.
+    """
+
+    @abstractmethod
+    def put_session(self, token: str, session: Dict[str, Any], expires_at: float):
+        """Store a session record until expires_at (epoch seconds)."""
+
+    @abstractmethod
+    def get_session(self, token: str) -> Optional[Dict[str, Any]]:
+        """Session record for a token, or None."""
+
+    @abstractmethod
+    def delete_session(self, token: str) -> bool:
+        """Remove a session; False if it did not exist."""
+
+    @abstractmethod
+    def put_revocation(self, token_id: str, expires_at: float):
+        """Record a revoked signed-token id until the token would expire."""
+
+    @abstractmethod
+    def revocations_since(self, cursor: int) -> Tuple[List[Tuple[str, float]], int]:
+        """(token_id, expires_at) revocations recorded after cursor, and the new cursor."""
+
+    @abstractmethod
+    def put_approval(self, approval: Dict[str, Any], expires_at: float):
+        """Store a new pending approval record."""
+
+    @abstractmethod
+    def get_approval(self, approval_id: str) -> Optional[Dict[str, Any]]:
+        """Current approval record, or None."""
+
+    @abstractmethod
+    def decide_approval(self, approval_id: str, status: str, decided_at: float) -> bool:
+        """Move a pending approval to status; False if unknown or already decided."""
+
+    @abstractmethod
+    def last_decision(self) -> int:
+        """Cursor positioned after every decision recorded so far."""
+
+    @abstractmethod
+    def decisions_since(self, cursor: int) -> Tuple[List[Tuple[str, str]], int]:
+        """(approval_id, status) decisions recorded after cursor, and the new cursor."""
+
+    @abstractmethod
+    def purge_expired(self, now: float, retention_seconds: float) -> int:
+        """Drop expired sessions and revocations, and approvals older than retention; returns rows removed."""
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Return backend gauges."""
+
+
+def default_state_path() -> str:
+    """State database under the user's state directory ($XDG_STATE_HOME or ~/.local/state)."""
+    state_home = os.getenv("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(state_home, "gatewayd", "state.db")
+
+
+def _secure_state_file(path: str):
+    """Create the database (and its directory) private to this user.
+
+    Whoever can write the file can approve writes and forge sessions, so a
+    file (or WAL/shared-memory file) owned by another user is refused and
+    group/other permissions are removed from our own.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    for suffix in ("", "-wal", "-shm"):
+        flags = os.O_RDWR | os.O_NOFOLLOW | (os.O_CREAT if not suffix else 0)
+        try:
+            fd = os.open(path + suffix, flags, 0o600)
+        except FileNotFoundError:
+            continue
+        try:
+            info = os.fstat(fd)
+            if info.st_uid != os.getuid():
+                raise PermissionError(f"State file {path + suffix} is owned by another user")
+            if info.st_mode & 0o077:
+                os.fchmod(fd, 0o600)
+        finally:
+            os.close(fd)
+
+
+def _token_key(token: str) -> str:
+    """Store tokens hashed so the state file holds no usable bearer tokens."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token_hash TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS approvals (
+    id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    status TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    decided_at REAL
+);
+CREATE TABLE IF NOT EXISTS decisions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    approval_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    decided_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revocations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    token_id TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS approvals_expiry ON approvals (expires_at);
+"""
+
+
+class SQLiteStateBackend(StateBackend):
+    """State in one SQLite database in WAL mode, shared by every worker on the host.
+
+    WAL lets readers (token validation, status lookups) run alongside the
+    single writer; each thread keeps its own connection, reopened after a
+    fork so workers never share one.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None, busy_timeout: Optional[float] = None):
+        """Initialize SQLite backend from arguments or environment."""
+        self.path = path or os.getenv("GATEWAY_STATE_PATH") or default_state_path()
+        self.busy_timeout = busy_timeout or float(os.getenv("GATEWAY_STATE_BUSY_TIMEOUT", "5"))
+        _secure_state_file(self.path)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection (autocommit; explicit transactions where needed)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def put_session(self, token: str, session: Dict[str, Any], expires_at: float):
+        """Store a session record until expires_at (epoch seconds)."""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (token_hash, record, expires_at) VALUES (?, ?, ?)",
+            (_token_key(token), json.dumps(session), expires_at),
+        )
+
+    def get_session(self, token: str) -> Optional[Dict[str, Any]]:
+        """Session record for a token, or None."""
+        row = self._conn().execute(
+            "SELECT record FROM sessions WHERE token_hash = ?", (_token_key(token),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete_session(self, token: str) -> bool:
+        """Remove a session; False if it did not exist."""
+        cursor = self._conn().execute("DELETE FROM sessions WHERE token_hash = ?", (_token_key(token),))
+        return cursor.rowcount > 0
+
+    def put_revocation(self, token_id: str, expires_at: float):
+        """Record a revoked signed-token id until the token would expire."""
+        self._conn().execute(
+            "INSERT INTO revocations (token_id, expires_at) VALUES (?, ?)", (token_id, expires_at)
+        )
+
+    def revocations_since(self, cursor: int) -> Tuple[List[Tuple[str, float]], int]:
+        """(token_id, expires_at) revocations recorded after cursor, and the new cursor."""
+        rows = self._conn().execute(
+            "SELECT seq, token_id, expires_at FROM revocations WHERE seq > ? ORDER BY seq", (cursor,)
+        ).fetchall()
+        if not rows:
+            return [], cursor
+        return [(token_id, expires_at) for _, token_id, expires_at in rows], rows[-1][0]
+
+    def put_approval(self, approval: Dict[str, Any], expires_at: float):
+        """Store a new pending approval record."""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO approvals (id, record, status, expires_at) VALUES (?, ?, ?, ?)",
+            (approval["id"], json.dumps(approval, default=str), approval["status"], expires_at),
+        )
+
+    def get_approval(self, approval_id: str) -> Optional[Dict[str, Any]]:
+        """Current approval record, or None.
+
+        A pending approval past its expiry reads as expired even before the
+        worker that owns it (which may be gone) records the expiry.
+        """
+        row = self._conn().execute(
+            "SELECT record, status, expires_at, decided_at FROM approvals WHERE id = ?", (approval_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        record, status, expires_at, decided_at = row
+        approval = json.loads(record)
+        if status == "pending" and expires_at <= time.time():
+            status = "expired"
+        approval["status"] = status
+        if decided_at is not None:
+            approval["decided_at"] = datetime.utcfromtimestamp(decided_at).isoformat()
+        return approval
+
+    def decide_approval(self, approval_id: str, status: str, decided_at: float) -> bool:
+        """Move a pending approval to status; False if unknown or already decided."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "UPDATE approvals SET status = ?, decided_at = ? WHERE id = ? AND status = 'pending'",
+                (status, decided_at, approval_id),
+            )
+            decided = cursor.rowcount > 0
+            if decided:
+                conn.execute(
+                    "INSERT INTO decisions (approval_id, status, decided_at) VALUES (?, ?, ?)",
+                    (approval_id, status, decided_at),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return decided
+
+    def last_decision(self) -> int:
+        """Cursor positioned after every decision recorded so far."""
+        return self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM decisions").fetchone()[0]
+
+    def decisions_since(self, cursor: int) -> Tuple[List[Tuple[str, str]], int]:
+        """(approval_id, status) decisions recorded after cursor, and the new cursor."""
+        rows = self._conn().execute(
+            "SELECT seq, approval_id, status FROM decisions WHERE seq > ? ORDER BY seq", (cursor,)
+        ).fetchall()
+        if not rows:
+            return [], cursor
+        return [(approval_id, status) for _, approval_id, status in rows], rows[-1][0]
+
+    def purge_expired(self, now: float, retention_seconds: float) -> int:
+        """Drop expired sessions and revocations, and approvals older than retention; returns rows removed."""
+        horizon = now - retention_seconds
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+        removed += conn.execute("DELETE FROM revocations WHERE expires_at <= ?", (now,)).rowcount
+        removed += conn.execute(
+            "DELETE FROM approvals WHERE decided_at <= ? OR expires_at <= ?", (horizon, horizon)
+        ).rowcount
+        conn.execute("DELETE FROM decisions WHERE decided_at <= ?", (horizon,))
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return row counts."""
+        conn = self._conn()
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "sessions": conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+            "approvals": conn.execute("SELECT COUNT(*) FROM approvals").fetchone()[0],
+        }
+
+
+def create_state_backend(name: Optional[str] = None) -> Optional[StateBackend]:
+    """Backend named by GATEWAY_STATE_BACKEND, or None for process-local state."""
+    name = (name or os.getenv("GATEWAY_STATE_BACKEND", "memory")).lower()
+    if name == "memory":
+        return None
+    if name == "sqlite":
+        return SQLiteStateBackend()
+    raise ValueError(f"Unknown state backend: {name}")
@@ -0,0 +1,208 @@
+"""Stateless HMAC-signed session tokens, signing keyring and revocation list."""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _b64encode(data: bytes) -> str:
+    """Unpadded URL-safe base64."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+class SigningKeyring:
+    """HMAC keys by key id; the active key signs, every key verifies.
+
+    Rotate by adding a new key as active and keeping the old one until the
+    tokens it signed have expired (at most the session TTL), then removing
+    it, which invalidates anything it still signs.
+    """
+
+    def __init__(self, keys: Dict[str, bytes], active: str):
+        """Initialize keyring."""
+        if active not in keys:
+            raise ValueError(f"Active signing key not in keyring: {active}")
+        for key_id in keys:
+            if not key_id or "." in key_id:
+                raise ValueError(f"Invalid signing key id: {key_id!r}")
+        self.keys = keys
+        self.active = active
+
+    @classmethod
+    def from_env(cls) -> Optional["SigningKeyring"]:
+        """Keyring from SESSION_KEYS_FILE, else SESSION_SIGNING_KEYS, else None.
+
+        The file is JSON: {"active": "<id>", "keys": {"<id>": "<secret>", ...}}.
+        SESSION_SIGNING_KEYS is "<id>:<secret>,<id>:<secret>" with the active
+        key first.
+        """
+        keys_file = os.getenv("SESSION_KEYS_FILE", "config/session_keys.json")
+        if os.path.exists(keys_file):
+            with open(keys_file) as f:
+                config = json.load(f)
+            keys = {key_id: secret.encode() for key_id, secret in config["keys"].items()}
+            return cls(keys, config["active"])
+
+        value = os.getenv("SESSION_SIGNING_KEYS", "")
+        entries = [entry.split(":", 1) for entry in value.split(",") if entry.strip()]
+        if not entries:
+            return None
+        if any(len(entry) != 2 for entry in entries):
+            raise ValueError("SESSION_SIGNING_KEYS entries must be <key id>:<secret>")
+        keys = {key_id.strip(): secret.strip().encode() for key_id, secret in entries}
+        return cls(keys, entries[0][0].strip())
+
+
+class SignedTokens:
+    """Issues and verifies self-contained session tokens.
+
+    A token is "gs1.<key id>.<expiry>.<token id>.<tenant>.<signature>": the
+    expiry is in epoch seconds, the token id is random, and the signature is
+    HMAC-SHA256 over everything before it. Claims are plain text so
+    verifying costs one HMAC and a split. Any process holding the keyring
+    can verify a token without shared state.
+    """
+
+    PREFIX = "gs1"
+
+    def __init__(self, keyring: SigningKeyring):
+        """Initialize token signer."""
+        self.keyring = keyring
+        # Keyed HMAC state per key id, copied per token to skip the key setup
+        self._macs = {key_id: hmac.new(key, digestmod=hashlib.sha256) for key_id, key in keyring.keys.items()}
+
+    def _sign(self, key_id: str, signed: str) -> str:
+        """Encoded HMAC of the signed part of a token."""
+        mac = self._macs[key_id].copy()
+        mac.update(signed.encode())
+        return _b64encode(mac.digest())
+
+    def issue(self, tenant_id: str, ttl_seconds: int) -> str:
+        """Mint a token for tenant_id valid for ttl_seconds."""
+        if not tenant_id.isascii() or not tenant_id.isprintable() or " " in tenant_id:
+            raise ValueError(f"Tenant id cannot be carried in a signed token: {tenant_id!r}")
+        expires_at = int(time.time()) + ttl_seconds
+        signed = f"{self.PREFIX}.{self.keyring.active}.{expires_at}.{secrets.token_urlsafe(12)}.{tenant_id}"
+        return f"{signed}.{self._sign(self.keyring.active, signed)}"
+
+    def verify(self, token: str, now: Optional[float] = None) -> Optional[Tuple[str, int, str]]:
+        """(tenant_id, expires_at, token id) for a valid unexpired token, else None."""
+        signed, _, signature = token.rpartition(".")
+        parts = signed.split(".", 4)
+        if len(parts) != 5 or parts[0] != self.PREFIX or parts[1] not in self._macs:
+            return None
+        if not hmac.compare_digest(self._sign(parts[1], signed), signature):
+            return None
+
+        _, _, expires, token_id, tenant_id = parts
+        try:
+            expires_at = int(expires)
+        except ValueError:
+            return None
+        if expires_at <= (now if now is not None else time.time()):
+            return None
+        return tenant_id, expires_at, token_id
+
+    @classmethod
+    def is_signed(cls, token: str) -> bool:
+        """Whether token is in the signed format (opaque tokens contain no dots)."""
+        return token.startswith(cls.PREFIX + ".")
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings.
+
+    Bit positions come from Python's string hash, which is salted per
+    process, so a filter is only meaningful in the process that built it.
+    """
+
+    def __init__(self, bits: int, hashes: int = 4):
+        """Initialize an empty filter of `bits` bits."""
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+
+    def add(self, item: str):
+        """Add an item."""
+        h = hash(item)
+        # Double hashing: the low and high halves of one 64-bit hash
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.bits
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        """False if item was never added; True if it probably was."""
+        h = hash(item)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        array = self._array
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.bits
+            if not array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    """Revoked signed-token ids, kept until the tokens would have expired anyway.
+
+    A bloom filter answers the common case (not revoked) without touching
+    the exact map; only filter hits are confirmed against it. The filter is
+    rebuilt when expired entries are dropped.
+    """
+
+    def __init__(self, bloom_bits: Optional[int] = None):
+        """Initialize revocation list from arguments or environment."""
+        self.bloom_bits = bloom_bits or int(os.getenv("SESSION_REVOCATION_BLOOM_BITS", str(1 << 20)))
+        self._revoked: Dict[str, float] = {}
+        self._bloom = BloomFilter(self.bloom_bits)
+        self._lock = threading.Lock()
+        self._stats = {"bloom_hits": 0, "false_positives": 0}
+
+    def add(self, token_id: str, expires_at: float):
+        """Revoke a token id until expires_at."""
+        with self._lock:
+            self._purge_locked(time.time())
+            self._revoked[token_id] = expires_at
+            self._bloom.add(token_id)
+
+    def __contains__(self, token_id: str) -> bool:
+        """Whether a token id is revoked."""
+        if token_id not in self._bloom:
+            return False
+        with self._lock:
+            self._stats["bloom_hits"] += 1
+            if token_id in self._revoked:
+                return True
+            self._stats["false_positives"] += 1
+            return False
+
+    def _purge_locked(self, now: float):
+        """Drop entries whose tokens have expired and rebuild the filter (caller holds the lock)."""
+        expired = [token_id for token_id, expires_at in self._revoked.items() if expires_at <= now]
+        if not expired:
+            return
+        for token_id in expired:
+            del self._revoked[token_id]
+        self._bloom = BloomFilter(self.bloom_bits)
+        for token_id in self._revoked:
+            self._bloom.add(token_id)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def get_stats(self):
+        """Return revocation counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["revoked"] = len(self._revoked)
+        return stats
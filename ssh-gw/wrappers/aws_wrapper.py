@@ -3,7 +3,7 @@
 import os
 import sys
 from typing import List, Dict, Any, Optional
-from .base import CLIWrapper, ActionType
+from .base import CLIWrapper
 
 
 class AWSWrapper(CLIWrapper):
@@ -11,21 +11,6 @@ class AWSWrapper(CLIWrapper):
 
     COMMAND_NAME = "aws"
 
-    def classify_action(self) -> ActionType:
-        """Classify AWS command as read or write."""
-        if not self.args:
-            return ActionType.READ
-
-        # Get the operation (first positional arg, may be after flags)
-        operation = self.args[0].lower()
-
-        # Read operations
-        read_ops = ["list", "describe", "get"]
-        if any(operation.startswith(op) for op in read_ops):
-            return ActionType.READ
-
-        return ActionType.WRITE
-
     def _inject_credentials(self, env: Dict[str, str], credentials: Dict[str, Any]):
         """Inject AWS credentials into environment."""
         if "access_key" in credentials:
@@ -4,11 +4,14 @@ import logging
 import os
 import sys
 import subprocess
+import time
 import requests
 from typing import List, Dict, Optional, Any
 from enum import Enum
 import json
 
+from gatewayd.cli_classifier import classify_command
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +28,7 @@ class CLIWrapper:
     GATEWAY_URL = os.getenv("GATEWAY_URL", "http://localhost:5000")
     SESSION_TOKEN = os.getenv("GATEWAY_SESSION_TOKEN")
     TENANT_ID = os.getenv("GATEWAY_TENANT_ID", "default")
+    APPROVAL_POLL_SECONDS = float(os.getenv("GATEWAY_APPROVAL_POLL_SECONDS", "55"))
 
     def __init__(self, args: List[str]):
         """Initialize wrapper."""
@@ -57,9 +61,8 @@ class CLIWrapper:
             return 1
 
     def classify_action(self) -> ActionType:
-        """Classify command as read or write."""
-        # Override in subclasses
-        return ActionType.READ
+        """Classify command as read or write (see gatewayd/cli_classifier.py)."""
+        return ActionType(classify_command(self.COMMAND_NAME, self.args))
 
     def _request_approval(self, action_type: ActionType) -> bool:
         """Request approval from gateway."""
@@ -105,24 +108,33 @@ class CLIWrapper:
             logger.error(f"Error requesting approval: {str(e)}")
             return False
 
-    def _wait_approval(self, approval_id: str) -> bool:
-        """Wait for approval decision."""
+    def _wait_approval(self, approval_id: str, timeout_seconds: int = 3600) -> bool:
+        """Wait for approval decision by long-polling the gateway."""
         headers = {
             "Authorization": f"Bearer {self.SESSION_TOKEN}",
         }
+        deadline = time.monotonic() + timeout_seconds
 
         try:
-            response = requests.get(
-                f"{self.GATEWAY_URL}/approvals/{approval_id}/status",
-                headers=headers,
-                timeout=3600,
-            )
-
-            if response.status_code != 200:
-                return False
-
-            status = response.json().get("status")
-            return status == "approved"
+            while True:
+                poll_seconds = min(self.APPROVAL_POLL_SECONDS, max(deadline - time.monotonic(), 0))
+                response = requests.get(
+                    f"{self.GATEWAY_URL}/approvals/{approval_id}/wait",
+                    headers=headers,
+                    params={"timeout": poll_seconds},
+                    timeout=poll_seconds + 30,
+                )
+
+                if response.status_code != 200:
+                    return False
+
+                status = response.json().get("status")
+                if status != "pending":
+                    return status == "approved"
+
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Timed out waiting for approval: {approval_id}")
+                    return False
 
         except Exception as e:
             logger.error(f"Error checking approval status: {str(e)}")
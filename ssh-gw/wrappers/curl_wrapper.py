@@ -3,7 +3,7 @@
 import os
 import sys
 from typing import List, Dict, Any
-from .base import CLIWrapper, ActionType
+from .base import CLIWrapper
 
 
 class CurlWrapper(CLIWrapper):
@@ -11,20 +11,6 @@ class CurlWrapper(CLIWrapper):
 
     COMMAND_NAME = "curl"
 
-    def classify_action(self) -> ActionType:
-        """Classify curl command as read or write."""
-        if not self.args:
-            return ActionType.READ
-
-        # Check for non-GET methods
-        args_str = " ".join(self.args)
-        methods = ["-X POST", "-X PUT", "-X PATCH", "-X DELETE", "-d "]
-
-        if any(method in args_str for method in methods):
-            return ActionType.WRITE
-
-        return ActionType.READ
-
     def _inject_credentials(self, env: Dict[str, str], credentials: Dict[str, Any]):
         """Inject credentials into environment for curl."""
         # curl uses various auth methods, typically passed via flags or env vars
@@ -3,7 +3,7 @@
 import os
 import sys
 from typing import List, Dict, Any
-from .base import CLIWrapper, ActionType
+from .base import CLIWrapper
 
 
 class DatadogWrapper(CLIWrapper):
@@ -11,20 +11,6 @@ class DatadogWrapper(CLIWrapper):
 
     COMMAND_NAME = "datadog"
 
-    def classify_action(self) -> ActionType:
-        """Classify Datadog command as read or write."""
-        if not self.args:
-            return ActionType.READ
-
-        subcommand = self.args[0].lower()
-
-        # Mutating operations
-        mutating = ["create", "delete", "update", "edit", "set"]
-        if any(subcommand.startswith(op) or subcommand == op for op in mutating):
-            return ActionType.WRITE
-
-        return ActionType.READ
-
     def _inject_credentials(self, env: Dict[str, str], credentials: Dict[str, Any]):
         """Inject Datadog credentials into environment."""
         if "api_key" in credentials:
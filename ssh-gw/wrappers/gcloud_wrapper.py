@@ -3,7 +3,7 @@
 import os
 import sys
 from typing import List, Dict, Any
-from .base import CLIWrapper, ActionType
+from .base import CLIWrapper
 
 
 class GCPWrapper(CLIWrapper):
@@ -11,26 +11,6 @@ class GCPWrapper(CLIWrapper):
 
     COMMAND_NAME = "gcloud"
 
-    def classify_action(self) -> ActionType:
-        """Classify gcloud command as read or write."""
-        if not self.args:
-            return ActionType.READ
-
-        # Extract operation from args (may have flags)
-        operation = self.args[0].lower()
-
-        # Read operations
-        read_ops = ["list", "describe"]
-        if any(operation == op for op in read_ops):
-            return ActionType.READ
-
-        # Mutating operations
-        write_ops = ["create", "delete", "update", "deploy", "set", "enable", "disable"]
-        if any(operation == op for op in write_ops):
-            return ActionType.WRITE
-
-        return ActionType.READ
-
     def _inject_credentials(self, env: Dict[str, str], credentials: Dict[str, Any]):
         """Inject GCP credentials into environment."""
         if "credentials_json" in credentials:
@@ -3,7 +3,7 @@
 import os
 import sys
 from typing import List, Dict, Any
-from .base import CLIWrapper, ActionType
+from .base import CLIWrapper
 
 
 class GithubWrapper(CLIWrapper):
@@ -11,21 +11,6 @@ class GithubWrapper(CLIWrapper):
 
     COMMAND_NAME = "gh"
 
-    def classify_action(self) -> ActionType:
-        """Classify GitHub command as read or write."""
-        if not self.args:
-            return ActionType.READ
-
-        subcommand = self.args[0].lower()
-
-        # Mutating operations
-        mutating_ops = ["create", "delete", "update", "edit", "merge", "close", "open", "fork", "fork-repo"]
-
-        if any(subcommand.startswith(op) or subcommand == op for op in mutating_ops):
-            return ActionType.WRITE
-
-        return ActionType.READ
-
     def _inject_credentials(self, env: Dict[str, str], credentials: Dict[str, Any]):
         """Inject GitHub credentials into environment."""
         if "token" in credentials:
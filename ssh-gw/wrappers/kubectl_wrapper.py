@@ -3,7 +3,7 @@
 import os
 import sys
 from typing import List, Dict, Any
-from .base import CLIWrapper, ActionType
+from .base import CLIWrapper
 
 
 class KubectlWrapper(CLIWrapper):
@@ -11,21 +11,6 @@ class KubectlWrapper(CLIWrapper):
 
     COMMAND_NAME = "kubectl"
 
-    def classify_action(self) -> ActionType:
-        """Classify kubectl command as read or write."""
-        if not self.args:
-            return ActionType.READ
-
-        verb = self.args[0].lower()
-
-        # Mutating operations
-        mutating_verbs = ["apply", "delete", "scale", "patch", "set", "rollout", "expose", "autoscale", "cordon", "drain", "taint"]
-
-        if any(verb.startswith(v) or verb == v for v in mutating_verbs):
-            return ActionType.WRITE
-
-        return ActionType.READ
-
     def _inject_credentials(self, env: Dict[str, str], credentials: Dict[str, Any]):
         """Inject kubectl credentials into environment."""
         if "kubeconfig" in credentials:
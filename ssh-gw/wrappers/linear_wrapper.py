@@ -3,7 +3,7 @@
 import os
 import sys
 from typing import List, Dict, Any
-from .base import CLIWrapper, ActionType
+from .base import CLIWrapper
 
 
 class LinearWrapper(CLIWrapper):
@@ -11,20 +11,6 @@ class LinearWrapper(CLIWrapper):
 
     COMMAND_NAME = "linear"
 
-    def classify_action(self) -> ActionType:
-        """Classify Linear command as read or write."""
-        if not self.args:
-            return ActionType.READ
-
-        subcommand = self.args[0].lower()
-
-        # Mutating operations
-        mutating = ["create", "delete", "update", "edit", "assign", "move"]
-        if any(subcommand.startswith(op) or subcommand == op for op in mutating):
-            return ActionType.WRITE
-
-        return ActionType.READ
-
     def _inject_credentials(self, env: Dict[str, str], credentials: Dict[str, Any]):
         """Inject Linear credentials into environment."""
         if "api_key" in credentials:
@@ -3,7 +3,7 @@
 import os
 import sys
 from typing import List, Dict, Any
-from .base import CLIWrapper, ActionType
+from .base import CLIWrapper
 
 
 class TerraformWrapper(CLIWrapper):
@@ -11,19 +11,6 @@ class TerraformWrapper(CLIWrapper):
 
     COMMAND_NAME = "terraform"
 
-    def classify_action(self) -> ActionType:
-        """Classify Terraform command as read or write."""
-        if not self.args:
-            return ActionType.READ
-
-        subcommand = self.args[0].lower()
-
-        # Mutating operations
-        if subcommand in ["apply", "destroy", "taint", "untaint", "import"]:
-            return ActionType.WRITE
-
-        return ActionType.READ
-
     def _inject_credentials(self, env: Dict[str, str], credentials: Dict[str, Any]):
         """Inject Terraform credentials into environment."""
         # Terraform typically uses provider-specific credentials
@@ -0,0 +1,62 @@
+"""In-process ASGI client for tests."""
+
+import asyncio
+import json
+
+
+class ASGIResponse:
+    """Collected response from an ASGI app."""
+
+    def __init__(self):
+        """Initialize empty response."""
+        self.status_code = None
+        self.headers = {}
+        self.body = b""
+
+    @property
+    def json(self):
+        return json.loads(self.body)
+
+
+async def asgi_request(app, method, path, headers=None, body=b"", query=""):
+    """Call an ASGI app once and collect its response."""
+    headers = dict(headers or {})
+    if body and not any(name.lower() == "content-length" for name in headers):
+        headers["Content-Length"] = str(len(body))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(name.lower().encode(), str(value).encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    finished = asyncio.Event()
+    response = ASGIResponse()
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response.status_code = message["status"]
+            response.headers = {name.decode(): value.decode() for name, value in message["headers"]}
+        elif message["type"] == "http.response.body":
+            response.body += message.get("body", b"")
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+    return response
@@ -0,0 +1,150 @@
+"""Local fake upstream HTTP server for proxy tests."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeUpstream:
+    """Threaded HTTP server that records requests and replies from a handler map.
+
+    Handlers are registered per (method, path) and return
+    (status_code, headers, body). Unregistered routes echo the request.
+    Faults (delays, error statuses, dropped connections) can be injected
+    per route ahead of the handler.
+    """
+
+    def __init__(self):
+        """Initialize fake upstream."""
+        self.requests = []
+        self.routes = {}
+        self.faults = {}
+        self.connections = 0
+        self._lock = threading.Lock()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with upstream._lock:
+                    upstream.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle_one_request(self):
+                # Clients that give up early (hedged or cancelled calls) hang up mid-reply
+                try:
+                    super().handle_one_request()
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    body = self._read_chunked()
+                else:
+                    body = self.rfile.read(length) if length else b""
+
+                record = {
+                    "method": self.command,
+                    "path": self.path,
+                    "headers": dict(self.headers),
+                    "body": body,
+                }
+                with upstream._lock:
+                    upstream.requests.append(record)
+                    fault = upstream._take_fault(self.command, self.path)
+
+                if fault is not None:
+                    if fault["delay"]:
+                        time.sleep(fault["delay"])
+                    if fault["reset"]:
+                        # Drop the connection without a response
+                        self.close_connection = True
+                        return
+                    if fault["status"] is not None:
+                        payload = b"injected fault"
+                        self.send_response(fault["status"])
+                        self.send_header("Content-Length", str(len(payload)))
+                        self.end_headers()
+                        self.wfile.write(payload)
+                        return
+
+                handler = upstream.routes.get((self.command, self.path))
+                if handler is None:
+                    status, headers, payload = 200, {"Content-Type": "application/json"}, json.dumps({
+                        "method": self.command,
+                        "path": self.path,
+                        "body_length": len(body),
+                    }).encode()
+                else:
+                    status, headers, payload = handler(record)
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if isinstance(payload, (bytes, bytearray)):
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    if self.command != "HEAD":
+                        self.wfile.write(payload)
+                else:
+                    # Iterable payloads are sent with chunked transfer encoding
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for chunk in payload:
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+
+            def _read_chunked(self):
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().strip(), 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return body
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = _handle
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def route(self, method, path, handler):
+        """Register a handler for method and path."""
+        self.routes[(method, path)] = handler
+
+    def inject_fault(self, method, path, delay=0.0, status=None, reset=False, count=None):
+        """Delay, fail with status, or drop the next count matching requests (all if count is None)."""
+        with self._lock:
+            self.faults[(method, path)] = {"delay": delay, "status": status, "reset": reset, "count": count}
+
+    def clear_faults(self):
+        """Remove every injected fault."""
+        with self._lock:
+            self.faults.clear()
+
+    def _take_fault(self, method, path):
+        """The fault for a request, consuming one use of it (caller holds the lock)."""
+        fault = self.faults.get((method, path))
+        if fault is not None and fault["count"] is not None:
+            fault["count"] -= 1
+            if fault["count"] <= 0:
+                del self.faults[(method, path)]
+        return fault
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
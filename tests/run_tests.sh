@@ -10,6 +10,14 @@ echo "Policy engine tests:"
 python tests/test_policy.py
 echo
 
+echo "CLI classifier tests:"
+python tests/test_cli_classifier.py
+echo
+
+echo "GraphQL classifier tests:"
+python tests/test_graphql.py
+echo
+
 echo "Authentication tests:"
 python tests/test_auth.py
 echo
@@ -18,4 +26,44 @@ echo "Approval orchestrator tests:"
 python tests/test_approvals.py
 echo
 
+echo "Grant tests:"
+python tests/test_grants.py
+echo
+
+echo "Proxy tests:"
+python tests/test_proxy.py
+echo
+
+echo "Response cache tests:"
+python tests/test_cache.py
+echo
+
+echo "Coalescing tests:"
+python tests/test_coalesce.py
+echo
+
+echo "Rate limit tests:"
+python tests/test_ratelimit.py
+echo
+
+echo "Resilience tests:"
+python tests/test_resilience.py
+echo
+
+echo "ASGI tests:"
+python tests/test_asgi.py
+echo
+
+echo "Shared state tests:"
+python tests/test_state.py
+echo
+
+echo "Token tests:"
+python tests/test_tokens.py
+echo
+
+echo "App tests:"
+python tests/test_app.py
+echo
+
 echo "All tests passed! ✓"
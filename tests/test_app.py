@@ -0,0 +1,309 @@
+"""Tests for the gatewayd proxy endpoints."""
+
+import json
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from gatewayd.app import create_app
+from fake_upstream import FakeUpstream
+
+
+def make_client(upstream_url):
+    """Build a test client whose github provider points at a fake upstream."""
+    app = create_app()
+    app.extensions["http_proxy"].base_urls["github"] = upstream_url
+    token = app.extensions["session_manager"].create_session("default")
+    headers = {"Authorization": f"Bearer {token}", "X-Provider": "github"}
+    return app, app.test_client(), headers
+
+
+def wait_until(predicate, timeout=2.0):
+    """Poll until predicate() is true or timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_read_is_forwarded():
+    """Reads go straight through to the upstream."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+
+        response = client.get("/api/v1/proxy/repos/owner/repo", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json["path"] == "/repos/owner/repo"
+
+
+def test_async_approval_resume():
+    """Async writes return 202 and run when the agent resumes after approval."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+
+        response = client.post("/api/v1/proxy/repos/owner/repo/issues", data=b"x" * 2048, headers=headers)
+        assert response.status_code == 202
+        approval_id = response.json["approval_id"]
+        resume_url = response.json["resume_url"]
+        assert response.headers["Location"] == resume_url
+        assert upstream.requests == []
+
+        # Still pending
+        assert client.post(resume_url, headers=headers).status_code == 202
+
+        client.post(f"/approvals/{approval_id}/approve", json={})
+        assert upstream.requests == []
+
+        response = client.post(resume_url, headers=headers)
+        assert response.status_code == 200
+        assert response.json["body_length"] == 2048
+        assert len(upstream.requests) == 1
+
+        # Single use
+        assert client.post(resume_url, headers=headers).status_code == 404
+
+
+def test_async_approval_execute_on_approval():
+    """With X-Gate-On-Approval: execute the gateway runs the write itself."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+        headers["X-Gate-On-Approval"] = "execute"
+
+        response = client.post("/api/v1/proxy/repos/owner/repo/issues", data=b"payload", headers=headers)
+        approval_id = response.json["approval_id"]
+
+        client.post(f"/approvals/{approval_id}/approve", json={})
+        assert wait_until(lambda: len(upstream.requests) == 1)
+        assert upstream.requests[0]["body"] == b"payload"
+
+        pending_requests = app.extensions["pending_requests"]
+        assert wait_until(lambda: pending_requests.get(approval_id).state.value == "completed")
+
+        response = client.get(response.json["resume_url"], headers=headers)
+        assert response.status_code == 200
+        assert response.json["body_length"] == 7
+
+
+def test_async_approval_denied():
+    """A denied async write is never forwarded."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+
+        response = client.post("/api/v1/proxy/repos/owner/repo/issues", data=b"payload", headers=headers)
+        approval_id = response.json["approval_id"]
+
+        client.post(f"/approvals/{approval_id}/deny")
+
+        assert client.post(response.json["resume_url"], headers=headers).status_code == 403
+        assert upstream.requests == []
+
+
+def test_resume_requires_same_session():
+    """Another tenant's session, or another session of the tenant, cannot resume a parked request."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+
+        response = client.post("/api/v1/proxy/repos/owner/repo/issues", data=b"payload", headers=headers)
+
+        other = app.extensions["session_manager"].create_session("test")
+        other_headers = {"Authorization": f"Bearer {other}"}
+        assert client.post(response.json["resume_url"], headers=other_headers).status_code == 404
+        assert client.post(response.json["resume_url"]).status_code == 401
+
+        sibling = app.extensions["session_manager"].create_session("default")
+        sibling_headers = {"Authorization": f"Bearer {sibling}"}
+        client.post(f"/approvals/{response.json['approval_id']}/approve", json={})
+        assert client.post(response.json["resume_url"], headers=sibling_headers).status_code == 404
+        assert upstream.requests == []
+
+        assert client.post(response.json["resume_url"], headers=headers).status_code == 200
+        assert len(upstream.requests) == 1
+
+
+def test_approval_wait_long_poll():
+    """The wait endpoint returns as soon as the approval is decided."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+
+        approval_id = client.post("/api/v1/proxy/repos/o/r/issues", data=b"x", headers=headers).json["approval_id"]
+
+        response = client.get(f"/approvals/{approval_id}/wait?timeout=0.05")
+        assert response.json["status"] == "pending"
+
+        threading.Timer(0.05, app.extensions["approval_orchestrator"].approve, args=(approval_id,)).start()
+        started = time.monotonic()
+        response = client.get(f"/approvals/{approval_id}/wait?timeout=10")
+        assert response.json["status"] == "approved"
+        assert time.monotonic() - started < 1
+
+        assert client.get("/approvals/missing/wait?timeout=0").status_code == 404
+
+
+def test_approval_events_stream():
+    """The SSE endpoint emits the pending and decided status, then closes."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+
+        approval_id = client.post("/api/v1/proxy/repos/o/r/issues", data=b"x", headers=headers).json["approval_id"]
+        threading.Timer(0.05, app.extensions["approval_orchestrator"].deny, args=(approval_id,)).start()
+
+        response = client.get(f"/approvals/{approval_id}/events?timeout=10", buffered=False)
+        assert response.mimetype == "text/event-stream"
+
+        events = [
+            json.loads(line[len("data: "):])
+            for line in b"".join(response.response).decode().splitlines()
+            if line.startswith("data: ")
+        ]
+        assert [event["status"] for event in events] == ["pending", "denied"]
+
+
+def test_duplicate_async_writes_share_approval():
+    """A retried write with the same body attaches to the pending approval."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+
+        first = client.post("/api/v1/proxy/repos/o/r/issues", data=b"same", headers=headers).json
+        retry = client.post("/api/v1/proxy/repos/o/r/issues", data=b"same", headers=headers).json
+        different = client.post("/api/v1/proxy/repos/o/r/issues", data=b"other", headers=headers).json
+
+        # Same write under other credentials, or from another session of the tenant
+        other_creds = client.post(
+            "/api/v1/proxy/repos/o/r/issues", data=b"same", headers={**headers, "X-Creds": "github-admin"},
+        ).json
+        other_token = app.extensions["session_manager"].create_session("default")
+        other_session = client.post(
+            "/api/v1/proxy/repos/o/r/issues", data=b"same", headers={**headers, "Authorization": f"Bearer {other_token}"},
+        ).json
+
+        assert retry["approval_id"] == first["approval_id"]
+        assert different["approval_id"] != first["approval_id"]
+        assert other_creds["approval_id"] != first["approval_id"]
+        assert other_session["approval_id"] not in (first["approval_id"], other_creds["approval_id"])
+
+        client.post(f"/approvals/{first['approval_id']}/approve", json={})
+        assert client.post(retry["resume_url"], headers=headers).json["body_length"] == 4
+        assert len(upstream.requests) == 1
+
+
+def test_timed_grant_skips_repeat_approvals():
+    """After approving with a duration, repeats of the same write go straight through."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+
+        response = client.post("/api/v1/proxy/repos/o/r/issues", data=b"x", headers=headers)
+        assert response.status_code == 202
+        client.post(f"/approvals/{response.json['approval_id']}/approve", json={"duration_minutes": 30})
+
+        response = client.post("/api/v1/proxy/repos/o/r/issues", data=b"y", headers=headers)
+        assert response.status_code == 200
+        assert upstream.requests[-1]["body"] == b"y"
+
+        # Other paths still need approval
+        assert client.post("/api/v1/proxy/repos/o/r/pulls", data=b"z", headers=headers).status_code == 202
+
+
+def test_graphql_queries_are_reads():
+    """GraphQL queries skip approval in strict mode; mutations still need it."""
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        headers["Prefer"] = "respond-async"
+        http_proxy = app.extensions["http_proxy"]
+        spool_body = http_proxy.spool_body
+        spooled = []
+        http_proxy.spool_body = lambda stream: spooled.append(spool_body(stream)) or spooled[-1]
+
+        query = json.dumps({"query": "query { viewer { login } }"}).encode()
+        response = client.post("/api/v1/proxy/graphql", data=query, headers=headers)
+        assert response.status_code == 200
+        assert upstream.requests[-1]["body"] == query
+        # The body spooled for inspection is released once forwarded
+        assert spooled[0].fileobj.closed
+
+        mutation = json.dumps({"query": "mutation { addStar(input: {}) { clientMutationId } }"}).encode()
+        response = client.post("/api/v1/proxy/graphql", data=mutation, headers=headers)
+        assert response.status_code == 202
+        assert len(upstream.requests) == 1
+
+
+def test_cautious_exceptions_match_proxy_paths():
+    """Cautious-mode exceptions written with a leading slash match slash-less proxy paths.
+
+    Behaviour change: these writes used to wait for approval because
+    /repos/*/issues never matched repos/o/r/issues.
+    """
+    with FakeUpstream() as upstream:
+        app, client, headers = make_client(upstream.url)
+        token = app.extensions["session_manager"].create_session("cautious")
+        headers = {**headers, "Authorization": f"Bearer {token}", "Prefer": "respond-async"}
+
+        newly_exempt = [
+            ("POST", "repos/o/r/issues"),
+            ("PATCH", "repos/o/r/pulls"),
+            ("PUT", "repos/o/r/contents/README.md"),
+        ]
+        for method, path in newly_exempt:
+            assert client.open(f"/api/v1/proxy/{path}", method=method, data=b"{}", headers=headers).status_code == 200
+        assert len(upstream.requests) == len(newly_exempt)
+
+        # Methods and paths outside the exceptions still need approval
+        still_gated = [
+            ("DELETE", "repos/o/r/issues"),
+            ("POST", "repos/o/r/issues/1/comments"),
+            ("POST", "repos/o/r/releases"),
+        ]
+        for method, path in still_gated:
+            assert client.open(f"/api/v1/proxy/{path}", method=method, data=b"{}", headers=headers).status_code == 202
+        assert len(upstream.requests) == len(newly_exempt)
+
+
+if __name__ == "__main__":
+    test_read_is_forwarded()
+    print("✓ test_read_is_forwarded")
+
+    test_async_approval_resume()
+    print("✓ test_async_approval_resume")
+
+    test_async_approval_execute_on_approval()
+    print("✓ test_async_approval_execute_on_approval")
+
+    test_async_approval_denied()
+    print("✓ test_async_approval_denied")
+
+    test_resume_requires_same_session()
+    print("✓ test_resume_requires_same_session")
+
+    test_approval_wait_long_poll()
+    print("✓ test_approval_wait_long_poll")
+
+    test_approval_events_stream()
+    print("✓ test_approval_events_stream")
+
+    test_duplicate_async_writes_share_approval()
+    print("✓ test_duplicate_async_writes_share_approval")
+
+    test_timed_grant_skips_repeat_approvals()
+    print("✓ test_timed_grant_skips_repeat_approvals")
+
+    test_graphql_queries_are_reads()
+    print("✓ test_graphql_queries_are_reads")
+
+    test_cautious_exceptions_match_proxy_paths()
+    print("✓ test_cautious_exceptions_match_proxy_paths")
+
+    print("\nAll app tests passed!")
@@ -1,12 +1,14 @@
 """Tests for approval orchestrator."""
 
+import asyncio
+import logging
 import sys
 import os
 import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from gatewayd.approvals import ApprovalOrchestrator, ApprovalStatus
+from gatewayd.approvals import Approval, ApprovalOrchestrator, ApprovalStatus, request_fingerprint
 
 
 class MockGatewayRequest:
@@ -117,6 +119,292 @@ def test_wait_for_approval_denied():
     assert result is False
 
 
+def test_wait_for_decision_does_not_expire():
+    """Long-poll waits return the pending record without expiring it."""
+    orchestrator = ApprovalOrchestrator()
+    gateway_req = MockGatewayRequest()
+
+    approval_id = orchestrator.request_approval(
+        gateway_req=gateway_req,
+        tenant_id="default",
+        details={"method": "POST", "path": "/test"},
+    )
+
+    status = orchestrator.wait_for_decision(approval_id, timeout_seconds=0.05)
+    assert status["status"] == ApprovalStatus.PENDING.value
+
+    import threading
+    timer = threading.Timer(0.05, orchestrator.approve, args=(approval_id,))
+    timer.start()
+
+    started = time.monotonic()
+    status = orchestrator.wait_for_decision(approval_id, timeout_seconds=2)
+    assert status["status"] == ApprovalStatus.APPROVED.value
+    assert time.monotonic() - started < 1
+
+    assert orchestrator.wait_for_decision("missing", timeout_seconds=0) is None
+
+
+def test_async_waits_do_not_accumulate_callbacks():
+    """Timed-out async waits (SSE heartbeats) remove their decision callback."""
+    orchestrator = ApprovalOrchestrator()
+    approval_id = orchestrator.request_approval(
+        gateway_req=MockGatewayRequest(),
+        tenant_id="default",
+        details={"method": "POST", "path": "/test"},
+    )
+
+    async def heartbeats():
+        for _ in range(20):
+            status = await orchestrator.wait_for_decision_async(approval_id, 0.001)
+            assert status["status"] == ApprovalStatus.PENDING.value
+
+    asyncio.run(heartbeats())
+    assert approval_id not in orchestrator.decision_callbacks
+
+    async def wait_then_approve():
+        waiter = asyncio.ensure_future(orchestrator.wait_for_decision_async(approval_id, 5))
+        await asyncio.sleep(0.01)
+        assert len(orchestrator.decision_callbacks[approval_id]) == 1
+        await asyncio.to_thread(orchestrator.approve, approval_id)
+        return await waiter
+
+    assert asyncio.run(wait_then_approve())["status"] == ApprovalStatus.APPROVED.value
+    assert approval_id not in orchestrator.decision_callbacks
+
+
+def test_cleanup_expires_overdue_pending_approvals():
+    """Overdue pending approvals expire and wake their waiters."""
+    orchestrator = ApprovalOrchestrator(ttl_seconds=0.05)
+    gateway_req = MockGatewayRequest()
+
+    overdue = orchestrator.request_approval(gateway_req, "default", {"method": "POST", "path": "/a"})
+    decided = orchestrator.request_approval(gateway_req, "default", {"method": "POST", "path": "/b"})
+    orchestrator.approve(decided)
+
+    time.sleep(0.1)
+    assert orchestrator.cleanup_expired_approvals() == 1
+
+    assert orchestrator.get_status(overdue)["status"] == ApprovalStatus.EXPIRED.value
+    assert orchestrator.get_status(decided)["status"] == ApprovalStatus.APPROVED.value
+    assert orchestrator.wait_for_approval(overdue, timeout_seconds=0) is False
+
+    # A late decision does not revive an expired approval
+    orchestrator.approve(overdue)
+    assert orchestrator.get_status(overdue)["status"] == ApprovalStatus.EXPIRED.value
+
+
+def test_sweeper_expires_in_background():
+    """The sweeper thread expires approvals without anyone calling cleanup."""
+    orchestrator = ApprovalOrchestrator(ttl_seconds=0.1)
+    orchestrator.start_sweeper()
+    try:
+        approval_id = orchestrator.request_approval(MockGatewayRequest(), "default", {"method": "POST", "path": "/a"})
+
+        started = time.monotonic()
+        status = orchestrator.wait_for_decision(approval_id, timeout_seconds=2)
+        assert status["status"] == ApprovalStatus.EXPIRED.value
+        assert time.monotonic() - started < 1
+    finally:
+        orchestrator.stop_sweeper()
+
+
+def test_decided_records_are_evicted():
+    """Decided records are dropped past the retention window or count cap."""
+    evicted = []
+    orchestrator = ApprovalOrchestrator(retention_seconds=3600, max_retained=2, stripes=1)
+    orchestrator.on_evict(evicted.append)
+
+    ids = [
+        orchestrator.request_approval(MockGatewayRequest(), "default", {"method": "POST", "path": "/a"})
+        for _ in range(5)
+    ]
+    for approval_id in ids[:4]:
+        orchestrator.deny(approval_id)
+
+    orchestrator.cleanup_expired_approvals()
+    assert evicted == ids[:2]
+    assert orchestrator.get_status(ids[0]) is None
+    assert orchestrator.get_status(ids[3]) is not None
+    assert orchestrator.get_stats()["records"] == 3
+
+    orchestrator.retention_seconds = 0
+    time.sleep(0.01)
+    orchestrator.cleanup_expired_approvals()
+    assert orchestrator.get_stats()["records"] == 1
+    assert orchestrator.get_status(ids[4])["status"] == ApprovalStatus.PENDING.value
+
+
+def test_memory_stays_flat_with_sweeper():
+    """With the sweeper running, churned approvals do not accumulate."""
+    orchestrator = ApprovalOrchestrator(ttl_seconds=0.01, retention_seconds=0.01)
+    orchestrator.start_sweeper()
+    try:
+        for i in range(2000):
+            approval_id = orchestrator.request_approval(MockGatewayRequest(), "default", {"method": "POST", "path": "/a"})
+            if i % 2:
+                orchestrator.approve(approval_id)
+
+        deadline = time.monotonic() + 2
+        while orchestrator.get_stats()["records"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert orchestrator.get_stats()["records"] == 0
+        assert len(orchestrator.approval_events) == 0
+    finally:
+        orchestrator.stop_sweeper()
+
+
+def test_identical_pending_writes_coalesce():
+    """Duplicates attach to the pending approval and share its event."""
+    orchestrator = ApprovalOrchestrator()
+    fingerprint = request_fingerprint("default", "github", "POST", "/repos/o/r/issues", "abc", "github-bot", "s1")
+
+    first = orchestrator.request_approval(MockGatewayRequest(), "default", {"path": "/a"}, fingerprint=fingerprint)
+    second = orchestrator.request_approval(MockGatewayRequest(), "default", {"path": "/a"}, fingerprint=fingerprint)
+    other = orchestrator.request_approval(
+        MockGatewayRequest(), "default", {"path": "/a"},
+        fingerprint=request_fingerprint("default", "github", "POST", "/repos/o/r/issues", "def", "github-bot", "s1"),
+    )
+    # The same write with other credentials or from another session is its own approval
+    other_creds = orchestrator.request_approval(
+        MockGatewayRequest(), "default", {"path": "/a"},
+        fingerprint=request_fingerprint("default", "github", "POST", "/repos/o/r/issues", "abc", "github-admin", "s1"),
+    )
+    other_session = orchestrator.request_approval(
+        MockGatewayRequest(), "default", {"path": "/a"},
+        fingerprint=request_fingerprint("default", "github", "POST", "/repos/o/r/issues", "abc", "github-bot", "s2"),
+    )
+
+    assert second == first
+    assert len({first, other, other_creds, other_session}) == 4
+    assert orchestrator.get_status(first)["waiters"] == 2
+    assert orchestrator.get_stats()["coalesced"] == 1
+
+    import threading
+    threading.Timer(0.05, orchestrator.approve, args=(first,)).start()
+    results = []
+    waiters = [
+        threading.Thread(target=lambda: results.append(orchestrator.wait_for_approval(first, timeout_seconds=2)))
+        for _ in range(2)
+    ]
+    for thread in waiters:
+        thread.start()
+    for thread in waiters:
+        thread.join()
+    assert results == [True, True]
+
+    # Once decided, the same write needs a fresh approval
+    third = orchestrator.request_approval(MockGatewayRequest(), "default", {"path": "/a"}, fingerprint=fingerprint)
+    assert third != first
+
+
+def test_approval_records_are_compact():
+    """Approvals are slotted records with epoch timestamps and allowlisted headers only."""
+    orchestrator = ApprovalOrchestrator(header_allowlist=["Content-Type", "x-creds"])
+    approval_id = orchestrator.request_approval(MockGatewayRequest(), "default", {
+        "method": "POST",
+        "path": "/repos/o/r/issues",
+        "provider": "github",
+        "session_id": "abc123",
+        "headers": {"Authorization": "Bearer secret", "Content-Type": "application/json", "X-Creds": "gh", "Cookie": "c"},
+    })
+
+    approval = orchestrator.get_status(approval_id)
+    assert isinstance(approval, Approval)
+    assert not hasattr(approval, "__dict__")
+    assert isinstance(approval.timestamp, float) and isinstance(approval.expires_at, float)
+    assert approval["status"] == ApprovalStatus.PENDING.value
+    assert approval["details"]["headers"] == {"Content-Type": "application/json", "X-Creds": "gh"}
+
+    # The API shape keeps ISO timestamps and round-trips through the shared state record
+    record = approval.to_dict()
+    assert "Bearer secret" not in str(record)
+    assert record["timestamp"].startswith("20") and record["decided_at"] is None
+    assert Approval.from_dict(record).to_dict() == record
+
+    # Waiter events exist only while a thread waits
+    assert orchestrator.approval_events == {}
+    assert orchestrator.wait_for_decision(approval_id, 0.01)["status"] == ApprovalStatus.PENDING.value
+    assert approval_id in orchestrator.approval_events
+    orchestrator.deny(approval_id)
+    assert orchestrator.approval_events == {}
+    assert isinstance(approval.decided_at, float)
+    assert orchestrator.wait_for_approval(approval_id, timeout_seconds=1) is False
+
+
+def test_concurrent_request_approve_deny_wait():
+    """Thousands of concurrent request/decide/wait cycles stay consistent."""
+    import threading
+    import queue
+
+    # Every racing second decision logs "already decided": keep the output readable
+    approvals_logger = logging.getLogger("gatewayd.approvals")
+    previous_level = approvals_logger.level
+    approvals_logger.setLevel(logging.ERROR)
+
+    orchestrator = ApprovalOrchestrator(retention_seconds=0.05)
+    orchestrator.start_sweeper()
+    decisions = queue.Queue()
+    errors = []
+    cycles_per_worker = 200
+    workers = 16
+
+    def decider():
+        while True:
+            item = decisions.get()
+            if item is None:
+                return
+            approval_id, approve = item
+            if approve:
+                orchestrator.approve(approval_id)
+            else:
+                orchestrator.deny(approval_id)
+            # Racing second decision must be a no-op
+            orchestrator.deny(approval_id)
+
+    def worker(index):
+        gateway_req = MockGatewayRequest()
+        for cycle in range(cycles_per_worker):
+            approval_id = orchestrator.request_approval(gateway_req, f"tenant-{index % 4}", {"method": "POST", "path": "/x"})
+            seen = []
+            callback_ran = threading.Event()
+
+            def callback(_id, status):
+                seen.append(status)
+                callback_ran.set()
+
+            orchestrator.on_decision(approval_id, callback)
+            approve = (index + cycle) % 2 == 0
+            decisions.put((approval_id, approve))
+            if orchestrator.wait_for_approval(approval_id, timeout_seconds=10) != approve:
+                errors.append(approval_id)
+            if not callback_ran.wait(timeout=10) or len(seen) != 1:
+                errors.append(approval_id)
+
+    deciders = [threading.Thread(target=decider) for _ in range(4)]
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+
+    started = time.monotonic()
+    try:
+        for thread in deciders + threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for _ in deciders:
+            decisions.put(None)
+        for thread in deciders:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        orchestrator.stop_sweeper()
+        approvals_logger.setLevel(previous_level)
+
+    total = workers * cycles_per_worker
+    print(f"  {total} approval cycles in {elapsed:.2f}s ({total / elapsed:.0f} cycles/s)")
+    assert errors == []
+
+
 if __name__ == "__main__":
     test_approval_request_creation()
     print("✓ test_approval_request_creation")
@@ -124,6 +412,9 @@ if __name__ == "__main__":
     test_approval_approval()
     print("✓ test_approval_approval")
 
+    test_async_waits_do_not_accumulate_callbacks()
+    print("✓ test_async_waits_do_not_accumulate_callbacks")
+
     test_approval_denial()
     print("✓ test_approval_denial")
 
@@ -133,4 +424,28 @@ if __name__ == "__main__":
     test_wait_for_approval_denied()
     print("✓ test_wait_for_approval_denied")
 
+    test_wait_for_decision_does_not_expire()
+    print("✓ test_wait_for_decision_does_not_expire")
+
+    test_cleanup_expires_overdue_pending_approvals()
+    print("✓ test_cleanup_expires_overdue_pending_approvals")
+
+    test_sweeper_expires_in_background()
+    print("✓ test_sweeper_expires_in_background")
+
+    test_decided_records_are_evicted()
+    print("✓ test_decided_records_are_evicted")
+
+    test_memory_stays_flat_with_sweeper()
+    print("✓ test_memory_stays_flat_with_sweeper")
+
+    test_identical_pending_writes_coalesce()
+    print("✓ test_identical_pending_writes_coalesce")
+
+    test_approval_records_are_compact()
+    print("✓ test_approval_records_are_compact")
+
+    test_concurrent_request_approve_deny_wait()
+    print("✓ test_concurrent_request_approve_deny_wait")
+
     print("\nAll approval tests passed!")
@@ -0,0 +1,214 @@
+"""Tests for the ASGI serving mode."""
+
+import asyncio
+import sys
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from gatewayd.approvals import ApprovalOrchestrator
+from gatewayd.asgi import create_asgi_app
+from gatewayd.state import SQLiteStateBackend
+from asgi_client import asgi_request
+from fake_upstream import FakeUpstream
+
+
+class MockGatewayRequest:
+    """Mock gateway request for testing."""
+    def __init__(self):
+        self.id = "test-req-123"
+
+
+def make_app(upstream_url):
+    """Build an ASGI app whose github provider points at a fake upstream."""
+    app = create_asgi_app()
+    app.gateway.http_proxy.base_urls["github"] = upstream_url
+    token = app.gateway.session_manager.create_session("default")
+    headers = {"Authorization": f"Bearer {token}", "X-Provider": "github"}
+    return app, headers
+
+
+async def wait_until(predicate, timeout=2.0):
+    """Poll (without blocking the loop) until predicate() is true or timeout expires."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+def test_read_is_forwarded():
+    """Reads go straight through to the upstream; unknown routes and methods are refused."""
+    async def run():
+        with FakeUpstream() as upstream:
+            app, headers = make_app(upstream.url)
+
+            response = await asgi_request(app, "GET", "/api/v1/proxy/repos/owner/repo", headers)
+            assert response.status_code == 200
+            assert response.json["path"] == "/repos/owner/repo"
+
+            assert (await asgi_request(app, "GET", "/api/v1/proxy/repos/owner/repo")).status_code == 401
+            assert (await asgi_request(app, "GET", "/nope")).status_code == 404
+            assert (await asgi_request(app, "DELETE", "/health")).status_code == 405
+
+            metrics = (await asgi_request(app, "GET", "/metrics")).json
+            assert "async_pool" in metrics["proxy"]
+
+    asyncio.run(run())
+
+
+def test_session_new():
+    """Enrollment issues a session token usable on the proxy endpoint."""
+    async def run():
+        with FakeUpstream() as upstream:
+            app, _ = make_app(upstream.url)
+
+            response = await asgi_request(
+                app, "POST", "/session/new",
+                body=b'{"tenant_id": "default", "enrollment_secret": "test-secret-123"}',
+            )
+            assert response.status_code == 201
+            token = response.json["session_token"]
+
+            headers = {"Authorization": f"Bearer {token}", "X-Provider": "github"}
+            assert (await asgi_request(app, "GET", "/api/v1/proxy/user", headers)).status_code == 200
+            assert (await asgi_request(app, "POST", "/session/new", body=b"{}")).status_code == 400
+
+    asyncio.run(run())
+
+
+def test_approval_waits_park_coroutines():
+    """Many writes waiting for approval hold no threads, and run or fail on decision."""
+    async def run():
+        with FakeUpstream() as upstream:
+            app, headers = make_app(upstream.url)
+            orchestrator = app.gateway.approval_orchestrator
+            # Blocking store calls share a small executor; waiters hold no thread
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=4))
+            threads_before = threading.active_count()
+
+            writes = [
+                asyncio.create_task(asgi_request(
+                    app, "POST", f"/api/v1/proxy/repos/owner/repo/issues/{i}/comments", headers, body=b"{}",
+                ))
+                for i in range(50)
+            ]
+            assert await wait_until(lambda: orchestrator.get_stats()["pending"] == 50)
+            assert threading.active_count() <= threads_before + 4
+            assert upstream.requests == []
+
+            for i, approval_id in enumerate(list(orchestrator.approvals)):
+                decision = "approve" if i % 2 == 0 else "deny"
+                await asgi_request(app, "POST", f"/approvals/{approval_id}/{decision}", body=b"{}")
+
+            statuses = sorted(response.status_code for response in await asyncio.gather(*writes))
+            assert statuses == [200] * 25 + [403] * 25
+            assert len(upstream.requests) == 25
+
+    asyncio.run(run())
+
+
+def test_async_mode_resume_and_long_poll():
+    """Parked writes resume after approval; long-polls wake on the decision."""
+    async def run():
+        with FakeUpstream() as upstream:
+            app, headers = make_app(upstream.url)
+            headers["Prefer"] = "respond-async"
+
+            response = await asgi_request(app, "POST", "/api/v1/proxy/repos/owner/repo/issues", headers, body=b"x" * 2048)
+            assert response.status_code == 202
+            approval_id = response.json["approval_id"]
+            resume_url = response.json["resume_url"]
+            assert response.headers["location"] == resume_url
+
+            short = await asgi_request(app, "GET", f"/approvals/{approval_id}/wait", query="timeout=0.05")
+            assert short.json["status"] == "pending"
+
+            long_poll = asyncio.create_task(asgi_request(app, "GET", f"/approvals/{approval_id}/wait", query="timeout=5"))
+            events = asyncio.create_task(asgi_request(app, "GET", f"/approvals/{approval_id}/events", query="timeout=5"))
+            await asyncio.sleep(0.05)
+            assert (await asgi_request(app, "POST", resume_url, headers)).status_code == 202
+
+            await asgi_request(app, "POST", f"/approvals/{approval_id}/approve", body=b"{}")
+            assert (await asyncio.wait_for(long_poll, 1)).json["status"] == "approved"
+            stream = await asyncio.wait_for(events, 1)
+            assert stream.headers["content-type"] == "text/event-stream"
+            assert stream.body.count(b"event: status") == 2
+            assert b'"status": "approved"' in stream.body
+
+            response = await asgi_request(app, "POST", resume_url, headers)
+            assert response.status_code == 200
+            assert response.json["body_length"] == 2048
+            assert (await asgi_request(app, "POST", resume_url, headers)).status_code == 404
+
+    asyncio.run(run())
+
+
+def test_shared_state_stays_off_the_loop():
+    """With the SQLite backend, status, long-poll, SSE, resume and timeout reads and writes run in threads."""
+    path = os.path.join(tempfile.mkdtemp(), "state.db")
+    previous = {name: os.environ.get(name) for name in ("GATEWAY_STATE_BACKEND", "GATEWAY_STATE_PATH")}
+    os.environ.update(GATEWAY_STATE_BACKEND="sqlite", GATEWAY_STATE_PATH=path)
+
+    async def run():
+        with FakeUpstream() as upstream:
+            app, headers = make_app(upstream.url)
+            headers["Prefer"] = "respond-async"
+            state = app.gateway.state
+            connect = state._conn
+            threads = set()
+
+            def recording_conn():
+                threads.add(threading.get_ident())
+                return connect()
+
+            state._conn = recording_conn
+
+            # An approval owned by another worker, read through the database
+            remote_id = ApprovalOrchestrator(state=SQLiteStateBackend(path)).request_approval(
+                MockGatewayRequest(), "default", {"method": "POST", "path": "/x"},
+            )
+            assert (await asgi_request(app, "GET", f"/approvals/{remote_id}/status")).json["status"] == "pending"
+            assert (await asgi_request(app, "GET", f"/approvals/{remote_id}/wait", query="timeout=0.05")).json["status"] == "pending"
+            assert (await asgi_request(app, "GET", f"/approvals/{remote_id}/events", query="timeout=0.05")).status_code == 200
+
+            # A parked write of our own: resume, then a sync wait that times out and expires
+            parked = await asgi_request(app, "POST", "/api/v1/proxy/repos/o/r/issues", headers, body=b"x")
+            assert (await asgi_request(app, "POST", parked.json["resume_url"], headers)).status_code == 202
+            assert not await app.gateway.approval_orchestrator.wait_for_approval_async(parked.json["approval_id"], 0.01)
+
+            assert threads
+            assert threading.get_ident() not in threads
+            app.gateway.stop()
+
+    try:
+        asyncio.run(run())
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+if __name__ == "__main__":
+    test_read_is_forwarded()
+    print("✓ test_read_is_forwarded")
+
+    test_session_new()
+    print("✓ test_session_new")
+
+    test_approval_waits_park_coroutines()
+    print("✓ test_approval_waits_park_coroutines")
+
+    test_async_mode_resume_and_long_poll()
+    print("✓ test_async_mode_resume_and_long_poll")
+
+    test_shared_state_stays_off_the_loop()
+    print("✓ test_shared_state_stays_off_the_loop")
+
+    print("\nAll ASGI tests passed!")
@@ -2,6 +2,7 @@
 
 import sys
 import os
+import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -54,6 +55,48 @@ def test_session_revocation():
     assert manager.validate_token(token) is None
 
 
+def test_session_records_are_compact():
+    """Sessions are slotted records with epoch timestamps that still read like dicts."""
+    manager = SessionManager()
+    token = manager.create_session("".join(["def", "ault"]), ttl_seconds=60)
+
+    session = manager.validate_token(token)
+    assert session["tenant_id"] == "default"
+    assert session.get("missing") is None
+    assert not hasattr(session, "__dict__")
+    assert session.expires_at - session.created_at == 60
+    assert abs(session.created_at - time.time()) < 5
+    # Tenant ids are shared between sessions
+    other = manager.validate_token(manager.create_session("".join(["defa", "ult"])))
+    assert other.tenant_id is session.tenant_id
+
+
+def test_expired_sessions_are_evicted():
+    """Abandoned sessions are dropped without being presented again."""
+    manager = SessionManager()
+    for _ in range(5):
+        manager.create_session("default", ttl_seconds=-1)
+    revoked = manager.create_session("default", ttl_seconds=-1)
+    manager.revoke_session(revoked)
+    live = manager.create_session("default")
+
+    # create_session evicted the overdue ones
+    assert list(manager.sessions) == [live]
+    assert manager.get_stats()["evicted"] == 5
+
+    manager.start_sweeper()
+    try:
+        short = manager.create_session("default", ttl_seconds=0.2)
+        assert short in manager.sessions
+        deadline = time.time() + 5
+        while short in manager.sessions and time.time() < deadline:
+            time.sleep(0.05)
+        assert short not in manager.sessions
+        assert live in manager.sessions
+    finally:
+        manager.stop_sweeper()
+
+
 if __name__ == "__main__":
     test_session_creation()
     print("✓ test_session_creation")
@@ -67,4 +110,10 @@ if __name__ == "__main__":
     test_session_revocation()
     print("✓ test_session_revocation")
 
+    test_session_records_are_compact()
+    print("✓ test_session_records_are_compact")
+
+    test_expired_sessions_are_evicted()
+    print("✓ test_expired_sessions_are_evicted")
+
     print("\nAll auth tests passed!")
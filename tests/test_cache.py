@@ -0,0 +1,139 @@
+"""Tests for the upstream GET response cache."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from gatewayd.cache import ResponseCache, parse_cache_control
+from gatewayd.proxy import HTTPProxy
+from fake_upstream import FakeUpstream
+
+
+def make_proxy(upstream_url, **cache_kwargs):
+    """Build a proxy whose github provider points at a fake upstream."""
+    proxy = HTTPProxy(None, None, response_cache=ResponseCache(**cache_kwargs))
+    proxy.base_urls = {"github": upstream_url}
+    return proxy
+
+
+def get(proxy, path, tenant_id="acme", cred_selector="github:pat", headers=None):
+    """Forward a GET through the proxy."""
+    return proxy.forward_request("GET", path, headers or {}, None, None, "github", tenant_id, cred_selector=cred_selector)
+
+
+def etag_handler(cache_control):
+    """Route handler with a fixed ETag that answers If-None-Match with 304."""
+    def handler(record):
+        headers = {"ETag": '"v1"', "Cache-Control": cache_control}
+        if record["headers"].get("If-None-Match") == '"v1"':
+            return 304, headers, b""
+        return 200, headers, b'{"number": 1}'
+    return handler
+
+
+def test_fresh_responses_are_served_from_cache():
+    """Within max-age the upstream is not called again."""
+    with FakeUpstream() as upstream:
+        upstream.route("GET", "/repos/o/r", etag_handler("private, max-age=60"))
+        proxy = make_proxy(upstream.url)
+
+        first = get(proxy, "/repos/o/r")
+        second = get(proxy, "/repos/o/r")
+
+        assert first["headers"]["X-Gate-Cache"] == "MISS"
+        assert second["headers"]["X-Gate-Cache"] == "HIT"
+        assert second["body"] == b'{"number": 1}'
+        assert len(upstream.requests) == 1
+
+        # Agents can force an end-to-end check
+        third = get(proxy, "/repos/o/r", headers={"Cache-Control": "no-cache"})
+        assert third["headers"]["X-Gate-Cache"] == "REVALIDATED"
+        assert len(upstream.requests) == 2
+
+
+def test_stale_responses_are_revalidated():
+    """Stale entries send If-None-Match and serve the stored body on 304."""
+    with FakeUpstream() as upstream:
+        upstream.route("GET", "/repos/o/r/pulls", etag_handler("no-cache"))
+        proxy = make_proxy(upstream.url)
+
+        get(proxy, "/repos/o/r/pulls")
+        response = get(proxy, "/repos/o/r/pulls")
+
+        assert response["status_code"] == 200
+        assert response["body"] == b'{"number": 1}'
+        assert response["headers"]["X-Gate-Cache"] == "REVALIDATED"
+        assert upstream.requests[-1]["headers"]["If-None-Match"] == '"v1"'
+
+        stats = proxy.response_cache.get_stats()
+        assert stats["misses"] == 1
+        assert stats["revalidated"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+
+def test_cache_is_per_tenant_and_credential():
+    """Another tenant or credential selector never sees a cached response."""
+    with FakeUpstream() as upstream:
+        upstream.route("GET", "/user", etag_handler("max-age=60"))
+        proxy = make_proxy(upstream.url)
+
+        get(proxy, "/user")
+        get(proxy, "/user", cred_selector="github:other")
+        get(proxy, "/user", tenant_id="other")
+
+        assert len(upstream.requests) == 3
+
+
+def test_no_store_and_writes():
+    """no-store responses are not kept; a write to a URL drops its cached copy."""
+    with FakeUpstream() as upstream:
+        upstream.route("GET", "/secret", lambda record: (200, {"Cache-Control": "no-store", "ETag": '"x"'}, b"s"))
+        upstream.route("GET", "/repos/o/r/issues", etag_handler("max-age=60"))
+        proxy = make_proxy(upstream.url)
+
+        get(proxy, "/secret")
+        get(proxy, "/secret")
+        assert len(upstream.requests) == 2
+
+        get(proxy, "/repos/o/r/issues")
+        proxy.forward_request("POST", "/repos/o/r/issues", {}, b"{}", None, "github", "acme")
+        assert get(proxy, "/repos/o/r/issues")["headers"]["X-Gate-Cache"] == "MISS"
+        assert proxy.response_cache.get_stats()["invalidations"] == 1
+
+
+def test_lru_is_bounded_by_bytes():
+    """The least recently used entries are evicted to stay under max_bytes."""
+    cache = ResponseCache(max_bytes=250, max_entry_bytes=200)
+    headers = {"Cache-Control": "max-age=60"}
+    for name in ["a", "b", "c"]:
+        cache.store(("t", None, name, ""), 200, headers, {}, b"x" * 100)
+
+    assert cache.lookup(("t", None, "a", "")) is None
+    assert cache.lookup(("t", None, "c", "")) is not None
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_stats()["bytes"] == 200
+
+    # Too big for one entry
+    assert cache.store(("t", None, "d", ""), 200, headers, {}, b"x" * 201) is False
+    assert parse_cache_control('private, max-age="30"') == {"private": None, "max-age": "30"}
+
+
+if __name__ == "__main__":
+    test_fresh_responses_are_served_from_cache()
+    print("✓ test_fresh_responses_are_served_from_cache")
+
+    test_stale_responses_are_revalidated()
+    print("✓ test_stale_responses_are_revalidated")
+
+    test_cache_is_per_tenant_and_credential()
+    print("✓ test_cache_is_per_tenant_and_credential")
+
+    test_no_store_and_writes()
+    print("✓ test_no_store_and_writes")
+
+    test_lru_is_bounded_by_bytes()
+    print("✓ test_lru_is_bounded_by_bytes")
+
+    print("\nAll cache tests passed!")
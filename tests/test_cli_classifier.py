@@ -0,0 +1,124 @@
+"""Tests for the shared CLI command classifier."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ssh-gw"))
+
+from gatewayd.cli_classifier import CommandClassifier, classify_command
+
+
+def test_global_flags_are_skipped():
+    """Flags and their values before the subcommand do not hide it."""
+    assert classify_command("aws", ["--region", "us-east-1", "s3", "rm", "s3://bucket/key"]) == "write"
+    assert classify_command("aws", ["--profile=prod", "ec2", "describe-instances"]) == "read"
+    assert classify_command("kubectl", ["-n", "prod", "delete", "pod", "web-0"]) == "write"
+    assert classify_command("kubectl", ["get", "pods", "-n", "delete"]) == "read"
+    assert classify_command("gcloud", ["--project", "p", "compute", "instances", "delete", "vm"]) == "write"
+    assert classify_command("gh", ["-R", "o/r", "issue", "view", "3"]) == "read"
+
+
+def test_nested_command_trees():
+    """Subcommands are found at any depth."""
+    assert classify_command("aws", ["s3", "ls"]) == "read"
+    assert classify_command("aws", ["ec2", "run-instances"]) == "write"
+    assert classify_command("kubectl", ["rollout", "status", "deploy/web"]) == "read"
+    assert classify_command("kubectl", ["rollout", "restart", "deploy/web"]) == "write"
+    assert classify_command("gcloud", ["deployment-manager", "deployments", "list"]) == "read"
+    assert classify_command("gh", ["pr", "create", "--title", "x"]) == "write"
+    assert classify_command("gh", ["run", "list"]) == "read"
+    assert classify_command("gh", ["workflow", "run", "ci.yml"]) == "write"
+    assert classify_command("terraform", ["-chdir=infra", "apply"]) == "write"
+    assert classify_command("terraform", ["plan", "-destroy"]) == "read"
+    assert classify_command("terraform", ["state", "rm", "aws_instance.x"]) == "write"
+
+
+def test_flag_rules():
+    """curl and gh api are classified by method and body flags."""
+    assert classify_command("curl", ["-sSL", "-H", "X-Mode: -d", "https://x"]) == "read"
+    assert classify_command("curl", ["-XPOST", "https://x"]) == "write"
+    assert classify_command("curl", ["--request=GET", "https://x"]) == "read"
+    assert classify_command("curl", ["-d", "a=1", "https://x"]) == "write"
+    assert classify_command("gh", ["api", "repos/o/r"]) == "read"
+    assert classify_command("gh", ["api", "-X", "DELETE", "repos/o/r"]) == "write"
+    assert classify_command("gh", ["api", "repos/o/r/issues", "-f", "title=x"]) == "write"
+
+
+def test_unknown_gh_and_gcloud_verbs_are_writes():
+    """Only known read verbs are reads; compound and unlisted verbs need approval."""
+    for args in [
+        ["release", "delete-asset", "v1.0", "app.zip"],
+        ["pr", "update-branch", "12"],
+        ["project", "item-delete", "1", "--id", "x"],
+        ["project", "field-create", "1", "--name", "x"],
+        ["issue", "develop", "12"],
+        ["label", "clone", "o/other"],
+    ]:
+        assert classify_command("gh", args) == "write", args
+    for args in [
+        ["storage", "rm", "gs://bucket/key"],
+        ["storage", "cp", "file", "gs://bucket/key"],
+        ["pubsub", "topics", "publish", "t", "--message", "x"],
+        ["compute", "instances", "attach-disk", "vm", "--disk", "d"],
+        ["sql", "instances", "restart", "db"],
+        ["container", "clusters", "upgrade", "c"],
+    ]:
+        assert classify_command("gcloud", args) == "write", args
+
+    assert classify_command("gh", ["repo", "clone", "o/r"]) == "read"
+    assert classify_command("gh", ["label", "list"]) == "read"
+    assert classify_command("gcloud", ["storage", "ls", "gs://bucket"]) == "read"
+    assert classify_command("gcloud", ["container", "clusters", "get-credentials", "c"]) == "read"
+    assert classify_command("gcloud", ["--version"]) == "read"
+
+
+def test_bundled_short_flags():
+    """Value flags inside a cluster of short flags are still seen."""
+    assert classify_command("curl", ["-sd", "x=1", "https://x"]) == "write"
+    assert classify_command("curl", ["-sSX", "POST", "https://x"]) == "write"
+    assert classify_command("curl", ["-sSXGET", "https://x"]) == "read"
+    assert classify_command("kubectl", ["-nprod", "delete", "pod", "web-0"]) == "write"
+
+
+def test_defaults():
+    """No arguments is a read; unknown tools and kubectl verbs are writes."""
+    assert classify_command("kubectl", []) == "read"
+    assert classify_command("kubectl", ["frobnicate"]) == "write"
+    assert classify_command("unknown-tool", ["list"]) == "write"
+    assert CommandClassifier().classify_command_line("gcp", "compute instances list --filter='name ~ x'") == "read"
+
+
+def test_wrappers_use_shared_classifier():
+    """ssh-gw wrappers delegate to the same classifier."""
+    from wrappers.aws_wrapper import AWSWrapper
+    from wrappers.kubectl_wrapper import KubectlWrapper
+    from wrappers.base import ActionType
+
+    assert AWSWrapper(["--region", "us-east-1", "s3", "rm", "s3://b/k"]).classify_action() == ActionType.WRITE
+    assert KubectlWrapper(["-n", "prod", "get", "pods"]).classify_action() == ActionType.READ
+
+
+if __name__ == "__main__":
+    test_global_flags_are_skipped()
+    print("✓ test_global_flags_are_skipped")
+
+    test_nested_command_trees()
+    print("✓ test_nested_command_trees")
+
+    test_flag_rules()
+    print("✓ test_flag_rules")
+
+    test_unknown_gh_and_gcloud_verbs_are_writes()
+    print("✓ test_unknown_gh_and_gcloud_verbs_are_writes")
+
+    test_bundled_short_flags()
+    print("✓ test_bundled_short_flags")
+
+    test_defaults()
+    print("✓ test_defaults")
+
+    test_wrappers_use_shared_classifier()
+    print("✓ test_wrappers_use_shared_classifier")
+
+    print("\nAll CLI classifier tests passed!")
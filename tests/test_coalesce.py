@@ -0,0 +1,204 @@
+"""Tests for single-flight coalescing of upstream reads."""
+
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from gatewayd.coalesce import SingleFlight, SharedStream, SlowReaderError
+from gatewayd.proxy import HTTPProxy
+from fake_upstream import FakeUpstream
+
+
+class ClosableChunks:
+    """Chunk iterator that records whether it was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.closed = False
+
+    def __iter__(self):
+        return self.chunks
+
+    def close(self):
+        self.closed = True
+
+
+def wait_until(predicate, timeout=2.0):
+    """Poll until predicate() is true or timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def run_concurrently(count, fn):
+    """Run fn in count threads and return their results."""
+    results = [None] * count
+
+    def worker(i):
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_reads_share_one_upstream_call():
+    """Ten identical GETs in flight at once reach the upstream once."""
+    with FakeUpstream() as upstream:
+        release = threading.Event()
+        upstream.route("GET", "/repos/x/y/pulls", lambda record: (release.wait(5) and 200, {}, b"[1, 2]"))
+        proxy = HTTPProxy(None, None)
+        proxy.base_urls = {"github": upstream.url}
+
+        threads, results = run_concurrently(10, lambda: proxy.forward_request(
+            "GET", "/repos/x/y/pulls", {}, None, None, "github", "acme",
+        ))
+        assert wait_until(lambda: proxy.single_flight.get_stats()["coalesced"] == 9)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(upstream.requests) == 1
+        assert all(result["body"] == b"[1, 2]" for result in results)
+        # Each caller gets its own headers dict
+        assert len({id(result["headers"]) for result in results}) == 10
+
+        # Different Accept headers are different reads
+        proxy.forward_request("GET", "/repos/x/y/pulls", {"Accept": "application/vnd.github.raw"}, None, None, "github", "acme")
+        assert len(upstream.requests) == 2
+
+
+def test_streaming_fan_out():
+    """Concurrent streaming readers all receive the full body from one upstream call."""
+    with FakeUpstream() as upstream:
+        release = threading.Event()
+
+        def chunks():
+            release.wait(5)
+            for i in range(5):
+                yield bytes([65 + i]) * 1000
+
+        upstream.route("GET", "/archive", lambda record: (200, {}, chunks()))
+        proxy = HTTPProxy(None, None)
+        proxy.base_urls = {"github": upstream.url}
+        proxy.stream_chunk_size = 256
+
+        threads, results = run_concurrently(3, lambda: b"".join(proxy.forward_request(
+            "GET", "/archive", {}, None, None, "github", "acme", stream=True,
+        )["body"]))
+        assert wait_until(lambda: proxy.single_flight.get_stats()["coalesced"] == 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        expected = b"".join(bytes([65 + i]) * 1000 for i in range(5))
+        assert results == [expected] * 3
+        assert len(upstream.requests) == 1
+        assert proxy.single_flight.get_stats()["stream_joins"] == 2
+        assert proxy.single_flight.get_stats()["in_flight"] == 0
+
+
+def test_shared_stream_bounds_buffer():
+    """Past max_buffer no one can join and passed chunks are dropped; the last reader closes the source."""
+    source = ClosableChunks([b"a" * 10, b"b" * 10, b"c" * 10, b"d" * 10])
+    closed_to_joiners = []
+    shared = SharedStream(source, max_buffer=15, on_closed=lambda: closed_to_joiners.append(True))
+
+    first = iter(shared.reader())
+    second = iter(shared.reader())
+    assert next(first) == b"a" * 10
+    assert next(second) == b"a" * 10
+    assert next(first) == b"b" * 10
+    assert closed_to_joiners == [True]
+    assert shared.reader() is None
+
+    # Chunks the slower reader still needs are retained, passed ones dropped
+    assert shared._base == 1
+    assert not source.closed
+
+    # A departing reader releases what only it was holding back
+    first.close()
+    assert not source.closed
+    assert b"".join(second) == b"b" * 10 + b"c" * 10 + b"d" * 10
+    assert source.closed
+
+
+def test_stalled_reader_is_detached():
+    """A reader that stalls is detached instead of holding the whole body in memory."""
+    source = ClosableChunks([bytes([65 + i]) * 10 for i in range(20)])
+    shared = SharedStream(source, max_buffer=25)
+
+    stalled = iter(shared.reader())
+    fast = iter(shared.reader())
+    received = []
+    for chunk in fast:
+        received.append(chunk)
+        assert shared._retained <= 25
+    assert b"".join(received) == b"".join(bytes([65 + i]) * 10 for i in range(20))
+    assert source.closed
+
+    try:
+        next(stalled)
+        assert False, "expected SlowReaderError"
+    except SlowReaderError:
+        pass
+
+
+def test_leader_errors_reach_waiters():
+    """A failed upstream call is raised to every coalesced caller."""
+    flight = SingleFlight(enabled=True)
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing_fetch():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", failing_fetch)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    assert wait_until(lambda: flight.get_stats()["coalesced"] == 1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert errors == ["upstream down", "upstream down"]
+    assert flight.get_stats()["in_flight"] == 0
+
+
+if __name__ == "__main__":
+    test_concurrent_reads_share_one_upstream_call()
+    print("✓ test_concurrent_reads_share_one_upstream_call")
+
+    test_streaming_fan_out()
+    print("✓ test_streaming_fan_out")
+
+    test_shared_stream_bounds_buffer()
+    print("✓ test_shared_stream_bounds_buffer")
+
+    test_stalled_reader_is_detached()
+    print("✓ test_stalled_reader_is_detached")
+
+    test_leader_errors_reach_waiters()
+    print("✓ test_leader_errors_reach_waiters")
+
+    print("\nAll coalescing tests passed!")
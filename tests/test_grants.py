@@ -0,0 +1,136 @@
+"""Tests for approval grants."""
+
+import sys
+import os
+import json
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.approvals import ApprovalOrchestrator
+from gatewayd.grants import GrantTable, session_key
+
+
+def make_table():
+    """Grant table backed by a throwaway rules file."""
+    rules_file = os.path.join(tempfile.mkdtemp(), "approval_rules.json")
+    return GrantTable(rules_file=rules_file), rules_file
+
+
+def test_duration_grant_is_session_scoped():
+    """A timed grant covers the same session, provider, method and path only."""
+    table, _ = make_table()
+    table.grant("default", "s1", "github", "POST", "/repos/o/r/issues", duration_minutes=30)
+
+    assert table.is_granted("default", "s1", "github", "POST", "repos/o/r/issues") is True
+    assert table.is_granted("default", "s2", "github", "POST", "repos/o/r/issues") is False
+    assert table.is_granted("default", "s1", "github", "DELETE", "repos/o/r/issues") is False
+    assert table.is_granted("other", "s1", "github", "POST", "repos/o/r/issues") is False
+
+
+def test_grant_expires():
+    """Expired grants no longer match."""
+    table, _ = make_table()
+    table.grant("default", "s1", "github", "POST", "/repos/o/r/issues", duration_minutes=0.001)
+
+    assert table.is_granted("default", "s1", "github", "POST", "/repos/o/r/issues") is True
+    time.sleep(0.1)
+    assert table.is_granted("default", "s1", "github", "POST", "/repos/o/r/issues") is False
+
+
+def test_pattern_grant():
+    """Wildcard grants match any path under the pattern."""
+    table, _ = make_table()
+    table.grant("default", "s1", "github", "PATCH", "/repos/o/r/issues/*", duration_minutes=30)
+
+    assert table.is_granted("default", "s1", "github", "PATCH", "repos/o/r/issues/12") is True
+    assert table.is_granted("default", "s1", "github", "PATCH", "repos/o/other/issues/12") is False
+
+
+def test_always_grant_persists_and_reloads():
+    """Always-approve grants are tenant-wide and survive a restart."""
+    table, rules_file = make_table()
+    table.grant("default", "s1", "slack", "POST", "chat.postMessage", always=True)
+
+    assert table.is_granted("default", "s2", "slack", "POST", "chat.postMessage") is True
+    with open(rules_file) as f:
+        assert json.load(f) == [
+            {"tenant_id": "default", "provider": "slack", "method": "POST", "path": "chat.postMessage"}
+        ]
+
+    reloaded = GrantTable(rules_file=rules_file)
+    assert reloaded.is_granted("default", None, "slack", "POST", "/chat.postMessage") is True
+
+
+def test_approve_with_duration_creates_grant():
+    """ApprovalOrchestrator.approve(duration_minutes=...) records a grant."""
+    table, _ = make_table()
+    orchestrator = ApprovalOrchestrator(grant_table=table)
+
+    class Req:
+        id = "req-1"
+
+    sid = session_key("agent-token")
+    approval_id = orchestrator.request_approval(
+        Req(), "default", {"method": "POST", "path": "repos/o/r/issues", "provider": "github", "session_id": sid},
+    )
+    orchestrator.approve(approval_id, duration_minutes=30)
+
+    assert table.is_granted("default", sid, "github", "POST", "repos/o/r/issues") is True
+    assert table.get_stats()["exact"] == 1
+
+
+def test_failed_grant_still_wakes_waiters():
+    """A grant that cannot be saved does not leave the approved request waiting."""
+    import threading
+
+    rules_file = os.path.join(tempfile.mkdtemp(), "missing-dir", "approval_rules.json")
+    orchestrator = ApprovalOrchestrator(grant_table=GrantTable(rules_file=rules_file))
+
+    class Req:
+        id = "req-1"
+
+    fingerprint = "f" * 64
+    approval_id = orchestrator.request_approval(
+        Req(), "default", {"method": "POST", "path": "chat.postMessage", "provider": "slack"}, fingerprint=fingerprint,
+    )
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(orchestrator.wait_for_approval(approval_id, timeout_seconds=5)))
+    waiter.start()
+    time.sleep(0.05)
+
+    try:
+        orchestrator.approve(approval_id, always=True)
+        assert False, "expected the grant save to fail"
+    except OSError:
+        pass
+    waiter.join(timeout=2)
+
+    assert results == [True]
+    # The fingerprint was released, so the same write needs a new approval
+    assert orchestrator.request_approval(
+        Req(), "default", {"method": "POST", "path": "chat.postMessage", "provider": "slack"}, fingerprint=fingerprint,
+    ) != approval_id
+
+
+if __name__ == "__main__":
+    test_duration_grant_is_session_scoped()
+    print("✓ test_duration_grant_is_session_scoped")
+
+    test_grant_expires()
+    print("✓ test_grant_expires")
+
+    test_pattern_grant()
+    print("✓ test_pattern_grant")
+
+    test_always_grant_persists_and_reloads()
+    print("✓ test_always_grant_persists_and_reloads")
+
+    test_approve_with_duration_creates_grant()
+    print("✓ test_approve_with_duration_creates_grant")
+
+    test_failed_grant_still_wakes_waiters()
+    print("✓ test_failed_grant_still_wakes_waiters")
+
+    print("\nAll grant tests passed!")
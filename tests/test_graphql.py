@@ -0,0 +1,88 @@
+"""Tests for GraphQL operation classification."""
+
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.graphql import GraphQLClassifier, GraphQLParseError, parse_operations
+
+
+def body(query, operation_name=None):
+    """Encode a GraphQL POST body."""
+    payload = {"query": query}
+    if operation_name:
+        payload["operationName"] = operation_name
+    return json.dumps(payload).encode()
+
+
+def test_parse_operations_top_level_only():
+    """Keywords in strings, comments and selection sets are not operations."""
+    document = '''
+        # mutation in a comment
+        query Issues($first: Int = 10) @cached {
+          issues(first: $first, filter: "mutation { x }") { nodes { id mutation } }
+        }
+        fragment F on Issue { id }
+        mutation Close { issueUpdate(id: "1") { success } }
+    '''
+    assert parse_operations(document) == (("query", "Issues"), ("mutation", "Close"))
+    assert parse_operations("{ viewer { login } }") == (("query", None),)
+    assert parse_operations("subscription @live { events { id } }") == (("subscription", None),)
+
+
+def test_parse_operations_rejects_malformed():
+    """Anything that does not parse raises GraphQLParseError."""
+    for document in ["", "query", "mutation { a", "{ a } }", "foo { a }", '{ a(s: "x) }']:
+        try:
+            parse_operations(document)
+        except GraphQLParseError:
+            continue
+        raise AssertionError(f"parsed {document!r}")
+
+
+def test_classify_reads_and_writes():
+    """Queries are reads; mutations, subscriptions and unknowns are not."""
+    classifier = GraphQLClassifier()
+    document = "query Q { a } mutation M { b }"
+
+    assert classifier.classify(body("{ viewer { login } }")) == "read"
+    assert classifier.classify(body("mutation { createIssue { id } }")) == "write"
+    assert classifier.classify(body("subscription { events { id } }")) == "write"
+    assert classifier.classify(body(document, "Q")) == "read"
+    assert classifier.classify(body(document, "M")) == "write"
+    assert classifier.classify(body(document)) == "write"
+    assert classifier.classify(body(document, "Missing")) is None
+    assert classifier.classify(b"not json") is None
+    assert classifier.classify(b'{"variables": {}}') is None
+    batch = json.dumps([{"query": "{ a }"}, {"query": "mutation { b }"}]).encode()
+    assert classifier.classify(batch) == "write"
+
+
+def test_parsed_documents_are_cached():
+    """Repeated documents hit the LRU; the oldest entry is evicted first."""
+    classifier = GraphQLClassifier(cache_size=2)
+    for query in ["{ a }", "{ a }", "{ b }", "{ c }", "{ a }"]:
+        classifier.classify(body(query))
+
+    stats = classifier.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+    assert stats["size"] == 2
+
+
+if __name__ == "__main__":
+    test_parse_operations_top_level_only()
+    print("✓ test_parse_operations_top_level_only")
+
+    test_parse_operations_rejects_malformed()
+    print("✓ test_parse_operations_rejects_malformed")
+
+    test_classify_reads_and_writes()
+    print("✓ test_classify_reads_and_writes")
+
+    test_parsed_documents_are_cached()
+    print("✓ test_parsed_documents_are_cached")
+
+    print("\nAll GraphQL tests passed!")
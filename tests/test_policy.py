@@ -2,11 +2,16 @@
 
 import sys
 import os
+import json
+import io
+import tempfile
+import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from gatewayd.policy import PolicyEngine, SecurityMode
+from gatewayd.policy import PolicyEngine, SecurityMode, CompiledPolicy, DecisionCache
 from gatewayd.app import ActionType
+from gatewayd.policy_replay import replay
 
 
 def test_read_never_requires_approval():
@@ -75,6 +80,225 @@ def test_cli_classification_kubectl():
     assert policy.classify_cli_command("kubectl", "delete") == "write"
 
 
+def test_compiled_policy_matches_exceptions():
+    """Compiled index honours provider, methods, path patterns and order."""
+    compiled = CompiledPolicy({
+        "mode": "cautious",
+        "exceptions": [
+            {"id": "gh-issues", "provider": "github", "methods": ["POST"], "paths": ["/repos/*/issues"]},
+            {"provider": "github", "methods": ["POST", "PATCH"], "paths": ["/repos/*"]},
+            {"id": "any-slack", "provider": "slack"},
+            {"id": "any-provider", "methods": ["DELETE"], "paths": ["/tmp/*"]},
+        ],
+    })
+
+    assert compiled.match("github", "POST", "/repos/o/r/issues") == "gh-issues"
+    assert compiled.match("github", "PATCH", "/repos/o/r/issues") == "exception[1]"
+    assert compiled.match("github", "PUT", "/repos/o/r/issues") is None
+    assert compiled.match("gitlab", "POST", "/repos/o/r/issues") is None
+    assert compiled.match("slack", "POST", "chat.postMessage") == "any-slack"
+    assert compiled.match("datadog", "DELETE", "/tmp/x") == "any-provider"
+    assert compiled.match("datadog", "POST", "/tmp/x") is None
+
+
+def test_cautious_mode_uses_exceptions():
+    """In cautious mode, matching writes skip approval."""
+    policy = PolicyEngine()
+    policy.tenant_policies["cautious-test"] = {
+        "mode": "cautious",
+        "exceptions": [{"provider": "github", "methods": ["POST"], "paths": ["/repos/*/pulls"]}],
+    }
+    policy.compiled_policies["cautious-test"] = CompiledPolicy(policy.tenant_policies["cautious-test"])
+
+    assert policy.requires_approval("cautious-test", ActionType.WRITE, "github", "POST", "/repos/o/r/pulls") is False
+    assert policy.requires_approval("cautious-test", ActionType.WRITE, "github", "DELETE", "/repos/o/r/pulls") is True
+
+
+def _write_policies(path, mode):
+    """Write a one-tenant policy file."""
+    with open(path, "w") as f:
+        json.dump({"acme": {"mode": mode, "exceptions": [{"provider": "github", "methods": ["POST"]}]}}, f)
+
+
+def test_reload_swaps_snapshot_and_keeps_old_on_error():
+    """Reload publishes a new version; a broken file leaves the old one active."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policies.json")
+        _write_policies(path, "strict")
+        os.environ["POLICY_CONFIG_FILE"] = path
+        try:
+            policy = PolicyEngine()
+        finally:
+            del os.environ["POLICY_CONFIG_FILE"]
+
+        assert policy.requires_approval("acme", ActionType.WRITE, "github", "POST", "/x") is True
+        assert policy.version == 1
+
+        _write_policies(path, "cautious")
+        assert policy.reload_policies() is True
+        assert policy.version == 2
+        assert policy.requires_approval("acme", ActionType.WRITE, "github", "POST", "/x") is False
+
+        with open(path, "w") as f:
+            f.write("{not json")
+        assert policy.reload_policies() is False
+        stats = policy.get_stats()
+        assert stats["version"] == 2
+        assert stats["errors"] == 1
+        assert "JSONDecodeError" in stats["last_error"]
+        assert policy.requires_approval("acme", ActionType.WRITE, "github", "POST", "/x") is False
+
+
+def test_watcher_reloads_changed_file():
+    """The background watcher picks up edits to the policy file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policies.json")
+        _write_policies(path, "strict")
+        os.environ["POLICY_CONFIG_FILE"] = path
+        try:
+            policy = PolicyEngine()
+        finally:
+            del os.environ["POLICY_CONFIG_FILE"]
+
+        policy.start_watcher(interval=0.05)
+        try:
+            _write_policies(path, "cautious")
+            deadline = time.time() + 5
+            while policy.version == 1 and time.time() < deadline:
+                time.sleep(0.02)
+            assert policy.version == 2
+            assert policy.compiled_policies["acme"].mode == "cautious"
+            assert policy.get_stats()["last_reload_ms"] is not None
+        finally:
+            policy.stop_watcher()
+
+
+def test_decision_cache_hits_and_invalidates_on_reload():
+    """Repeated decisions come from the cache until the policy version changes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policies.json")
+        _write_policies(path, "cautious")
+        os.environ["POLICY_CONFIG_FILE"] = path
+        try:
+            policy = PolicyEngine(cache_size=16)
+        finally:
+            del os.environ["POLICY_CONFIG_FILE"]
+
+        # Proxy paths arrive without a leading slash; both forms share one entry
+        assert policy.requires_approval("acme", ActionType.WRITE, "github", "POST", "repos/o/r/pulls") is False
+        assert policy.requires_approval("acme", ActionType.WRITE, "github", "POST", "/repos/o/r/pulls") is False
+        stats = policy.decision_cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+        _write_policies(path, "strict")
+        policy.reload_policies()
+        assert policy.requires_approval("acme", ActionType.WRITE, "github", "POST", "/repos/o/r/pulls") is True
+        assert policy.decision_cache.get_stats()["invalidations"] == 1
+
+
+def test_decision_cache_is_bounded_lru():
+    """The least recently used decision is evicted first; stale versions are ignored."""
+    cache = DecisionCache(max_entries=2)
+    cache.put(1, ("t", "p", "POST", "/a"), True)
+    cache.put(1, ("t", "p", "POST", "/b"), False)
+    assert cache.get(1, ("t", "p", "POST", "/a")) is True
+    cache.put(1, ("t", "p", "POST", "/c"), True)
+
+    assert cache.get(1, ("t", "p", "POST", "/b")) is None
+    assert cache.get(1, ("t", "p", "POST", "/a")) is True
+    assert cache.get_stats()["evictions"] == 1
+
+    cache.put(2, ("t", "p", "POST", "/a"), False)
+    cache.put(1, ("t", "p", "POST", "/a"), True)
+    assert cache.get(2, ("t", "p", "POST", "/a")) is False
+    assert cache.get_stats()["size"] == 1
+
+
+def test_evaluate_batch_counts_by_rule():
+    """Batch evaluation tallies approvals and exemptions, with a mode override."""
+    policy = PolicyEngine(cache_size=0)
+    policy.tenant_policies["acme"] = {
+        "mode": "strict",
+        "exceptions": [
+            {"id": "prs", "provider": "github", "methods": ["POST"], "paths": ["/repos/*/pulls"]},
+            {"id": "issues", "provider": "github", "paths": ["/repos/*/issues"]},
+        ],
+    }
+    policy.compiled_policies["acme"] = CompiledPolicy(policy.tenant_policies["acme"])
+    records = [
+        ("acme", "github", "GET", "repos/o/r/pulls"),
+        ("acme", "github", "post", "repos/o/r/pulls"),
+        ("acme", "github", "POST", "repos/o/r/pulls"),
+        ("acme", "github", "PATCH", "repos/o/r/issues"),
+        ("acme", "github", "DELETE", "repos/o/r"),
+    ]
+
+    strict = policy.evaluate_batch(records)
+    assert strict["reads"] == 1 and strict["writes"] == 4
+    assert strict["approvals"] == 4
+    assert strict["approvals_by_reason"] == {"strict": 4}
+
+    cautious = policy.evaluate_batch(records, mode="cautious")
+    assert cautious["approvals"] == 1
+    assert cautious["approvals_by_reason"] == {"no_exception": 1}
+    assert cautious["exempt_by_rule"] == {"prs": 2, "issues": 1}
+    assert cautious["by_tenant"]["acme"] == {"requests": 5, "writes": 4, "approvals": 1}
+
+
+def test_policy_replay_reads_jsonl():
+    """The replay tool parses JSONL, skips bad lines and reports throughput."""
+    policy = PolicyEngine(cache_size=0)
+    stream = io.StringIO(
+        '{"tenant_id": "default", "provider": "github", "method": "POST", "path": "repos/o/r/pulls"}\n'
+        '{"tenant": "default", "provider": "github", "method": "GET", "path": "user"}\n'
+        'not json\n'
+        '\n'
+    )
+
+    result = replay(policy, stream)
+    assert result["requests"] == 2
+    assert result["approvals"] == 1
+    assert result["skipped"] == 1
+    assert result["requests_per_second"] > 0
+
+
+def test_replay_classifies_like_live_requests():
+    """Replay uses the live classifier (read POSTs, GraphQL queries) and skips malformed records."""
+    policy = PolicyEngine(cache_size=0)
+    query = json.dumps({"query": "query { viewer { login } }"})
+    mutation = json.dumps({"query": "mutation { addStar(input: {starrableId: \"x\"}) { clientMutationId } }"})
+    lines = [
+        {"tenant_id": "default", "provider": "slack", "method": "POST", "path": "conversations.history"},
+        {"tenant_id": "default", "provider": "github", "method": "POST", "path": "graphql", "body": query},
+        {"tenant_id": "default", "provider": "github", "method": "POST", "path": "graphql", "body": mutation},
+        {"tenant_id": "default", "provider": "github", "method": None, "path": "user"},
+        {"tenant_id": "default", "provider": "github", "method": 7, "path": "user"},
+        ["not", "an", "object"],
+    ]
+    result = replay(policy, io.StringIO("\n".join(json.dumps(line) for line in lines)))
+    assert result["requests"] == 3
+    assert result["reads"] == 2
+    assert result["writes"] == 1
+    assert result["skipped"] == 3
+
+    batch = policy.evaluate_batch([("default", "github", None, "user"), ("default", "slack", "POST", "users.list")])
+    assert batch["skipped"] == 1 and batch["reads"] == 1
+
+
+def test_read_post_endpoints():
+    """Listed Slack methods and Datadog query endpoints are reads; the rest stay writes."""
+    policy = PolicyEngine()
+
+    assert policy.classify_http_request("slack", "POST", "conversations.history") == "read"
+    assert policy.classify_http_request("slack", "POST", "/api/users.list?limit=100") == "read"
+    assert policy.classify_http_request("slack", "POST", "chat.postMessage") == "write"
+    assert policy.classify_http_request("datadog", "POST", "api/v2/logs/events/search") == "read"
+    assert policy.classify_http_request("datadog", "POST", "api/v1/monitor") == "write"
+    assert policy.classify_http_request("datadog", "DELETE", "api/v1/query") == "write"
+    assert policy.classify_http_request("github", "POST", "users.list") == "write"
+
+
 if __name__ == "__main__":
     test_read_never_requires_approval()
     print("✓ test_read_never_requires_approval")
@@ -94,4 +318,34 @@ if __name__ == "__main__":
     test_cli_classification_kubectl()
     print("✓ test_cli_classification_kubectl")
 
+    test_compiled_policy_matches_exceptions()
+    print("✓ test_compiled_policy_matches_exceptions")
+
+    test_cautious_mode_uses_exceptions()
+    print("✓ test_cautious_mode_uses_exceptions")
+
+    test_reload_swaps_snapshot_and_keeps_old_on_error()
+    print("✓ test_reload_swaps_snapshot_and_keeps_old_on_error")
+
+    test_watcher_reloads_changed_file()
+    print("✓ test_watcher_reloads_changed_file")
+
+    test_decision_cache_hits_and_invalidates_on_reload()
+    print("✓ test_decision_cache_hits_and_invalidates_on_reload")
+
+    test_decision_cache_is_bounded_lru()
+    print("✓ test_decision_cache_is_bounded_lru")
+
+    test_evaluate_batch_counts_by_rule()
+    print("✓ test_evaluate_batch_counts_by_rule")
+
+    test_policy_replay_reads_jsonl()
+    print("✓ test_policy_replay_reads_jsonl")
+
+    test_replay_classifies_like_live_requests()
+    print("✓ test_replay_classifies_like_live_requests")
+
+    test_read_post_endpoints()
+    print("✓ test_read_post_endpoints")
+
     print("\nAll policy tests passed!")
@@ -0,0 +1,302 @@
+"""Tests for the HTTP proxy and upstream session pool."""
+
+import asyncio
+import io
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from gatewayd.pool import UpstreamSessionPool
+from gatewayd.proxy import HTTPProxy
+from fake_upstream import FakeUpstream
+
+
+def make_proxy(upstream_url, **pool_kwargs):
+    """Build a proxy whose providers all point at a fake upstream."""
+    proxy = HTTPProxy(None, None, session_pool=UpstreamSessionPool(**pool_kwargs))
+    proxy.base_urls = {"github": upstream_url, "slack": upstream_url}
+    return proxy
+
+
+def test_pool_reuses_session_per_base_url():
+    """The same base URL gets the same session; a new one is a miss."""
+    pool = UpstreamSessionPool()
+
+    first = pool.get_session("https://api.github.com")
+    second = pool.get_session("https://api.github.com")
+    other = pool.get_session("https://slack.com/api")
+
+    assert first is second
+    assert other is not first
+    stats = pool.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["sessions"] == 2
+
+
+def test_pool_per_tenant_isolation():
+    """Per-tenant pools give each tenant its own session."""
+    shared = UpstreamSessionPool(per_tenant=False)
+    assert shared.get_session("https://api.github.com", "a") is shared.get_session("https://api.github.com", "b")
+
+    isolated = UpstreamSessionPool(per_tenant=True)
+    assert isolated.get_session("https://api.github.com", "a") is not isolated.get_session("https://api.github.com", "b")
+
+
+def test_shared_pool_does_not_carry_cookies_between_tenants():
+    """An upstream Set-Cookie on one tenant's request is not replayed on another's."""
+    with FakeUpstream() as upstream:
+        upstream.route("POST", "/login", lambda record: (200, {"Set-Cookie": "sid=tenant-a; Path=/"}, b"{}"))
+        proxy = make_proxy(upstream.url, per_tenant=False)
+
+        for tenant_id, path in [("tenant-a", "/login"), ("tenant-b", "/repos/o/r/issues")]:
+            result = proxy.forward_request(
+                method="POST",
+                path=path,
+                headers={"X-Provider": "github"},
+                data=b"{}",
+                credentials={"token": f"ghp_{tenant_id}"},
+                provider="github",
+                tenant_id=tenant_id,
+            )
+            assert result["status_code"] == 200
+
+        assert proxy.get_stats()["pool"]["sessions"] == 1
+        assert "Cookie" not in upstream.requests[1]["headers"]
+
+
+def test_pool_capacity_and_idle_eviction():
+    """Sessions beyond max_sessions or idle_timeout are evicted."""
+    pool = UpstreamSessionPool(max_sessions=2, idle_timeout=0)
+
+    pool.get_session("https://a.example.com")
+    pool.get_session("https://b.example.com")
+    pool.get_session("https://c.example.com")
+    assert pool.get_stats()["capacity_evictions"] == 1
+    assert pool.get_stats()["sessions"] == 2
+
+    assert pool.evict_idle() == 2
+    assert pool.get_stats()["sessions"] == 0
+
+
+def test_pool_sweeper_closes_idle_sessions():
+    """Idle sessions are closed in the background even if their upstream is never called again."""
+    pool = UpstreamSessionPool(idle_timeout=0.05)
+    pool.start_sweeper()
+    try:
+        pool.get_session("https://a.example.com")
+        pool.get_session("https://b.example.com")
+        deadline = time.monotonic() + 2
+        while pool.get_stats()["sessions"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.get_stats()["sessions"] == 0
+        assert pool.get_stats()["idle_evictions"] == 2
+    finally:
+        pool.stop_sweeper()
+
+
+def test_forward_request_reuses_connection():
+    """Repeated proxied calls ride one keep-alive connection."""
+    with FakeUpstream() as upstream:
+        proxy = make_proxy(upstream.url)
+
+        for _ in range(5):
+            result = proxy.forward_request(
+                method="GET",
+                path="/repos/owner/repo",
+                headers={"Authorization": "Bearer agent-token", "X-Provider": "github"},
+                data=None,
+                credentials={"token": "ghp_test"},
+                provider="github",
+            )
+            assert result["status_code"] == 200
+
+        assert upstream.connections == 1
+        assert upstream.requests[0]["headers"]["Authorization"] == "token ghp_test"
+        assert proxy.get_stats()["pool"]["hits"] == 4
+
+
+def test_forward_request_generic_methods():
+    """Every supported method goes through the generic path with its body."""
+    with FakeUpstream() as upstream:
+        proxy = make_proxy(upstream.url)
+
+        for method in ["POST", "PUT", "PATCH", "DELETE", "OPTIONS"]:
+            result = proxy.forward_request(
+                method=method,
+                path="/chat.postMessage",
+                headers={},
+                data=b"payload",
+                credentials=None,
+                provider="slack",
+            )
+            assert result["status_code"] == 200
+
+        assert [r["method"] for r in upstream.requests] == ["POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+        assert all(r["body"] == b"payload" for r in upstream.requests)
+
+        result = proxy.forward_request("TRACE", "/", {}, None, None, "slack")
+        assert result["status_code"] == 405
+
+
+def test_forward_request_streams_response():
+    """Streaming mode yields bounded chunks and scrubs headers."""
+    with FakeUpstream() as upstream:
+        chunks = [b"a" * 1000, b"b" * 1000, b"c" * 1000]
+        upstream.route("GET", "/archive", lambda record: (
+            200,
+            {"Cookie": "secret", "X-Api-Key": "k", "X-Request-Id": "r1"},
+            iter(chunks),
+        ))
+        proxy = make_proxy(upstream.url)
+        proxy.stream_chunk_size = 512
+
+        result = proxy.forward_request("GET", "/archive", {}, None, None, "github", stream=True)
+
+        assert not isinstance(result["body"], bytes)
+        received = list(result["body"])
+        assert all(len(chunk) <= 512 for chunk in received)
+        assert b"".join(received) == b"".join(chunks)
+        assert "Cookie" not in result["headers"]
+        assert "X-Api-Key" not in result["headers"]
+        assert "Transfer-Encoding" not in result["headers"]
+        assert result["headers"]["X-Request-Id"] == "r1"
+
+        # A drained stream returns its connection to the pool for reuse
+        assert list(proxy.forward_request("GET", "/archive", {}, None, None, "github", stream=True)["body"])
+        assert upstream.connections == 1
+
+        # A stream closed before iteration still releases its connection
+        body = proxy.forward_request("GET", "/archive", {}, None, None, "github", stream=True)["body"]
+        body.close()
+        # (coalesced reads hand out a reader over the shared upstream body)
+        assert body.stream.source.response.raw.closed
+
+
+def test_stream_body_passes_upload_through():
+    """Known-length and chunked uploads reach the upstream intact."""
+    with FakeUpstream() as upstream:
+        proxy = make_proxy(upstream.url)
+        payload = os.urandom(300 * 1024)
+
+        body = proxy.stream_body(io.BytesIO(payload), len(payload))
+        headers = {"Content-Length": str(len(payload)), "Host": "localhost:5000", "Content-Type": "application/zip"}
+        proxy.forward_request("POST", "/upload", headers, body, None, "github")
+
+        body = proxy.stream_body(io.BytesIO(payload), None)
+        proxy.forward_request("POST", "/upload", {"Transfer-Encoding": "chunked"}, body, None, "github")
+
+        sized, chunked = upstream.requests
+        assert sized["body"] == payload
+        assert sized["headers"]["Content-Length"] == str(len(payload))
+        assert sized["headers"]["Host"] != "localhost:5000"
+        assert sized["headers"]["Content-Type"] == "application/zip"
+        assert chunked["body"] == payload
+        assert chunked["headers"]["Transfer-Encoding"] == "chunked"
+
+        assert proxy.stream_body(io.BytesIO(b""), 0) is None
+
+
+def test_spool_body_spills_to_disk_above_threshold():
+    """Spooled bodies stay in memory below the threshold and spill above it."""
+    proxy = make_proxy("http://unused")
+    proxy.spool_threshold = 1024
+
+    small = proxy.spool_body(io.BytesIO(b"x" * 100))
+    assert len(small) == 100
+    assert not small.fileobj._rolled
+
+    large = proxy.spool_body(io.BytesIO(b"y" * 4096))
+    assert len(large) == 4096
+    assert large.fileobj._rolled
+    assert large.read() == b"y" * 4096
+
+    large.rewind()
+    assert large.read(10) == b"y" * 10
+
+    small.close()
+    large.close()
+
+
+def test_async_forward_uses_httpx():
+    """With httpx installed, async forwards go through the AsyncClient; spooled uploads are read off the loop."""
+    with FakeUpstream() as upstream:
+        chunks = [b"a" * 1000, b"b" * 1000, b"c" * 1000]
+        upstream.route("GET", "/archive", lambda record: (200, {"X-Request-Id": "r1"}, iter(chunks)))
+        proxy = make_proxy(upstream.url)
+        if not proxy.async_pool.available:
+            print("  skipped: httpx not installed (pip install -r requirements-asgi.txt)")
+            return
+        proxy.spool_threshold = 1024
+        proxy.stream_chunk_size = 512
+
+        async def run():
+            payload = os.urandom(64 * 1024)
+            body = proxy.spool_body(io.BytesIO(payload))
+            assert body.fileobj._rolled
+            read = body.read
+            readers = set()
+
+            def recording_read(size=-1):
+                readers.add(threading.get_ident())
+                return read(size)
+
+            body.read = recording_read
+            result = await proxy.forward_request_async("POST", "/upload", {}, body, None, "github", stream=False)
+            assert result["status_code"] == 200
+            assert upstream.requests[-1]["body"] == payload
+            assert upstream.requests[-1]["headers"]["Content-Length"] == str(len(payload))
+            assert readers and threading.get_ident() not in readers
+
+            result = await proxy.forward_request_async("GET", "/archive", {}, None, None, "github", stream=True)
+            received = [chunk async for chunk in result["body"]]
+            assert all(len(chunk) <= 512 for chunk in received)
+            assert b"".join(received) == b"".join(chunks)
+            # httpx reports header names in lower case
+            assert {name.lower(): value for name, value in result["headers"].items()}["x-request-id"] == "r1"
+
+            assert proxy.async_pool.get_stats()["requests"] == 2
+            await proxy.async_pool.aclose()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_pool_reuses_session_per_base_url()
+    print("✓ test_pool_reuses_session_per_base_url")
+
+    test_pool_per_tenant_isolation()
+    print("✓ test_pool_per_tenant_isolation")
+
+    test_shared_pool_does_not_carry_cookies_between_tenants()
+    print("✓ test_shared_pool_does_not_carry_cookies_between_tenants")
+
+    test_pool_capacity_and_idle_eviction()
+    print("✓ test_pool_capacity_and_idle_eviction")
+
+    test_pool_sweeper_closes_idle_sessions()
+    print("✓ test_pool_sweeper_closes_idle_sessions")
+
+    test_forward_request_reuses_connection()
+    print("✓ test_forward_request_reuses_connection")
+
+    test_forward_request_generic_methods()
+    print("✓ test_forward_request_generic_methods")
+
+    test_forward_request_streams_response()
+    print("✓ test_forward_request_streams_response")
+
+    test_stream_body_passes_upload_through()
+    print("✓ test_stream_body_passes_upload_through")
+
+    test_spool_body_spills_to_disk_above_threshold()
+    print("✓ test_spool_body_spills_to_disk_above_threshold")
+
+    test_async_forward_uses_httpx()
+    print("✓ test_async_forward_uses_httpx")
+
+    print("\nAll proxy tests passed!")
@@ -0,0 +1,143 @@
+"""Tests for upstream rate-limit tracking and pacing."""
+
+import sys
+import os
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from gatewayd.cache import ResponseCache
+from gatewayd.coalesce import SingleFlight
+from gatewayd.proxy import HTTPProxy
+from gatewayd.ratelimit import RateLimiter, parse_retry_after
+from fake_upstream import FakeUpstream
+
+
+def make_proxy(upstream_url, **limiter_kwargs):
+    """Proxy with caching and coalescing off, pointed at a fake upstream."""
+    proxy = HTTPProxy(
+        None,
+        None,
+        response_cache=ResponseCache(enabled=False),
+        single_flight=SingleFlight(enabled=False),
+        rate_limiter=RateLimiter(**limiter_kwargs),
+    )
+    proxy.base_urls = {"github": upstream_url}
+    return proxy
+
+
+def get(proxy, path, cred_selector="github:pat"):
+    """Forward a GET through the proxy."""
+    return proxy.forward_request("GET", path, {}, None, None, "github", "acme", cred_selector=cred_selector)
+
+
+def test_exhausted_quota_is_refused_locally():
+    """After the upstream reports no remaining quota, requests get a local 429 until the reset."""
+    with FakeUpstream() as upstream:
+        reset = int(time.time()) + 120
+        upstream.route("GET", "/user", lambda record: (200, {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(reset),
+        }, b"{}"))
+        proxy = make_proxy(upstream.url)
+
+        assert get(proxy, "/user")["status_code"] == 200
+        refused = get(proxy, "/user")
+        assert refused["status_code"] == 429
+        assert refused["headers"]["X-Gate-RateLimit"] == "local"
+        assert 118 <= int(refused["headers"]["Retry-After"]) <= 121
+        assert json.loads(refused["body"])["retry_after"] == int(refused["headers"]["Retry-After"])
+        assert len(upstream.requests) == 1
+
+        # Other credentials have their own quota
+        assert get(proxy, "/user", cred_selector="github:other")["status_code"] == 200
+        assert len(upstream.requests) == 2
+
+        stats = proxy.get_stats()["ratelimit"]
+        assert stats["rejected"] == 1
+        gauge = stats["credentials"]["acme/github/github:other"]
+        assert gauge["limit"] == 5000 and gauge["remaining"] == 0
+        assert 100 < gauge["reset_in"] <= 120
+
+
+def test_retry_after_blocks_then_waits():
+    """A 429 with Retry-After blocks the credential; short waits are absorbed by the gateway."""
+    with FakeUpstream() as upstream:
+        responses = [(429, {"Retry-After": "1"}, b"slow down"), (200, {}, b"ok")]
+        upstream.route("GET", "/search", lambda record: responses.pop(0))
+        proxy = make_proxy(upstream.url, max_wait=2)
+
+        assert get(proxy, "/search")["status_code"] == 429
+
+        started = time.time()
+        result = get(proxy, "/search")
+        assert result["status_code"] == 200
+        assert result["body"] == b"ok"
+        assert time.time() - started >= 0.9
+
+        stats = proxy.rate_limiter.get_stats()
+        assert stats["upstream_limited"] == 1
+        assert stats["delayed"] == 1
+
+
+def test_low_quota_is_paced():
+    """Below pace_below of the limit, requests are spread over the time to reset."""
+    limiter = RateLimiter(max_wait=5, pace_below=0.1)
+    key = limiter.key("acme", "datadog", "datadog:main")
+    # Datadog sends the reset as seconds from now
+    limiter.observe(key, 200, {"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "1"})
+
+    started = time.time()
+    for _ in range(3):
+        assert limiter.acquire(key) == 0
+    elapsed = time.time() - started
+
+    # Intervals of 1s / 5, 1s / 4 (after the first request goes immediately)
+    assert 0.35 <= elapsed < 1.0
+    assert limiter.get_stats()["credentials"]["acme/datadog/datadog:main"]["remaining"] == 2
+
+    # Plenty of quota: no pacing
+    limiter.observe(key, 200, {"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "90", "X-RateLimit-Reset": "60"})
+    started = time.time()
+    for _ in range(10):
+        limiter.acquire(key)
+    assert time.time() - started < 0.1
+
+
+def test_header_parsing():
+    """Retry-After accepts seconds and HTTP dates; responses without quota headers are not tracked."""
+    now = time.time()
+    assert parse_retry_after("30", now) == 30.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now) == 0.0
+    assert parse_retry_after("soon", now) is None
+
+    limiter = RateLimiter()
+    limiter.observe(limiter.key("acme", "github", "github:pat"), 200, {"Content-Type": "application/json"})
+    assert limiter.get_stats()["credentials"] == {}
+
+    # Unauthenticated calls share the gateway's own quota across tenants
+    assert limiter.key("acme", "github", None) == limiter.key("other", "github", None)
+
+    # Secondary limits: 403 with Retry-After
+    key = limiter.key("acme", "github", "github:pat")
+    limiter.observe(key, 403, {"Retry-After": "90"})
+    assert limiter.acquire(key) > 80
+
+
+if __name__ == "__main__":
+    test_exhausted_quota_is_refused_locally()
+    print("✓ test_exhausted_quota_is_refused_locally")
+
+    test_retry_after_blocks_then_waits()
+    print("✓ test_retry_after_blocks_then_waits")
+
+    test_low_quota_is_paced()
+    print("✓ test_low_quota_is_paced")
+
+    test_header_parsing()
+    print("✓ test_header_parsing")
+
+    print("\nAll rate limit tests passed!")
@@ -0,0 +1,212 @@
+"""Tests for adaptive timeouts, circuit breaking and hedged reads."""
+
+import sys
+import os
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from gatewayd.cache import ResponseCache
+from gatewayd.coalesce import SingleFlight
+from gatewayd.proxy import HTTPProxy
+from gatewayd.resilience import CircuitBreaker, LatencyTracker, UpstreamHealth
+from fake_upstream import FakeUpstream
+
+
+def make_proxy(upstream_url, **health_kwargs):
+    """Proxy with caching and coalescing off, pointed at a fake upstream."""
+    health_kwargs.setdefault("min_samples", 3)
+    proxy = HTTPProxy(
+        None,
+        None,
+        response_cache=ResponseCache(enabled=False),
+        single_flight=SingleFlight(enabled=False),
+        upstream_health=UpstreamHealth(**health_kwargs),
+    )
+    proxy.base_urls = {"datadog": upstream_url}
+    return proxy
+
+
+def get(proxy, path="/api/v1/monitor"):
+    """Forward a GET through the proxy."""
+    return proxy.forward_request("GET", path, {}, None, None, "datadog", "acme")
+
+
+def warm_up(proxy, count=3):
+    """Record enough fast calls for latency-based decisions."""
+    for _ in range(count):
+        assert get(proxy)["status_code"] == 200
+
+
+def test_timeouts_follow_observed_latency():
+    """Once a provider is known to be fast, a stalled call times out well before the default."""
+    with FakeUpstream() as upstream:
+        proxy = make_proxy(upstream.url, min_timeout=0.2, max_timeout=30)
+        assert proxy.upstream_health.timeout("datadog") == 30
+
+        warm_up(proxy)
+        assert proxy.upstream_health.timeout("datadog") == 0.2
+
+        upstream.inject_fault("GET", "/api/v1/monitor", delay=1.0, count=1)
+        started = time.time()
+        try:
+            get(proxy)
+            assert False, "expected a timeout"
+        except requests.exceptions.Timeout:
+            pass
+        assert time.time() - started < 0.8
+
+        stats = proxy.get_stats()["upstreams"]["providers"]["datadog"]
+        assert stats["samples"] == 4
+        assert stats["consecutive_failures"] == 1
+
+
+def test_circuit_opens_and_recovers():
+    """Repeated 5xx and dropped connections open the circuit; a successful probe closes it."""
+    with FakeUpstream() as upstream:
+        proxy = make_proxy(upstream.url, failure_threshold=2, reset_timeout=0.3)
+
+        upstream.inject_fault("GET", "/api/v1/monitor", status=503, count=1)
+        assert get(proxy)["status_code"] == 503
+        upstream.inject_fault("GET", "/api/v1/monitor", reset=True, count=1)
+        try:
+            get(proxy)
+            assert False, "expected a connection error"
+        except requests.exceptions.ConnectionError:
+            pass
+
+        # Open: fail fast without touching the upstream
+        refused = get(proxy)
+        assert refused["status_code"] == 503
+        assert refused["headers"]["X-Gate-Circuit"] == "open"
+        assert refused["headers"]["Retry-After"] == "1"
+        assert len(upstream.requests) == 2
+
+        # Other providers are unaffected
+        proxy.base_urls["github"] = upstream.url
+        assert proxy.forward_request("GET", "/user", {}, None, None, "github", "acme")["status_code"] == 200
+
+        time.sleep(0.35)
+        assert get(proxy)["status_code"] == 200
+        stats = proxy.get_stats()["upstreams"]
+        assert stats["providers"]["datadog"]["state"] == "closed"
+        assert stats["providers"]["datadog"]["trips"] == 1
+        assert stats["fast_failures"] == 1
+
+
+def test_half_open_allows_one_probe():
+    """In half-open state only one probe goes through, and its failure reopens the circuit."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record(False, now=100.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.check(now=105.0) == 5.0
+
+    assert breaker.check(now=110.0) == 0.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.check(now=110.0) > 0
+
+    breaker.record(False, now=111.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.check(now=112.0) > 0
+
+
+def test_cancelled_probe_releases_breaker():
+    """A half-open probe cancelled mid-flight lets the next request probe instead of failing fast forever."""
+    import asyncio
+
+    class HangingPool:
+        available = True
+
+        async def send(self, *args):
+            await asyncio.sleep(10)
+
+        def get_stats(self):
+            return {}
+
+    health = UpstreamHealth(failure_threshold=1, reset_timeout=0.01)
+    proxy = HTTPProxy(
+        None,
+        None,
+        response_cache=ResponseCache(enabled=False),
+        upstream_health=health,
+        async_pool=HangingPool(),
+    )
+    health.record("datadog", 0.1, ok=False)
+    time.sleep(0.02)
+
+    async def cancel_probe():
+        probe = asyncio.create_task(proxy.forward_request_async("GET", "/api/v1/monitor", {}, None, None, "datadog"))
+        await asyncio.sleep(0.05)
+        assert health.check("datadog") > 0
+        probe.cancel()
+        try:
+            await probe
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancel_probe())
+    assert health.check("datadog") == 0.0
+
+
+def test_slow_reads_are_hedged():
+    """A GET still pending after the p95 is re-sent and the faster answer wins."""
+    with FakeUpstream() as upstream:
+        proxy = make_proxy(upstream.url, hedge_enabled=True)
+        warm_up(proxy)
+
+        upstream.inject_fault("GET", "/api/v1/monitor", delay=1.0, count=1)
+        started = time.time()
+        result = get(proxy)
+        assert result["status_code"] == 200
+        assert time.time() - started < 0.8
+        assert len(upstream.requests) == 5
+
+        stats = proxy.get_stats()["upstreams"]
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+
+        # Writes are never hedged
+        upstream.inject_fault("POST", "/api/v1/monitor", delay=0.3, count=1)
+        proxy.forward_request("POST", "/api/v1/monitor", {}, b"{}", None, "datadog", "acme")
+        assert len(upstream.requests) == 6
+
+
+def test_latency_percentiles_track_sliding_window():
+    """Percentiles match a sort of the current window after old samples fall out."""
+    import random
+
+    tracker = LatencyTracker(50)
+    assert tracker.p95 is None
+    rng = random.Random(7)
+    for _ in range(500):
+        tracker.record(rng.choice([0.01, 0.05, rng.random()]))
+        ordered = sorted(tracker.samples)
+        last = len(ordered) - 1
+        assert tracker.p95 == ordered[int(last * 0.95)]
+        assert tracker.p99 == ordered[int(last * 0.99)]
+    assert len(tracker.samples) == 50
+
+
+if __name__ == "__main__":
+    test_timeouts_follow_observed_latency()
+    print("✓ test_timeouts_follow_observed_latency")
+
+    test_circuit_opens_and_recovers()
+    print("✓ test_circuit_opens_and_recovers")
+
+    test_half_open_allows_one_probe()
+    print("✓ test_half_open_allows_one_probe")
+
+    test_cancelled_probe_releases_breaker()
+    print("✓ test_cancelled_probe_releases_breaker")
+
+    test_slow_reads_are_hedged()
+    print("✓ test_slow_reads_are_hedged")
+
+    test_latency_percentiles_track_sliding_window()
+    print("✓ test_latency_percentiles_track_sliding_window")
+
+    print("\nAll resilience tests passed!")
@@ -0,0 +1,206 @@
+"""Tests for sessions and approvals shared between worker processes."""
+
+import sys
+import os
+import sqlite3
+import stat
+import subprocess
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.approvals import ApprovalOrchestrator, ApprovalStatus
+from gatewayd.auth import SessionManager
+from gatewayd.gateway import Gateway
+from gatewayd.state import SQLiteStateBackend
+
+
+class MockGatewayRequest:
+    """Mock gateway request for testing."""
+    def __init__(self):
+        self.id = "test-req-123"
+
+
+def state_path():
+    """Fresh database path for one test."""
+    return os.path.join(tempfile.mkdtemp(), "state.db")
+
+
+def test_sessions_are_shared():
+    """A token issued by one worker is valid in, and revocable from, another."""
+    path = state_path()
+    worker_a = SessionManager(state=SQLiteStateBackend(path))
+    worker_b = SessionManager(state=SQLiteStateBackend(path))
+
+    token = worker_a.create_session("default")
+    session = worker_b.validate_token(token)
+    assert session is not None
+    assert session["tenant_id"] == "default"
+
+    # Only a hash of the token is stored
+    rows = sqlite3.connect(path).execute("SELECT token_hash, record FROM sessions").fetchall()
+    assert len(rows) == 1
+    assert token not in rows[0][0] and token not in rows[0][1]
+
+    assert worker_b.revoke_session(token)
+    assert worker_a.validate_token(token) is None
+
+    expired = worker_a.create_session("default", ttl_seconds=-1)
+    assert worker_b.validate_token(expired) is None
+
+
+def test_approval_decided_in_another_worker():
+    """Approving in one worker wakes the request waiting in another."""
+    path = state_path()
+    owner = ApprovalOrchestrator(state=SQLiteStateBackend(path), poll_interval=0.05)
+    other = ApprovalOrchestrator(state=SQLiteStateBackend(path), poll_interval=0.05)
+    owner.start_sweeper()
+
+    try:
+        approval_id = owner.request_approval(MockGatewayRequest(), "default", {"method": "POST", "path": "/test"})
+        assert other.get_status(approval_id)["status"] == ApprovalStatus.PENDING.value
+
+        result = {}
+        waiter = threading.Thread(target=lambda: result.update(approved=owner.wait_for_approval(approval_id, 5)))
+        waiter.start()
+
+        other.approve(approval_id)
+        waiter.join(timeout=5)
+        assert result.get("approved") is True
+        assert owner.get_status(approval_id)["status"] == ApprovalStatus.APPROVED.value
+        assert other.get_status(approval_id)["status"] == ApprovalStatus.APPROVED.value
+    finally:
+        owner.stop_sweeper()
+
+
+def test_first_decision_wins_across_workers():
+    """A local decision loses to one already recorded by another worker."""
+    path = state_path()
+    owner = ApprovalOrchestrator(state=SQLiteStateBackend(path))
+    other = ApprovalOrchestrator(state=SQLiteStateBackend(path))
+
+    approval_id = owner.request_approval(MockGatewayRequest(), "default", {"method": "POST", "path": "/test"})
+    other.deny(approval_id)
+    owner.approve(approval_id)
+
+    # Still pending locally until the owner polls, then denied
+    assert owner.approvals[approval_id]["status"] == ApprovalStatus.PENDING.value
+    assert owner.sync_shared_state() == 1
+    assert owner.get_status(approval_id)["status"] == ApprovalStatus.DENIED.value
+
+    # Long-polls from a worker that does not own the approval see the decision
+    assert other.wait_for_decision(approval_id, 1)["status"] == ApprovalStatus.DENIED.value
+    assert other.get_status("missing") is None
+
+
+def test_decisions_cross_processes():
+    """A forked worker process approves an approval this process waits on."""
+    path = state_path()
+    owner = ApprovalOrchestrator(state=SQLiteStateBackend(path), poll_interval=0.05)
+    owner.start_sweeper()
+
+    try:
+        approval_id = owner.request_approval(MockGatewayRequest(), "default", {"method": "POST", "path": "/test"})
+        pid = os.fork()
+        if pid == 0:
+            ApprovalOrchestrator(state=SQLiteStateBackend(path)).approve(approval_id)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert owner.wait_for_approval(approval_id, 5) is True
+    finally:
+        owner.stop_sweeper()
+
+
+def test_state_file_is_private():
+    """The default database lives in a private directory, is 0600, and another user's file is refused."""
+    state_home = tempfile.mkdtemp()
+    previous = os.environ.get("XDG_STATE_HOME")
+    os.environ["XDG_STATE_HOME"] = state_home
+    try:
+        backend = SQLiteStateBackend()
+    finally:
+        if previous is None:
+            del os.environ["XDG_STATE_HOME"]
+        else:
+            os.environ["XDG_STATE_HOME"] = previous
+
+    assert backend.path == os.path.join(state_home, "gatewayd", "state.db")
+    assert stat.S_IMODE(os.stat(os.path.dirname(backend.path)).st_mode) == 0o700
+    backend.put_session("token", {"tenant_id": "default"}, 2**31)
+    for suffix in ("", "-wal"):
+        assert stat.S_IMODE(os.stat(backend.path + suffix).st_mode) == 0o600
+
+    # A loosened file of our own is tightened again
+    path = state_path()
+    open(path, "w").close()
+    os.chmod(path, 0o666)
+    SQLiteStateBackend(path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    # Only root can hand a file to another user to check the refusal
+    if os.getuid() == 0:
+        planted = state_path()
+        open(planted, "w").close()
+        os.chown(planted, 65534, 65534)
+        try:
+            SQLiteStateBackend(planted)
+            assert False, "expected PermissionError"
+        except PermissionError:
+            pass
+
+
+def test_serve_refuses_per_worker_features():
+    """Several workers need sync approvals with grants off; workers then never park requests."""
+    root = os.path.join(os.path.dirname(__file__), "..")
+
+    def serve(**env):
+        return subprocess.run(
+            [sys.executable, "-m", "gatewayd", "serve", "--workers", "2", "--port", "0"],
+            cwd=root, env={**os.environ, **env}, capture_output=True, text=True, timeout=30,
+        )
+
+    refused = serve(APPROVAL_MODE="async", APPROVAL_GRANTS="false")
+    assert refused.returncode == 2 and "APPROVAL_MODE=sync" in refused.stderr
+    refused = serve(APPROVAL_MODE="sync", APPROVAL_GRANTS="true")
+    assert refused.returncode == 2 and "APPROVAL_GRANTS=false" in refused.stderr
+
+    previous = {name: os.environ.get(name) for name in ("GATEWAY_WORKERS", "APPROVAL_GRANTS")}
+    os.environ.update(GATEWAY_WORKERS="2", APPROVAL_GRANTS="false")
+    try:
+        gateway = Gateway()
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    assert not gateway.wants_async("respond-async")
+    grants_before = gateway.grant_table.get_stats()["exact"]
+    approval_id = gateway.approval_orchestrator.request_approval(MockGatewayRequest(), "default", {"method": "POST", "path": "/x"})
+    gateway.approval_orchestrator.approve(approval_id, duration_minutes=30)
+    assert gateway.approval_orchestrator.get_status(approval_id)["status"] == ApprovalStatus.APPROVED.value
+    assert gateway.grant_table.get_stats()["exact"] == grants_before
+
+
+if __name__ == "__main__":
+    test_sessions_are_shared()
+    print("✓ test_sessions_are_shared")
+
+    test_approval_decided_in_another_worker()
+    print("✓ test_approval_decided_in_another_worker")
+
+    test_first_decision_wins_across_workers()
+    print("✓ test_first_decision_wins_across_workers")
+
+    test_decisions_cross_processes()
+    print("✓ test_decisions_cross_processes")
+
+    test_state_file_is_private()
+    print("✓ test_state_file_is_private")
+
+    test_serve_refuses_per_worker_features()
+    print("✓ test_serve_refuses_per_worker_features")
+
+    print("\nAll state tests passed!")
@@ -0,0 +1,120 @@
+"""Tests for signed session tokens, key rotation and revocation."""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gatewayd.auth import SessionManager
+from gatewayd.state import SQLiteStateBackend
+from gatewayd.tokens import BloomFilter, RevocationList, SignedTokens, SigningKeyring
+
+
+def keyring(*key_ids):
+    """Keyring with one secret per key id; the first is active."""
+    return SigningKeyring({key_id: f"secret-{key_id}".encode() for key_id in key_ids}, key_ids[0])
+
+
+def test_signed_tokens_verify_without_state():
+    """Any manager holding the keyring validates a token; tampering is rejected."""
+    issuer = SessionManager(token_format="signed", keyring=keyring("k1"))
+    other = SessionManager(token_format="signed", keyring=keyring("k1"))
+
+    token = issuer.create_session("default", ttl_seconds=60)
+    assert token.startswith("gs1.k1.")
+    assert issuer.sessions == {}
+    session = other.validate_token(token)
+    assert session["tenant_id"] == "default"
+
+    # Forged claims (another tenant, later expiry) under the original signature
+    prefix, key_id, expires, token_id, tenant_id, signature = token.split(".")
+    assert tenant_id == "default"
+    assert other.validate_token(".".join([prefix, key_id, expires, token_id, "admin", signature])) is None
+    assert other.validate_token(".".join([prefix, key_id, "9" * 12, token_id, tenant_id, signature])) is None
+    assert other.validate_token(token[:-2] + "AA") is None
+    assert other.validate_token("gs1.k1.bad") is None
+
+    # Tenants with dots survive; ones that cannot go in a header are refused
+    dotted = issuer.create_session("team.a")
+    assert other.validate_token(dotted)["tenant_id"] == "team.a"
+    try:
+        issuer.create_session("bad tenant")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    # Wrong secret, expired token, opaque token unknown to this process
+    assert SessionManager(keyring=SigningKeyring({"k1": b"other"}, "k1")).validate_token(token) is None
+    assert other.validate_token(issuer.create_session("default", ttl_seconds=-1)) is None
+    assert other.validate_token("not-a-signed-token") is None
+
+
+def test_key_rotation():
+    """Tokens from a retired-but-kept key still verify; removing the key invalidates them."""
+    old_token = SignedTokens(keyring("k1")).issue("default", 60)
+
+    rotated = SessionManager(token_format="signed", keyring=keyring("k2", "k1"))
+    assert rotated.validate_token(old_token)["tenant_id"] == "default"
+    assert rotated.create_session("default").startswith("gs1.k2.")
+
+    retired = SessionManager(token_format="signed", keyring=keyring("k2"))
+    assert retired.validate_token(old_token) is None
+
+    os.environ["SESSION_SIGNING_KEYS"] = "k3:alpha, k2:beta"
+    try:
+        from_env = SigningKeyring.from_env()
+    finally:
+        del os.environ["SESSION_SIGNING_KEYS"]
+    assert from_env.active == "k3"
+    assert from_env.keys == {"k3": b"alpha", "k2": b"beta"}
+
+
+def test_revocation_list():
+    """Revoked ids are found; others rarely reach the exact check; expired entries drop out."""
+    bloom = BloomFilter(1024)
+    bloom.add("a")
+    assert "a" in bloom
+
+    revocations = RevocationList(bloom_bits=1 << 16)
+    revocations.add("gone", expires_at=0)
+    revocations.add("revoked", expires_at=4_000_000_000)
+    assert "revoked" in revocations
+    assert "gone" not in revocations
+    assert len(revocations) == 1
+
+    misses = sum(f"token-{i}" in revocations for i in range(10000))
+    assert misses == 0
+    assert revocations.get_stats()["bloom_hits"] < 100
+
+
+def test_revocation_is_shared_between_workers():
+    """revoke_session in one worker rejects the token in another via the state backend."""
+    path = os.path.join(tempfile.mkdtemp(), "state.db")
+    worker_a = SessionManager(SQLiteStateBackend(path), token_format="signed", keyring=keyring("k1"))
+    worker_b = SessionManager(SQLiteStateBackend(path), token_format="signed", keyring=keyring("k1"))
+    worker_b.poll_interval = 0
+
+    token = worker_a.create_session("default")
+    assert worker_b.validate_token(token) is not None
+
+    assert worker_a.revoke_session(token) is True
+    assert worker_a.revoke_session(token) is False
+    assert worker_a.validate_token(token) is None
+    assert worker_b.validate_token(token) is None
+
+
+if __name__ == "__main__":
+    test_signed_tokens_verify_without_state()
+    print("✓ test_signed_tokens_verify_without_state")
+
+    test_key_rotation()
+    print("✓ test_key_rotation")
+
+    test_revocation_list()
+    print("✓ test_revocation_list")
+
+    test_revocation_is_shared_between_workers()
+    print("✓ test_revocation_is_shared_between_workers")
+
+    print("\nAll token tests passed!")